@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""
+Measures the time to save and load a large generated model as a binary snapshot compared with pickle, and the time
+to open the snapshot lazily and read a few tables.
+
+Copyright 2020 ThoughtSpot
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions
+of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+Usage:  python -m benchmarks.snapshot [--tables 50000] [--columns 10] [--outfile /tmp/benchmark.snapshot]
+"""
+import argparse
+import os
+import pickle
+import time
+
+from benchmarks.tql_writer import build_database
+from dt.model import Database
+
+
+def timed(function, repeat):
+    """
+    Runs the function and returns the best time.
+    :param function: The function to run.
+    :param repeat: The number of times to run the function.
+    :type repeat: int
+    :return: The shortest time in seconds.
+    :rtype: float
+    """
+    results = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        results.append(time.perf_counter() - start)
+    return min(results)
+
+
+def main():
+    """Main function for the script."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tables", type=int, default=50000, help="number of tables to generate")
+    parser.add_argument("--columns", type=int, default=10, help="number of columns per table")
+    parser.add_argument("--outfile", default="/tmp/benchmark.snapshot", help="file to write the snapshot to")
+    parser.add_argument("--repeat", type=int, default=3, help="number of runs; the best is reported")
+    args = parser.parse_args()
+
+    database = build_database(args.tables, args.columns)
+    pickle_file = args.outfile + ".pkl"
+
+    def save_pickle():
+        with open(pickle_file, "wb") as outfile:
+            pickle.dump(database, outfile, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load_pickle():
+        with open(pickle_file, "rb") as infile:
+            pickle.load(infile)
+
+    for label, save, load, filename in (
+            ("snapshot", lambda: database.save_snapshot(args.outfile),
+             lambda: Database.load_snapshot(args.outfile), args.outfile),
+            ("pickle", save_pickle, load_pickle, pickle_file)
+    ):
+        save_time = timed(save, args.repeat)
+        load_time = timed(load, args.repeat)
+        size = os.path.getsize(filename) / (1024 * 1024)
+        print(f"{label:10} {size:8.1f} MB  save {save_time:6.2f} s  load {load_time:6.2f} s")
+        if filename == pickle_file:
+            os.remove(filename)
+
+    table_names = [f"table_{idx}" for idx in (0, args.tables // 2, args.tables - 1)]
+
+    def read_lazily():
+        lazy_database = Database.load_snapshot(args.outfile, lazy=True)
+        for table_name in table_names:
+            lazy_database.get_table(table_name)
+
+    print(f"lazy open and read {len(table_names)} tables {timed(read_lazily, args.repeat):6.2f} s")
+    os.remove(args.outfile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+Measures the output rate of TQLWriter for a large generated model.
+
+Copyright 2020 ThoughtSpot
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions
+of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+Usage:  python -m benchmarks.tql_writer [--tables 50000] [--columns 20] [--outfile /tmp/bench.tql]
+"""
+import argparse
+import os
+import time
+
+from dt.io import TQLWriter
+from dt.model import Column, Database, ForeignKey, ShardKey, Table
+
+
+def build_database(number_tables, number_columns):
+    """
+    Creates a database with the given number of tables.  Each table has a primary key, every other table is sharded
+    and each table after the first has a foreign key to the previous table.
+    :param number_tables: Number of tables to create.
+    :type number_tables: int
+    :param number_columns: Number of columns in each table.
+    :type number_columns: int
+    :return: The generated database.
+    :rtype: Database
+    """
+    database = Database(database_name="benchmark_db")
+    for table_idx in range(number_tables):
+        table = Table(table_name=f"table_{table_idx}", primary_key="column_0")
+        for column_idx in range(number_columns):
+            table.add_column(Column(column_name=f"Column_{column_idx}", column_type="VARCHAR(0)"))
+        if table_idx % 2 == 0:
+            table.shard_key = ShardKey(shard_keys="column_0", number_shards=32)
+        if table_idx > 0:
+            table.add_foreign_key(ForeignKey(from_table=table.table_name, from_keys="column_0",
+                                             to_table=f"table_{table_idx - 1}", to_keys="column_0"))
+        database.add_table(table)
+    return database
+
+
+def run(database, outfile, **writer_args):
+    """
+    Writes the database and returns the number of MB written and the time it took.
+    :param database: The database to write.
+    :type database: Database
+    :param outfile: The file to write to.
+    :type outfile: str
+    :param writer_args: Arguments for the TQLWriter.
+    :return: (MB written, seconds)
+    :rtype: (float, float)
+    """
+    start = time.perf_counter()
+    TQLWriter(**writer_args).write_tql(database, outfile)
+    elapsed = time.perf_counter() - start
+    return os.path.getsize(outfile) / (1024 * 1024), elapsed
+
+
+def main():
+    """Main function for the script."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tables", type=int, default=50000, help="number of tables to generate")
+    parser.add_argument("--columns", type=int, default=20, help="number of columns per table")
+    parser.add_argument("--outfile", default="/tmp/benchmark.tql", help="file to write the TQL to")
+    parser.add_argument("--repeat", type=int, default=3, help="number of runs; the best is reported")
+    args = parser.parse_args()
+
+    database = build_database(args.tables, args.columns)
+    for label, writer_args in (("default", {}), ("lowercase", {"lowercase": True})):
+        results = [run(database, args.outfile, **writer_args) for _ in range(args.repeat)]
+        size, elapsed = min(results, key=lambda r: r[1])
+        print(f"{label:10} {size:8.1f} MB in {elapsed:6.2f} s = {size / elapsed:7.1f} MB/s")
+    os.remove(args.outfile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+"""
+Measures the time for XLSReader to read a model with a large Columns sheet.
+
+Copyright 2020 ThoughtSpot
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions
+of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+Usage:  python -m benchmarks.xls_reader [--tables 15000] [--columns 20] [--outfile /tmp/benchmark_read]
+The default reads 300k rows from the Columns sheet.
+"""
+import argparse
+import os
+import time
+
+from benchmarks.tql_writer import build_database
+from dt.io import XLSReader, XLSWriter
+
+
+def main():
+    """Main function for the script."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tables", type=int, default=15000, help="number of tables to generate")
+    parser.add_argument("--columns", type=int, default=20, help="number of columns per table")
+    parser.add_argument("--outfile", default="/tmp/benchmark_read", help="Excel file to write, without the extension")
+    args = parser.parse_args()
+
+    XLSWriter(use_formulas=False).write_database(build_database(args.tables, args.columns), args.outfile)
+    filename = args.outfile + XLSWriter.EXTENSION
+
+    start = time.perf_counter()
+    databases = XLSReader().read_xls(filename)
+    elapsed = time.perf_counter() - start
+
+    number_columns = sum(len(table.columns) for database in databases.values() for table in database)
+    print(f"read {number_columns} columns in {elapsed:.1f} s")
+    os.remove(filename)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+Measures the time and peak memory of XLSWriter for a model with a large Columns sheet.
+
+Copyright 2020 ThoughtSpot
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions
+of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+Usage:  python -m benchmarks.xls_writer [--tables 50000] [--columns 20] [--outfile /tmp/benchmark]
+The default writes 1M rows to the Columns sheet.
+"""
+import argparse
+import os
+import resource
+import time
+
+from benchmarks.tql_writer import build_database
+from dt.io import XLSWriter
+
+
+def current_rss():
+    """
+    Returns the current resident size of the process in KB.  Only works on Linux.
+    :return: The resident set size in KB.
+    :rtype: int
+    """
+    with open("/proc/self/status", "r") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def main():
+    """Main function for the script."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tables", type=int, default=50000, help="number of tables to generate")
+    parser.add_argument("--columns", type=int, default=20, help="number of columns per table")
+    parser.add_argument("--outfile", default="/tmp/benchmark", help="Excel file to write, without the extension")
+    args = parser.parse_args()
+
+    database = build_database(args.tables, args.columns)
+    filename = args.outfile + XLSWriter.EXTENSION
+
+    # Peak memory is the peak resident size (KB on Linux) above the size before writing.  Tracing allocations is too
+    # slow for the original writer.
+    start_rss = current_rss()
+    start = time.perf_counter()
+    XLSWriter().write_database(database, args.outfile)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - start_rss
+
+    print(f"{args.tables * args.columns} column rows, {os.path.getsize(filename) / (1024 * 1024):.1f} MB file: "
+          f"{elapsed:.1f} s, peak memory growth {peak / 1024:.0f} MB")
+    os.remove(filename)
+
+
+if __name__ == "__main__":
+    main()
@@ -30,9 +30,8 @@ import logging
 import os
 
 from dt.model import Database
-from dt.io import DDLParser, TQLWriter, XLSWriter, XLSReader
+from dt.io import DDLParser, TQLWriter, XLSWriter, XLSReader, CSVWriter, CSVReader
 from dt.util import eprint
-from pytql.tql import RemoteTQL
 
 VERSION="2.0"
 
@@ -58,6 +57,15 @@ def main():
         elif args.from_excel:
             print("Reading Excel ...")
             database = read_excel(args)
+        elif args.from_csv:
+            print("Reading CSV ...")
+            database = read_csv(args)
+        elif args.from_snapshot:
+            print("Reading snapshot ...")
+            database = Database.load_snapshot(args.from_snapshot)
+        elif args.from_json:
+            print("Reading JSON ...")
+            database = Database.from_json(args.from_json)
         elif args.from_ts:
             print("Reading DDL from ThoughtSpot")
             database = read_from_ts(args)
@@ -76,10 +84,26 @@ def main():
             print("Writing TQL ...")
             write_tql(args=args, database=database)
 
+        if args.to_tql_dir:
+            print("Writing TQL files ...")
+            write_tql_directory(args=args, database=database)
+
         if args.to_excel:
             print("Writing Excel ...")
             write_excel(args=args, database=database)
 
+        if args.to_csv:
+            print("Writing CSV ...")
+            write_csv(args=args, database=database)
+
+        if args.to_snapshot:
+            print("Writing snapshot ...")
+            database.save_snapshot(args.to_snapshot)
+
+        if args.to_json:
+            print("Writing JSON ...")
+            database.to_json(args.to_json)
+
         if args.to_ts:
             print("Writing to ThoughtSpot ...")
             write_to_ts(args=args, database=database)
@@ -101,6 +125,8 @@ def parse_args():
         "--from_ddl", help="will attempt to convert DDL from the infile"
     )
     parser.add_argument("--to_tql", help="will convert to TQL and write to the outfile")
+    parser.add_argument("--to_tql_dir", help="will convert to TQL and write one file per table to the directory "
+                                             "with a manifest.json describing the load order")
     parser.add_argument("--from_ts", help="read from TS cluster at the given URL.  May also need username / password")
     parser.add_argument("--to_ts", help="(BETA) will convert to TQL and write to ThoughtSpot at the given URL")
     parser.add_argument("--username", default="admin", help="username to use for authentication")
@@ -111,6 +137,31 @@ def parse_args():
     parser.add_argument(
         "--to_excel", help="will convert to Excel and write to the outfile."
     )
+    parser.add_argument(
+        "--no_formulas", action="store_true",
+        help="write the counts in the Excel Tables sheet as values instead of formulas.  Faster to open large models."
+    )
+    parser.add_argument(
+        "--from_csv", help="convert from the CSV or TSV files in the given directory"
+    )
+    parser.add_argument(
+        "--to_csv", help="will convert to CSV files with the same sheets as Excel and write to the directory."
+    )
+    parser.add_argument(
+        "--tsv", action="store_true", help="write tab delimited files instead of comma delimited with --to_csv."
+    )
+    parser.add_argument(
+        "--from_snapshot", help="convert from the given binary snapshot file"
+    )
+    parser.add_argument(
+        "--to_snapshot", help="will write a binary snapshot that loads much faster than DDL or Excel to the outfile."
+    )
+    parser.add_argument(
+        "--from_json", help="convert from the given JSON file"
+    )
+    parser.add_argument(
+        "--to_json", help="will convert to JSON and write to the outfile."
+    )
     parser.add_argument(
         "-d", "--database", help="name of ThoughtSpot database"
     )
@@ -144,6 +195,10 @@ def parse_args():
         help="converts table names and columns names with _ to camel case, "
         + "e.g. my_table becomes MyTable.",
     )
+    parser.add_argument(
+        "--jobs", type=int, default=1,
+        help="number of processes to use when writing TQL for large databases with --to_tql",
+    )
     parser.add_argument(
         "-v", "--validate", action="store_true", help="validate the database"
     )
@@ -166,14 +221,20 @@ def valid_args(args):
 
     # make sure there is a to_ flag since data has to come from somewhere unless this is just creating blank Excel.
     if not args.empty and not args.version and not args.from_ddl \
-            and not args.from_excel and not args.to_excel and not args.from_ts:
-        eprint("--version, --empty, --from_ddl, --from_excel, or from_ts must be provided as arguments.")
+            and not args.from_excel and not args.to_excel and not args.from_csv and not args.from_snapshot \
+            and not args.from_json and not args.from_ts:
+        eprint("--version, --empty, --from_ddl, --from_excel, --from_csv, --from_snapshot, --from_json, or from_ts "
+               "must be provided as arguments.")
         return False
 
     if (args.from_ddl or args.from_ts) and not args.database:
         eprint("--from_ddl and --from_ts require the --database parameter.")
         return False
 
+    if args.jobs > 1 and not args.to_tql:
+        eprint("--jobs is only used with --to_tql.  --to_tql_dir writes from a single process.")
+        return False
+
     return True
 
 
@@ -201,6 +262,29 @@ def read_excel(args):
 
     reader = XLSReader()
     databases = reader.read_xls(filepath=args.from_excel)
+    return get_first_database(databases)
+
+
+def read_csv(args):
+    """
+    Reads the database description from a directory of CSV or TSV files and returns a database model.
+    :param args: The command line arguments.
+    :returns: The database read from the files.
+    :rtype: Database
+    """
+    reader = CSVReader()
+    databases = reader.read_csv(directory=args.from_csv)
+    return get_first_database(databases)
+
+
+def get_first_database(databases):
+    """
+    Returns the first database that was read.  If there are more than one database, an error message is written.
+    :param databases: The databases that were read.
+    :type databases: dict of str:Database
+    :returns: The first database or None if there weren't any.
+    :rtype: Database
+    """
     if len(databases) == 0:
         eprint("ERROR:  No databases read.")
         return None
@@ -221,19 +305,12 @@ def read_from_ts(args):
     :return: A database that was read.
     :rtype: Database
     """
+    from pytql.tql import RemoteTQL  # only needed when reading from a cluster.
     rtql = RemoteTQL(hostname=args.from_ts, username=args.username, password=args.password)
     out = rtql.run_tql_command(f"script database {args.database};")
 
-    # The parser expects a file, so create a temp file, parse, then delete.
-    filename = f"{args.database}.tmp"
-    with open(filename, "w") as outfile:
-        for line in out:
-            outfile.write(line + "\n")
-
-    # TODO - add parse from string option.
     parser = DDLParser(database_name=args.database)
-    database = parser.parse_ddl(filename=filename)
-    os.remove(filename)
+    database = parser.parse_ddl_lines(lines=out)
 
     return database
 
@@ -246,11 +323,24 @@ def write_tql(args, database):
     :type database: Database
     """
     writer = TQLWriter(
-        args.uppercase, args.lowercase, args.camelcase, args.create_db
+        args.uppercase, args.lowercase, args.camelcase, args.create_db, jobs=args.jobs
     )
     writer.write_tql(database, args.to_tql)
 
 
+def write_tql_directory(args, database):
+    """
+    Writes the database to TQL with a file per table to the output directory.
+    :param args: The command line arguments.
+    :param database: The database to write.
+    :type database: Database
+    """
+    writer = TQLWriter(
+        args.uppercase, args.lowercase, args.camelcase, args.create_db
+    )
+    writer.write_tql_directory(database, args.to_tql_dir)
+
+
 def write_excel(args, database):
     """
     Writes the database to Excel for analysis and expansion.
@@ -259,7 +349,7 @@ def write_excel(args, database):
     :type database: Database
     :return None:
     """
-    writer = XLSWriter()
+    writer = XLSWriter(use_formulas=not args.no_formulas)
     filename = args.to_excel
     if filename is None:
         filename = args.database + "_" + args.schema
@@ -267,6 +357,18 @@ def write_excel(args, database):
     writer.write_database(database, filename)
 
 
+def write_csv(args, database):
+    """
+    Writes the database to CSV (or TSV) files for analysis and expansion.
+    :param args: The command line arguments.
+    :param database: The database to write.
+    :type database: Database
+    :return None:
+    """
+    writer = CSVWriter(delimiter="\t" if args.tsv else ",")
+    writer.write_database(database, args.to_csv)
+
+
 def write_to_ts(args, database):
     """
     Writes the database directly to ThoughtSpot.
@@ -275,6 +377,7 @@ def write_to_ts(args, database):
     :type database: Database
     :return: None
     """
+    from pytql.tql import RemoteTQL  # only needed when writing to a cluster.
     rtql = RemoteTQL(hostname=args.to_ts, username=args.username, password=args.password)
 
     tempfile = f"{database.database_name}.tmp"
@@ -29,7 +29,7 @@ import argparse
 import logging
 import os
 
-from dt.diff import DDLCompare, TQLAlterWriter
+from dt.diff import DDLCompare, TQLAlterWriter, JSONLinesDiffWriter
 from dt.io import DDLParser
 from dt.util import eprint
 
@@ -41,7 +41,8 @@ def main():
     args = parse_args()
 
     if valid_args(args):
-        print(args)
+        if args.format == "text":  # JSON Lines output should only contain records.
+            print(args)
 
         ddl_parser = DDLParser(database_name=args.database, schema_name=args.schema)
         db_1 = ddl_parser.parse_ddl(args.ddl1)
@@ -51,6 +52,10 @@ def main():
         # Returns differences for each database as a tuple.
         database_differences = DDLCompare.compare_databases(db_1, db_2)
 
+        if args.format == "jsonl":
+            write_jsonl(args, database_differences)
+            return
+
         if args.alter1:
             logging.debug("generate alters for first schema to match the second")
             print("-- changes needed for first schema to match the second")
@@ -71,6 +76,23 @@ def main():
                 print("\t%s" % db_diff)
 
 
+def write_jsonl(args, database_differences):
+    """
+    Writes the differences as JSON Lines to standard out.  Each record has a "target" field with the database (1 or 2)
+    that the difference applies to.
+    :param args: The command line arguments.
+    :param database_differences: The differences for each database as a tuple.
+    :type database_differences: (list of DatabaseDifference, list of DatabaseDifference)
+    """
+    write_both = not args.alter1 and not args.alter2
+
+    if args.alter1 or write_both:
+        JSONLinesDiffWriter.write_differences(database_differences[0], target=1)
+
+    if args.alter2 or write_both:
+        JSONLinesDiffWriter.write_differences(database_differences[1], target=2)
+
+
 def parse_args():
     """Parses the arguments from the command line."""
     parser = argparse.ArgumentParser("ddl_diff compares two DDL files and "
@@ -109,6 +131,10 @@ def parse_args():
     parser.add_argument("--ignore_case",
                         action="store_true",
                         help="Causes case of names to be ignored")
+    parser.add_argument("--format",
+                        choices=["text", "jsonl"],
+                        default="text",
+                        help="Output format.  jsonl writes one JSON record per difference.")
 
     args = parser.parse_args()
     return args
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+Monitors a ThoughtSpot database for schema drift from a baseline DDL file and writes drift events as JSON Lines.
+
+Copyright 2020 ThoughtSpot
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions
+of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+import argparse
+import json
+import logging
+import os
+import time
+
+from dt.diff import JSONLinesDiffWriter
+from dt.drift import DriftMonitor
+from dt.util import eprint
+
+
+def main():
+    """Main function for the script."""
+    args = parse_args()
+
+    if valid_args(args):
+        if args.debug:
+            logging.basicConfig(level=logging.DEBUG)
+
+        monitor = DriftMonitor(database_name=args.database, schema_name=args.schema)
+        if args.cache_file and os.path.exists(args.cache_file):
+            monitor.load_cache(args.cache_file)
+
+        get_live_ddl = get_ddl_reader(args)
+
+        while True:
+            with open(args.baseline, "r") as baseline_file:
+                monitor.set_baseline(baseline_file.readlines())
+
+            write_events(monitor.check(get_live_ddl()))
+
+            if args.cache_file:
+                monitor.save_cache(args.cache_file)
+
+            if args.interval <= 0:
+                break
+            time.sleep(args.interval)
+
+
+def get_ddl_reader(args):
+    """
+    Returns a function that reads the live DDL, either from ThoughtSpot or a local file.
+    :param args: The command line arguments.
+    :return: A function that returns the lines of the live DDL.
+    """
+    if args.from_file:
+        def read_from_file():
+            with open(args.from_file, "r") as ddl_file:
+                return ddl_file.readlines()
+        return read_from_file
+
+    from pytql.tql import RemoteTQL  # only needed when reading from a cluster.
+    rtql = RemoteTQL(hostname=args.ts_ip, username=args.username, password=args.password)
+
+    def read_from_ts():
+        return rtql.run_tql_command(f"script database {args.database};")
+    return read_from_ts
+
+
+def write_events(events):
+    """
+    Writes the drift events to standard out.  Each difference is a "drift" record.  Tables that changed and now match
+    the baseline get an "in_sync" record.
+    :param events: The drift events to write.
+    :type events: list of DriftEvent
+    """
+    for event in events:
+        if event.differences:
+            JSONLinesDiffWriter.write_differences(event.differences, event="drift")
+        else:
+            print(json.dumps({"event": "in_sync", "schema": event.schema_name, "table": event.table_name}))
+
+
+def parse_args():
+    """Parses the arguments from the command line."""
+    parser = argparse.ArgumentParser("drift compares a live database with a baseline DDL file "
+                                     "and writes the differences as JSON Lines")
+
+    parser.add_argument("-d", "--database", help="name of ThoughtSpot database")
+    parser.add_argument("-s", "--schema", default="falcon_default_schema",
+                        help="name of schema to use when the DDL doesn't have one")
+    parser.add_argument("--baseline", help="DDL file with the expected schema.")
+    parser.add_argument("--cache_file", help="file to cache the baseline and fingerprints between runs.")
+    parser.add_argument("--ts_ip", help="IP or URL of the ThoughtSpot cluster to monitor.")
+    parser.add_argument("--username", default="admin", help="username to use for authentication")
+    parser.add_argument("--password", default="th0ughtSp0t", help="password to use for authentication")
+    parser.add_argument("--from_file", help="read the live DDL from a file instead of ThoughtSpot.")
+    parser.add_argument("--interval", type=int, default=0,
+                        help="seconds between checks.  0 (the default) checks once and exits.")
+    parser.add_argument("--debug", action="store_true", help="Prints details of parsing.")
+
+    args = parser.parse_args()
+    return args
+
+
+def valid_args(args):
+    """
+    Checks to see if the arguments make sense.
+    :param args: The command line arguments.
+    :return: True if valid, False otherwise.
+    """
+    ret_value = True
+
+    if not args.database:
+        eprint("--database must be provided")
+        ret_value = False
+
+    if not args.baseline or not os.path.exists(args.baseline):
+        eprint("--baseline must be provided and exist")
+        ret_value = False
+
+    if not args.ts_ip and not args.from_file:
+        eprint("--ts_ip or --from_file must be provided")
+        ret_value = False
+
+    return ret_value
+
+
+if __name__ == "__main__":
+    main()
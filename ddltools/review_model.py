@@ -27,12 +27,11 @@ The following assumptions are made about the DDL being read:
 import argparse
 import logging
 import os
-import sys
 
 from dt.util import eprint
 from dt.io import DDLParser, YAMLWorksheetReader
 from dt.review.review import DataModelReviewer
-from pytql.tql import RemoteTQL
+from dt.review.transport import RecordingTransport, RemoteTQLTransport, ReplayTransport, SQLiteTransport
 
 VERSION = "1.0"
 
@@ -48,8 +47,6 @@ def main():
     else:
         print(args)
 
-        sys.setrecursionlimit(10000)  # expanding from the default of 1000.  Might cause memory errors.
-
         database = None
         worksheet = None
         rtql = None
@@ -87,12 +84,13 @@ def main():
         if args.worksheet_file:
             worksheet = YAMLWorksheetReader.read_from_file(args.worksheet_file)
 
-        # create an RTQL object
-        if args.ts_ip:
-            rtql = RemoteTQL(hostname=args.ts_ip, username=args.username, password=args.password)
+        # create the transport for data queries.
+        rtql = get_transport(args=args, database=database)
 
-        reviewer = DataModelReviewer()
+        reviewer = DataModelReviewer(config_file=args.config_file)
         results = reviewer.review_model(database=database, worksheet=worksheet, rtql=rtql)
+        if isinstance(rtql, RecordingTransport):
+            rtql.save()
 
         for test in results.keys():
             issues = results[test]
@@ -138,6 +136,18 @@ def get_parser():
         "--config_file",
         help="File with configuration values to use for the test."
     )
+    parser.add_argument(
+        "--record_file",
+        help="save the results of the data queries to the file so the review can be replayed without a cluster"
+    )
+    parser.add_argument(
+        "--replay_file",
+        help="answer the data queries from a file saved with --record_file instead of a cluster"
+    )
+    parser.add_argument(
+        "--data_file",
+        help="TQL file with insert statements to load into a local SQLite database for the data queries"
+    )
 
     return parser
 
@@ -175,6 +185,19 @@ def valid_args(args):
             eprint(f"Configuration file {args.config_file} doesn't exist.")
             is_valid = False
 
+    if len([arg for arg in (args.ts_ip, args.replay_file, args.data_file) if arg]) > 1:
+        eprint("Only one of ts_ip, replay_file or data_file can be used for data queries.")
+        is_valid = False
+
+    if args.record_file and not args.ts_ip:
+        eprint("A ThoughtSpot IP must be provided to record data queries.")
+        is_valid = False
+
+    for filename in (args.replay_file, args.data_file):
+        if filename and not os.path.exists(filename):
+            eprint(f"File {filename} doesn't exist.")
+            is_valid = False
+
     return is_valid
 
 
@@ -185,7 +208,7 @@ def read_from_ts(args):
     :return: A database that was read.
     :rtype: Database
     """
-    rtql = RemoteTQL(hostname=args.ts_ip, username=args.username, password=args.password)
+    rtql = RemoteTQLTransport(hostname=args.ts_ip, username=args.username, password=args.password)
     out = rtql.run_tql_command(f"script database {args.database};")
 
     # The parser expects a file, so create a temp file, parse, then delete.
@@ -201,5 +224,31 @@ def read_from_ts(args):
     return database
 
 
+def get_transport(args, database):
+    """
+    Returns the transport for data queries from the arguments.
+    :param args: The argument list.
+    :param database: The database being reviewed.  Used to create the tables for a data file.
+    :type database: Database
+    :return: The transport or None if data queries can't be run.
+    :rtype: TQLTransport
+    """
+    if args.ts_ip:
+        transport = RemoteTQLTransport(hostname=args.ts_ip, username=args.username, password=args.password)
+        if args.record_file:
+            transport = RecordingTransport(transport=transport, filename=args.record_file)
+        return transport
+
+    if args.replay_file:
+        return ReplayTransport(filename=args.replay_file)
+
+    if args.data_file:
+        transport = SQLiteTransport()
+        transport.load_database(database=database, data_filename=args.data_file)
+        return transport
+
+    return None
+
+
 if __name__ == "__main__":
     main()
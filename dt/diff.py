@@ -15,8 +15,11 @@ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY
 TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import json
 import logging
-from .io import TQLCommandGenerator, smart_open
+from .io import JSONWriter, TQLCommandGenerator, smart_open
 from .model import Database, Table, Column, ForeignKey, GenericRelationship
 
 # -------------------------------------------------------------------------------------------------------------------
@@ -116,6 +119,28 @@ class DatabaseDifference:
         """
         return ""
 
+    def get_payload(self):
+        """
+        Returns the details specific to the type of difference, e.g. the column that was added.
+        :return: A dictionary with the details of the difference.  This method will most likely be overwritten.
+        :rtype: dict
+        """
+        return {}
+
+    def to_dict(self):
+        """
+        Returns the difference as a dictionary that can be serialized, e.g. to JSON.
+        :return: A dictionary with the type, location, details and alter statement for the difference.
+        :rtype: dict
+        """
+        return {"type": DatabaseDifference.DIFFERENCE_DESCRIPTION[self.diff_type],
+                "type_id": self.diff_type,
+                "database": self.database.database_name,
+                "schema": self.schema_name,
+                "table": self.table_name,
+                "payload": self.get_payload(),
+                "alter": self.get_alter()}
+
 
 class TableCreatedDifference(DatabaseDifference):
     """
@@ -148,6 +173,14 @@ class TableCreatedDifference(DatabaseDifference):
         """
         return self.command_generator.generate_create_table_statement(table=self.table)
 
+    def get_payload(self):
+        """
+        Returns the details specific to the type of difference.
+        :return: A dictionary with the details of the difference.
+        :rtype: dict
+        """
+        return {"table": JSONWriter.table_to_dict(self.table, include_relationships=False)}
+
 
 class TableDroppedDifference(DatabaseDifference):
     """
@@ -210,6 +243,14 @@ class PrimaryKeyAddedDifference(DatabaseDifference):
         return self.command_generator.generate_add_primary_key_statement(table=self.table,
                                                                          primary_key=self.primary_key)
 
+    def get_payload(self):
+        """
+        Returns the details specific to the type of difference.
+        :return: A dictionary with the details of the difference.
+        :rtype: dict
+        """
+        return {"primary_key": list(self.primary_key)}
+
 
 class PrimaryKeyDroppedDifference(DatabaseDifference):
     """
@@ -274,6 +315,14 @@ class ShardKeyAddedDifference(DatabaseDifference):
                                                                       number_shards=self.number_shards,
                                                                       hash_key=self.hash_key)
 
+    def get_payload(self):
+        """
+        Returns the details specific to the type of difference.
+        :return: A dictionary with the details of the difference.
+        :rtype: dict
+        """
+        return {"number_shards": self.number_shards, "shard_keys": list(self.hash_key)}
+
 
 class ShardKeyDroppedDifference(DatabaseDifference):
     """
@@ -334,6 +383,14 @@ class ForeignKeyAddedDifference(DatabaseDifference):
         return self.command_generator.generate_add_foreign_key_statement(table=self.table,
                                                                          foreign_key=self.foreign_key)
 
+    def get_payload(self):
+        """
+        Returns the details specific to the type of difference.
+        :return: A dictionary with the details of the difference.
+        :rtype: dict
+        """
+        return {"foreign_key": JSONWriter.foreign_key_to_dict(self.foreign_key)}
+
 
 class ForeignKeyDroppedDifference(DatabaseDifference):
     """
@@ -363,6 +420,14 @@ class ForeignKeyDroppedDifference(DatabaseDifference):
         """
         return self.command_generator.generate_drop_constraint_statement(table=self.table, constraint_name=self.fk_name)
 
+    def get_payload(self):
+        """
+        Returns the details specific to the type of difference.
+        :return: A dictionary with the details of the difference.
+        :rtype: dict
+        """
+        return {"name": self.fk_name}
+
 
 class GenericRelationshipAddedDifference(DatabaseDifference):
     """
@@ -396,6 +461,14 @@ class GenericRelationshipAddedDifference(DatabaseDifference):
         return self.command_generator.generate_add_relationship_constraint_statement(table=self.table,
                                                                                      relationship=self.relationship)
 
+    def get_payload(self):
+        """
+        Returns the details specific to the type of difference.
+        :return: A dictionary with the details of the difference.
+        :rtype: dict
+        """
+        return {"relationship": JSONWriter.relationship_to_dict(self.relationship)}
+
 
 class GenericRelationshipDroppedDifference(DatabaseDifference):
     """
@@ -426,6 +499,14 @@ class GenericRelationshipDroppedDifference(DatabaseDifference):
         """
         return self.command_generator.generate_drop_constraint_statement(table=self.table, constraint_name=self.gr_name)
 
+    def get_payload(self):
+        """
+        Returns the details specific to the type of difference.
+        :return: A dictionary with the details of the difference.
+        :rtype: dict
+        """
+        return {"name": self.gr_name}
+
 
 class ColumnAddedDifference(DatabaseDifference):
     """
@@ -462,6 +543,14 @@ class ColumnAddedDifference(DatabaseDifference):
         return self.command_generator.generate_add_column_statement(table=self.table,
                                                                     column=self.column)
 
+    def get_payload(self):
+        """
+        Returns the details specific to the type of difference.
+        :return: A dictionary with the details of the difference.
+        :rtype: dict
+        """
+        return {"column": JSONWriter.column_to_dict(self.column)}
+
 
 class ColumnDroppedDifference(DatabaseDifference):
     """
@@ -497,6 +586,14 @@ class ColumnDroppedDifference(DatabaseDifference):
         """
         return self.command_generator.generate_drop_column_statement(table=self.table, column=self.column)
 
+    def get_payload(self):
+        """
+        Returns the details specific to the type of difference.
+        :return: A dictionary with the details of the difference.
+        :rtype: dict
+        """
+        return {"column": JSONWriter.column_to_dict(self.column)}
+
 
 class ColumnModifiedDifference(DatabaseDifference):
     """
@@ -532,6 +629,14 @@ class ColumnModifiedDifference(DatabaseDifference):
         """
         return self.command_generator.generate_modify_column_statement(table=self.table, column=self.column)
 
+    def get_payload(self):
+        """
+        Returns the details specific to the type of difference.
+        :return: A dictionary with the details of the difference.
+        :rtype: dict
+        """
+        return {"column": JSONWriter.column_to_dict(self.column)}
+
 
 class DDLCompare:
     """
@@ -559,8 +664,7 @@ class DDLCompare:
         diff2 = []
 
         # Get the list of tables from each database.  Note that different schema names will be interpreted as
-        # different tables.  This also assumes there is only one database and gets the first one.
-        # TODO:  Add support for multiple databases.
+        # different tables.  Use compare_catalogs to compare multiple databases.
         table_names1 = sorted(db1.get_table_names())
         table_names2 = sorted(db2.get_table_names())
 
@@ -599,6 +703,40 @@ class DDLCompare:
 
         return diff1, diff2
 
+    @staticmethod
+    def compare_catalogs(databases1, databases2, max_workers=None):
+        """
+        Compares two sets of databases, such as the ones returned by XLSReader.read_xls.  Databases are matched by name.
+        A database that only exists in one of the sets is compared to an empty database with the same name, so all of
+        its tables show up as created or dropped.
+        When max_workers is greater than one, the databases are compared in separate processes.  In that case the
+        differences refer to copies of the databases and tables rather than the ones passed in.
+        :param databases1: The first set of databases to compare, usually the old databases.
+        :type databases1: dict of str:Database
+        :param databases2: The second set of databases to compare, usually the newer databases.
+        :type databases2: dict of str:Database
+        :param max_workers: The maximum number of processes to use.  None or 1 compares in this process.
+        :type max_workers: int
+        :return: The differences for each database keyed by database name in sorted order.  Each value is the tuple
+        returned by compare_databases.
+        :rtype: OrderedDict of str:(list of DatabaseDifference, list of DatabaseDifference)
+        """
+        database_names = sorted(set(databases1.keys()) | set(databases2.keys()))
+        database_pairs = []
+        for database_name in database_names:
+            db1 = databases1.get(database_name, None) or Database(database_name=database_name)
+            db2 = databases2.get(database_name, None) or Database(database_name=database_name)
+            database_pairs.append((db1, db2))
+
+        if max_workers and max_workers > 1 and len(database_pairs) > 1:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                # map() returns the results in the order of the pairs.
+                differences = list(executor.map(_compare_database_pair, database_pairs))
+        else:
+            differences = [_compare_database_pair(pair) for pair in database_pairs]
+
+        return OrderedDict(zip(database_names, differences))
+
     @staticmethod
     def _compare_tables(db1, table_1, db2, table_2, diff1, diff2):
         """
@@ -876,6 +1014,17 @@ class DDLCompare:
             cnt2 += 1
 
 
+def _compare_database_pair(database_pair):
+    """
+    Compares a pair of databases.  This is a module level function so it can be called in a separate process.
+    :param database_pair: The two databases to compare.
+    :type database_pair: (Database, Database)
+    :return: A tuple containing the database differences for each database.
+    :rtype: (list of DatabaseDifference, list of DatabaseDifference)
+    """
+    return DDLCompare.compare_databases(db1=database_pair[0], db2=database_pair[1])
+
+
 class TQLAlterWriter:
     """
     Writes ALTER statements to modify a database based on database differences.
@@ -900,3 +1049,46 @@ class TQLAlterWriter:
         with smart_open(filename) as outfile:
             for diff in ddl_differences:
                 outfile.write(diff.get_alter())
+
+
+class JSONLinesDiffWriter:
+    """
+    Writes database differences as JSON Lines, i.e. one JSON record per line, so that the differences can be consumed
+    incrementally by other tools.
+    """
+
+    def __init__(self):
+        """
+        Creates a new writer.
+        """
+        pass
+
+    @staticmethod
+    def iter_records(ddl_differences, **extra_fields):
+        """
+        Returns an iterator of JSON records, one for each difference.  Records are created as they are requested.
+        :param ddl_differences: The differences to convert.
+        :type ddl_differences: list of DatabaseDifference
+        :param extra_fields: Additional fields to add to each record, e.g. which of the databases is being changed.
+        :return: An iterator over the JSON strings without a trailing newline.
+        :rtype: iter of str
+        """
+        for diff in ddl_differences:
+            record = diff.to_dict()
+            record.update(extra_fields)
+            yield json.dumps(record)
+
+    @staticmethod
+    def write_differences(ddl_differences, filename=None, **extra_fields):
+        """
+        Writes the differences as JSON Lines.
+        :param ddl_differences: The differences to write.
+        :type ddl_differences: list of DatabaseDifference
+        :param filename: File to write to or STDOUT is not set.
+        :type filename: str
+        :param extra_fields: Additional fields to add to each record, e.g. which of the databases is being changed.
+        """
+        with smart_open(filename) as outfile:
+            for record in JSONLinesDiffWriter.iter_records(ddl_differences, **extra_fields):
+                outfile.write(record)
+                outfile.write("\n")
@@ -0,0 +1,240 @@
+"""
+Classes for detecting schema drift between a live database and a baseline model.
+
+Copyright 2020 ThoughtSpot
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions
+of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+from collections import OrderedDict, namedtuple
+import hashlib
+import logging
+import pickle
+
+from .diff import DDLCompare
+from .io import DDLParser
+from .model import Database, DatamodelConstants
+from .util import eprint
+
+# -------------------------------------------------------------------------------------------------------------------
+
+DriftEvent = namedtuple("DriftEvent", ["schema_name", "table_name", "differences"])
+
+
+class DriftMonitor:
+    """
+    Compares the DDL of a live database with a baseline model.  The statements for each table are fingerprinted so
+    that only tables whose DDL changed since the previous check are parsed and compared.  The baseline and the
+    fingerprints can be cached in a file between runs.  Tables are identified by their schema and name, since tables
+    in different schemas can have the same name.
+    Differences are the changes needed for the live database to match the baseline, i.e. the same as ddldiff --alter1
+    with the live DDL as the first file.
+    """
+
+    CACHE_VERSION = 2
+
+    def __init__(self, database_name, schema_name=DatamodelConstants.DEFAULT_SCHEMA):
+        """
+        Creates a new monitor with an empty baseline.
+        :param database_name: Name of the database being monitored.
+        :type database_name: str
+        :param schema_name: Name of the schema to use when the DDL doesn't have one.
+        :type schema_name: str
+        """
+        self.database_name = database_name
+        self.schema_name = schema_name
+
+        self.baseline_tables = OrderedDict()  # baseline table for each (schema, table).
+        self.baseline_fingerprint = None  # fingerprint of all of the baseline DDL.
+        self.baseline_fingerprints = {}  # fingerprint of the baseline DDL for each table.
+        self.live_fingerprints = None  # fingerprint of the live DDL for each table from the last check.
+
+    def _get_parser(self, schema_name=None):
+        """
+        Returns a parser for the database.
+        :param schema_name: The schema for the parsed tables.  The monitor's schema is used if not provided.
+        :type schema_name: str
+        :return: A new DDL parser.
+        :rtype: DDLParser
+        """
+        return DDLParser(database_name=self.database_name, schema_name=schema_name or self.schema_name)
+
+    def _parse_table(self, table_key, statements):
+        """
+        Parses the statements for one table into a database with just that table.
+        :param table_key: The schema and name of the table.
+        :type table_key: (str, str)
+        :param statements: The statements for the table.
+        :type statements: list of str
+        :return: A database with the table.
+        :rtype: Database
+        """
+        return self._get_parser(schema_name=table_key[0]).parse_statements(statements)
+
+    @staticmethod
+    def _fingerprint(statements):
+        """
+        Returns a fingerprint for a list of statements.
+        :param statements: The statements to fingerprint.
+        :type statements: list of str
+        :return: A hex digest that changes when any of the statements change.
+        :rtype: str
+        """
+        return hashlib.sha1("\n".join(statements).encode("utf-8")).hexdigest()
+
+    def group_statements_by_table(self, statements):
+        """
+        Groups the CREATE TABLE and ALTER TABLE statements by the table they apply to.  Other statements are ignored.
+        :param statements: The statements to group.
+        :type statements: list of str
+        :return: The statements for each (schema, table) in the order the tables were first seen.
+        :rtype: OrderedDict of (str, str):list of str
+        """
+        parser = self._get_parser()
+        table_statements = OrderedDict()
+        for statement in statements:
+            table_key = parser.get_table_key_for_statement(statement)
+            if table_key:
+                table_statements.setdefault(table_key, []).append(statement)
+        return table_statements
+
+    def set_baseline(self, lines):
+        """
+        Sets the baseline from lines of DDL.  If the DDL is the same as the current baseline nothing is parsed.
+        :param lines: The lines of the baseline DDL.
+        :type lines: list of str
+        :return: True if the baseline changed.
+        :rtype: bool
+        """
+        parser = self._get_parser()
+        statements = parser.get_statements_from_lines(lines)
+        fingerprint = self._fingerprint(statements)
+        if fingerprint == self.baseline_fingerprint:
+            logging.debug("baseline for %s hasn't changed." % self.database_name)
+            return False
+
+        baseline_statements = self.group_statements_by_table(statements)
+        self.baseline_tables = OrderedDict()
+        for table_key, table_statements in baseline_statements.items():
+            self.baseline_tables[table_key] = self._parse_table(table_key, table_statements).get_table(table_key[1])
+        self.baseline_fingerprint = fingerprint
+        self.baseline_fingerprints = {table_key: self._fingerprint(table_statements) for
+                                      table_key, table_statements in baseline_statements.items()}
+        self.live_fingerprints = None  # everything has to be compared against the new baseline.
+        return True
+
+    def check(self, lines):
+        """
+        Compares the live DDL with the baseline.  Only tables whose DDL changed since the last check are compared.
+        An event without differences means that the table changed and now matches the baseline.
+        :param lines: The lines of DDL from the live database, e.g. the output of "script database".
+        :type lines: list of str
+        :return: The drift events for the tables that changed.
+        :rtype: list of DriftEvent
+        """
+        parser = self._get_parser()
+        live_statements = self.group_statements_by_table(parser.get_statements_from_lines(lines))
+        live_fingerprints = {table_key: self._fingerprint(table_statements) for
+                             table_key, table_statements in live_statements.items()}
+
+        first_check = self.live_fingerprints is None
+        previous_fingerprints = {} if first_check else self.live_fingerprints
+
+        # Tables that are new or changed since the last check and tables that are no longer there.  On the first
+        # check, the missing tables are the ones in the baseline.
+        changed_tables = [table_key for table_key, fingerprint in live_fingerprints.items()
+                          if previous_fingerprints.get(table_key, None) != fingerprint]
+        previous_tables = list(self.baseline_tables.keys()) if first_check else \
+            [table_key for table_key, fingerprint in previous_fingerprints.items() if fingerprint is not None]
+        changed_tables.extend([table_key for table_key in previous_tables if table_key not in live_fingerprints])
+
+        events = []
+        for table_key in changed_tables:
+            if table_key in live_fingerprints and \
+                    live_fingerprints[table_key] == self.baseline_fingerprints.get(table_key, None):
+                differences = []  # the DDL is the same as the baseline, so no need to parse.
+            else:
+                live_database = Database(database_name=self.database_name)
+                if table_key in live_statements:
+                    live_database = self._parse_table(table_key, live_statements[table_key])
+                differences = self._compare_table(table_key=table_key, live_database=live_database)
+
+            if differences or table_key in previous_fingerprints:
+                events.append(DriftEvent(schema_name=table_key[0], table_name=table_key[1], differences=differences))
+
+        # Missing baseline tables are remembered so that an event is created when they are added back.
+        for table_key in self.baseline_tables.keys():
+            live_fingerprints.setdefault(table_key, None)
+
+        self.live_fingerprints = live_fingerprints
+        return events
+
+    def _compare_table(self, table_key, live_database):
+        """
+        Compares a table in the live database with the same table in the baseline.
+        :param table_key: The schema and name of the table to compare.
+        :type table_key: (str, str)
+        :param live_database: A database that contains only the live table, if it exists.
+        :type live_database: Database
+        :return: The changes for the live table to match the baseline.
+        :rtype: list of DatabaseDifference
+        """
+        baseline_database = Database(database_name=self.database_name)
+        baseline_table = self.baseline_tables.get(table_key, None)
+        if baseline_table:
+            baseline_database.add_table(baseline_table)
+
+        return DDLCompare.compare_databases(db1=live_database, db2=baseline_database)[0]
+
+    def load_cache(self, filename):
+        """
+        Loads the baseline and fingerprints from a cache file.
+        :param filename: The name of the cache file.
+        :type filename: str
+        :return: True if the cache was loaded.
+        :rtype: bool
+        """
+        try:
+            with open(filename, "rb") as cache_file:
+                cache = pickle.load(cache_file)
+        except (IOError, pickle.UnpicklingError, EOFError) as ex:
+            eprint(f"Unable to read cache file {filename}: {ex}")
+            return False
+
+        if cache.get("version", None) != DriftMonitor.CACHE_VERSION or \
+                cache.get("database_name", None) != self.database_name:
+            eprint(f"Ignoring cache file {filename} for a different version or database.")
+            return False
+
+        self.baseline_tables = cache["baseline_tables"]
+        self.baseline_fingerprint = cache["baseline_fingerprint"]
+        self.baseline_fingerprints = cache["baseline_fingerprints"]
+        self.live_fingerprints = cache["live_fingerprints"]
+        return True
+
+    def save_cache(self, filename):
+        """
+        Saves the baseline and fingerprints to a cache file.
+        :param filename: The name of the cache file.
+        :type filename: str
+        """
+        cache = {
+            "version": DriftMonitor.CACHE_VERSION,
+            "database_name": self.database_name,
+            "baseline_tables": self.baseline_tables,
+            "baseline_fingerprint": self.baseline_fingerprint,
+            "baseline_fingerprints": self.baseline_fingerprints,
+            "live_fingerprints": self.live_fingerprints,
+        }
+        with open(filename, "wb") as cache_file:
+            pickle.dump(cache, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
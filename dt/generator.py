@@ -55,6 +55,10 @@ class TQLCommandGenerator:
         self.lowercase = lowercase
         self.camelcase = camelcase
 
+        # Names repeat a lot in large models, so the converted names are cached.
+        self._name_cache = {}
+        self._column_name_cache = {}
+
     def to_case(self, string):
         """
         Converts the string to the proper case based on setting.
@@ -63,6 +67,19 @@ class TQLCommandGenerator:
         :return: The string in the appropriate case.
         :rtype: str
         """
+        name = self._name_cache.get(string, None)
+        if name is None:
+            name = self._name_cache[string] = self._convert_case(string)
+        return name
+
+    def _convert_case(self, string):
+        """
+        Converts the string to the proper case based on setting without caching.
+        :param string: The string to potentially convert.
+        :type string: str
+        :return: The string in the appropriate case.
+        :rtype: str
+        """
         if string == DatamodelConstants.DEFAULT_SCHEMA:
             return string
         if self.lowercase:
@@ -73,6 +90,25 @@ class TQLCommandGenerator:
             return TQLCommandGenerator.to_camel(string)
         return string
 
+    def column_to_case(self, column_name):
+        """
+        Converts a column name to the proper case.  Column names are only converted to lower or upper case.
+        :param column_name: The column name to potentially convert.
+        :type column_name: str
+        :return: The column name in the appropriate case.
+        :rtype: str
+        """
+        name = self._column_name_cache.get(column_name, None)
+        if name is None:
+            if self.lowercase:
+                name = column_name.lower()
+            elif self.uppercase:
+                name = column_name.upper()
+            else:
+                name = column_name
+            self._column_name_cache[column_name] = name
+        return name
+
     @staticmethod
     def to_camel(val):
         """
@@ -138,30 +174,25 @@ class TQLCommandGenerator:
         """
         table_name = self.to_case(table.table_name)
         schema_name = self.to_case(table.schema_name)
-        cmd = 'CREATE TABLE "%s"."%s" (\n' % (schema_name, table_name)
-        first = True
-        for column in table:
-            column_name = column.column_name
-            if self.lowercase:
-                column_name = column_name.lower()
-            else:
-                if self.uppercase:
-                    column_name = column_name.upper()
-            if first:
-                cmd += '    "%s" %s\n' % (column_name, column.column_type)
-                first = False
-            else:
-                cmd += '   ,"%s" %s\n' % (column_name, column.column_type)
 
+        if self.lowercase or self.uppercase:
+            columns = [f'"{self.column_to_case(column.column_name)}" {column.column_type}' for column in table]
+        else:
+            columns = [f'"{column.column_name}" {column.column_type}' for column in table]
         if len(table.primary_key) != 0:
-            key = list_to_string(table.primary_key, quote=True)
-            cmd += '   ,CONSTRAINT PRIMARY KEY (%s)\n' % key
+            columns.append('CONSTRAINT PRIMARY KEY (%s)' % list_to_string(table.primary_key, quote=True))
+
+        parts = ['CREATE TABLE "%s"."%s" (\n' % (schema_name, table_name)]
+        if columns:
+            parts.append('    ')
+            parts.append('\n   ,'.join(columns))
+            parts.append('\n')
         if table.shard_key is not None:
             key = list_to_string(table.shard_key.shard_keys, quote=True)
-            cmd += ') PARTITION BY HASH(%d) KEY(%s);\n' % (table.shard_key.number_shards, key)
+            parts.append(') PARTITION BY HASH(%d) KEY(%s);\n' % (table.shard_key.number_shards, key))
         else:
-            cmd += ');\n'
-        return cmd
+            parts.append(');\n')
+        return "".join(parts)
 
     def generate_drop_table_statement(self, table):
         """
@@ -0,0 +1,252 @@
+"""
+Contains the graph of relationships between the tables in a database that is shared by the review and validation code.
+
+Copyright 2020 ThoughtSpot
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions
+of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+from collections import Counter, OrderedDict
+
+# -------------------------------------------------------------------------------------------------------------------
+
+
+class RelationshipGraph:
+    """
+    The tables in a database and the foreign keys and generic relationships between them.  The graph is built once and
+    the results that are expensive to find, such as the strongly connected components, are only found when they are
+    first needed.  Use Database.get_relationship_graph() to get a graph that is rebuilt when the database changes.
+    """
+
+    def __init__(self, database):
+        """
+        Creates the graph for the tables in the database.
+        :param database: The database to create the graph for.
+        :type database: Database
+        """
+        self.adjacency = OrderedDict()  # table: related tables in the order of the foreign keys and relationships.
+        self.reverse_adjacency = OrderedDict()  # table: tables with a relationship to the table.
+        self.number_from = Counter()  # table: number of foreign keys and relationships from the table.
+        self.number_to = Counter()  # table: number of foreign keys and relationships to the table.
+
+        for table in database:
+            related_tables = OrderedDict()
+            for related_table in table.get_all_related_tables():
+                related_tables[related_table] = None
+                self.number_to[related_table] += 1
+            self.number_from[table.table_name] = len(table.foreign_keys) + len(table.relationships)
+            self.adjacency[table.table_name] = list(related_tables)
+            self.reverse_adjacency.setdefault(table.table_name, [])
+            for related_table in related_tables:
+                self.reverse_adjacency.setdefault(related_table, []).append(table.table_name)
+
+        self._components = None
+        self._component_of = None
+        self._depth = None
+        self._reachable = {}
+        self._walk_tables = [set(), {table_name for table_name, related in self.adjacency.items() if related}]
+
+    def get_related_tables(self, table_name):
+        """
+        Returns the tables the table has foreign keys or relationships to.
+        :param table_name: The name of the table.
+        :type table_name: str
+        :return: The names of the related tables.
+        :rtype: list of str
+        """
+        return self.adjacency.get(table_name, [])
+
+    def get_referencing_tables(self, table_name):
+        """
+        Returns the tables that have foreign keys or relationships to the table.
+        :param table_name: The name of the table.
+        :type table_name: str
+        :return: The names of the referencing tables.
+        :rtype: list of str
+        """
+        return self.reverse_adjacency.get(table_name, [])
+
+    def get_strongly_connected_components(self):
+        """
+        Finds the groups of tables that can all reach each other through relationships using Tarjan's algorithm.  The
+        search is iterative, so deep chains of relationships don't hit the recursion limit.  Groups are in reverse
+        topological order, i.e. a group only has relationships to groups before it.
+        :return: The groups of tables.  Every table is in exactly one group.
+        :rtype: list of list of str
+        """
+        if self._components is not None:
+            return self._components
+
+        adjacency = self.adjacency
+        index = {}  # order in which each table was found.
+        low_link = {}  # lowest index reachable from the table.
+        stack = []
+        on_stack = set()
+        components = []
+
+        for start_table in self.reverse_adjacency:  # includes tables that are only referenced.
+            if start_table in index:
+                continue
+
+            index[start_table] = low_link[start_table] = len(index)
+            stack.append(start_table)
+            on_stack.add(start_table)
+            work = [(start_table, iter(adjacency.get(start_table, [])))]
+
+            while work:
+                table_name, related_tables = work[-1]
+                for related_table in related_tables:
+                    if related_table not in index:
+                        index[related_table] = low_link[related_table] = len(index)
+                        stack.append(related_table)
+                        on_stack.add(related_table)
+                        work.append((related_table, iter(adjacency.get(related_table, []))))
+                        break
+                    elif related_table in on_stack:
+                        low_link[table_name] = min(low_link[table_name], index[related_table])
+                else:  # all related tables have been searched.
+                    work.pop()
+                    if work:
+                        parent_name = work[-1][0]
+                        low_link[parent_name] = min(low_link[parent_name], low_link[table_name])
+
+                    if low_link[table_name] == index[table_name]:  # root of a component.
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.remove(member)
+                            component.append(member)
+                            if member == table_name:
+                                break
+                        components.append(component)
+
+        self._components = components
+        self._component_of = {table_name: position
+                               for position, component in enumerate(components) for table_name in component}
+        return components
+
+    def get_cycles(self):
+        """
+        Returns the groups of tables with circular relationships, including tables that relate to themselves.
+        :return: The groups of tables in each circle.
+        :rtype: list of list of str
+        """
+        return [component for component in self.get_strongly_connected_components()
+                if len(component) > 1 or component[0] in self.adjacency.get(component[0], [])]
+
+    def get_depth(self, table_name):
+        """
+        Returns the number of relationships in the longest chain from the table where tables in a circle count as one
+        table.
+        :param table_name: The name of the table.
+        :type table_name: str
+        :return: The depth of the table.  0 if the table doesn't have any relationships.
+        :rtype: int
+        """
+        if self._depth is None:
+            components = self.get_strongly_connected_components()
+            depth = [0] * len(components)
+            for position, component in enumerate(components):  # related components come first.
+                for member in component:
+                    for related_table in self.adjacency.get(member, []):
+                        related_position = self._component_of[related_table]
+                        if related_position != position:
+                            depth[position] = max(depth[position], depth[related_position] + 1)
+            self._depth = depth
+
+        position = self._component_of.get(table_name, None)
+        return self._depth[position] if position is not None else 0
+
+    def get_reachable_tables(self, table_name):
+        """
+        Returns all of the tables that can be reached from the table through one or more relationships.
+        :param table_name: The name of the table.
+        :type table_name: str
+        :return: The names of the reachable tables.  The table is only included if it's in a circle.
+        :rtype: frozenset of str
+        """
+        reachable = self._reachable.get(table_name, None)
+        if reachable is None:
+            found = set()
+            to_search = list(self.adjacency.get(table_name, []))
+            while to_search:
+                related_table = to_search.pop()
+                if related_table not in found:
+                    found.add(related_table)
+                    to_search.extend(self.adjacency.get(related_table, []))
+            reachable = self._reachable[table_name] = frozenset(found)
+        return reachable
+
+    def get_walk_tables(self, length):
+        """
+        Finds the tables that start a series of relationships of the given length.  Tables can repeat in the series,
+        so a table in the set might not have a chain (with no repeats) of that length, but a table that isn't in the
+        set never does.
+        :param length: The number of relationships in the series.
+        :type length: int
+        :return: The tables that start a series of the length.  Empty for length 0 since every table qualifies.
+        :rtype: set of str
+        """
+        walk_tables = self._walk_tables
+        while len(walk_tables) <= length:
+            previous = walk_tables[-1]
+            walk_tables.append({table_name for table_name, related in self.adjacency.items()
+                                if any(related_table in previous for related_table in related)})
+        return walk_tables[length]
+
+    def get_long_chains(self, max_reference_chain, max_chains):
+        """
+        Finds the chains of relationships that are one longer than the maximum.  Longer chains always start with one of
+        these, so each long chain is only reported by its first part.  The search is iterative and stops as soon as a
+        chain is long enough, and tables that can't start a long enough chain are skipped.
+        :param max_reference_chain: The largest number of relationships that is OK.
+        :type max_reference_chain: int
+        :param max_chains: The number of chains to stop at.
+        :type max_chains: int
+        :return: The chains that were found, first is the original table, last is the final table.  Each chain is only
+        found once.
+        :rtype: list of list of str
+        """
+        adjacency = self.adjacency
+        length = max_reference_chain + 1
+        walk_tables = [self.get_walk_tables(remaining) for remaining in range(length + 1)]
+
+        chains = []
+        for start_table in adjacency:
+            if start_table not in walk_tables[length]:
+                continue
+
+            path = [start_table]
+            on_path = {start_table}
+            work = [iter(adjacency[start_table])]
+            while work:
+                for related_table in work[-1]:
+                    remaining = length - len(path)  # relationships still needed after this one.
+                    if related_table in on_path or (remaining and related_table not in walk_tables[remaining]):
+                        continue
+
+                    if remaining == 0:
+                        chains.append(path + [related_table])
+                        if len(chains) >= max_chains:
+                            return chains
+                        continue
+
+                    path.append(related_table)
+                    on_path.add(related_table)
+                    work.append(iter(adjacency.get(related_table, [])))
+                    break
+                else:  # all related tables have been searched.
+                    work.pop()
+                    on_path.discard(path.pop())
+
+        return chains
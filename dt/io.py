@@ -15,17 +15,31 @@ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY
 TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import contextlib
+import csv
+from io import StringIO
+import json
 import logging
+import multiprocessing
 from openpyxl import Workbook  # writing Excel
-from os import path
+from os import cpu_count, listdir, makedirs, path
 import re
+import shutil
 import sys
-import xlrd  # reading Excel
+import tempfile
+from xml.etree import ElementTree
 import yaml
+import zipfile
+
+try:
+    from yaml import CSafeLoader as YAMLLoader  # much faster, but only available when PyYAML is built with libyaml.
+except ImportError:
+    from yaml import SafeLoader as YAMLLoader
 
 from .generator import TQLCommandGenerator, list_to_string
-from .model import Database, Table, Column, ShardKey, DatamodelConstants
+from .model import Database, Table, Column, ShardKey, DatamodelConstants, ForeignKey, GenericRelationship
 from .model import Worksheet, WorksheetTable, WorksheetJoin, WorksheetTablePath, WorksheetFormula, WorksheetColumn
 from .util import eprint
 
@@ -33,13 +47,15 @@ from .util import eprint
 
 
 @contextlib.contextmanager
-def smart_open(filename=None):
+def smart_open(filename=None, buffering=-1):
     """
     Borrowed from https://stackoverflow.com/questions/17602878/how-to-handle-both-with-open-and-sys-stdout-nicely
     :param filename: Name of the file to write to or '-' for stdout.
+    :param buffering: Size of the write buffer for files.  The default is the system default.
+    :type buffering: int
     """
     if filename and filename != '-':
-        fh = open(filename, 'w')
+        fh = open(filename, 'w', buffering=buffering)
     else:
         fh = sys.stdout
 
@@ -95,11 +111,31 @@ class DDLParser:
                 eprint(f"Input file {filename} doesn't exist for parsing.")
                 return
 
+        # First read the entire input into memory.  This will allow multiple passes through the data.
+        statements = self._get_statements(filename=filename)
+        return self.parse_statements(statements)
+
+    def parse_ddl_lines(self, lines):
+        """
+        Parses DDL from lines of text, such as the output of "script database", and returns a populated Database.
+        :param lines: The lines of DDL.  Lines may or may not end with a newline.
+        :type lines: iter of str
+        :return: A Database object.
+        :rtype: Database
+        """
+        return self.parse_statements(self.get_statements_from_lines(lines))
+
+    def parse_statements(self, statements):
+        """
+        Parses a list of complete statements (without the trailing semi-colon) and returns a populated Database.
+        :param statements: The statements to parse.
+        :type statements: list of str
+        :return: A Database object.
+        :rtype: Database
+        """
         # Reset for new parse job.
         self.database = Database(self.database_name)
 
-        # First read the entire input into memory.  This will allow multiple passes through the data.
-        statements = self._get_statements(filename=filename)
         for stmt in statements:
             logging.debug(">>> %s" % stmt)
             lower = stmt.lower()
@@ -128,23 +164,69 @@ class DDLParser:
 
         return self.database
 
+    def get_table_key_for_statement(self, statement):
+        """
+        Returns the schema and name of the table a CREATE TABLE or ALTER TABLE statement applies to.
+        :param statement: The statement to check.
+        :type statement: str
+        :return: The schema and table name, using the parser's schema if the statement doesn't have one, or None if
+        the statement isn't for a table.
+        :rtype: (str, str) | None
+        """
+        lower = statement.lower()
+        if "create table" in lower or "create or replace table" in lower:
+            statement = statement.replace("[", '"').replace("]", '"')
+            qualified_name = statement[0:statement.find("(")].rstrip()
+            table_name = self._get_table_name(statement)
+        elif "alter table" in lower:
+            matches = DDLParser._get_matches(patterns=["alter table (.*?) (add|drop|set|modify) .*"],
+                                             statement=statement, expect_matches=2)
+            if not matches:
+                return None
+            qualified_name = matches[0]
+            table_name = DDLParser._extract_table_name(qualified_name)
+        else:
+            return None
+
+        # the schema is the part before the table name, e.g. "database"."schema"."table".
+        name_parts = qualified_name.split(".")
+        schema_name = self.schema_name
+        if len(name_parts) > 1:
+            schema_name = DDLParser._clean_name(name_parts[-2].split(" ")[-1])
+        return schema_name, table_name
+
     def _get_statements(self, filename):
         """
         Reads the statements from the file or input stream.
-        :param filename:
-        :return:
+        :param filename: The file to read from or None to read from STDIN.
+        :return: The list of statements.
+        :rtype: list of str
         """
 
         if not filename:
-            ddl_file = open(sys.stdin, "r")
+            ddl_file = sys.stdin
         else:
             ddl_file = open(filename, "r")
 
+        try:
+            return self.get_statements_from_lines(ddl_file)
+        finally:
+            if ddl_file is not sys.stdin:
+                ddl_file.close()
+
+    def get_statements_from_lines(self, lines):
+        """
+        Reads complete statements from lines of DDL.  Comments are removed and white space is normalized.
+        :param lines: The lines of DDL.
+        :type lines: iter of str
+        :return: The list of statements without the trailing semi-colon.
+        :rtype: list of str
+        """
         statements = []
         try:
             stmt_buffer = ""  # line stmt_buffer for reading entire commands.
             in_comment = False
-            for line in ddl_file:
+            for line in lines:
                 line = self._clean_line(line=line)
                 line = line.partition("--")[0]  # strip off any -- comments.
                 logging.debug(line)
@@ -182,8 +264,6 @@ class DDLParser:
 
         except Exception as ex:
             eprint(ex)
-        finally:
-            ddl_file.close()
 
         statements = [re.sub(" +", " ", stmt) for stmt in statements]
 
@@ -676,12 +756,16 @@ class TQLWriter:
     Writes TQL from a data model.
     """
 
+    BUFFER_SIZE = 1024 * 1024  # large models write a lot of small statements.
+    TABLES_PER_JOB = 500  # number of tables rendered by each job when running in parallel.
+
     def __init__(
         self,
         uppercase=False,
         lowercase=False,
         camelcase=False,
         create_db=False,
+        jobs=1,
     ):
         """
         Creates a new TQLWriter to write database models to TQL.
@@ -691,9 +775,12 @@ class TQLWriter:
         :type lowercase: bool
         :param create_db: Writes create statements for the database.
         :type create_db: bool
+        :param jobs: Number of processes used to generate the table statements.  1 generates in this process.
+        :type jobs: int
         """
         self.command_generator = TQLCommandGenerator(uppercase=uppercase, lowercase=lowercase, camelcase=camelcase)
         self.create_db = create_db
+        self.jobs = jobs
 
     def write_tql(self, database, filename=None):
         """
@@ -704,7 +791,7 @@ class TQLWriter:
         :type filename: str
         """
 
-        with smart_open(filename) as outfile:
+        with smart_open(filename, buffering=TQLWriter.BUFFER_SIZE) as outfile:
 
             db_name = database.database_name
 
@@ -720,6 +807,10 @@ class TQLWriter:
                     if schema_name != DatamodelConstants.DEFAULT_SCHEMA:
                         outfile.write(self.command_generator.generate_create_schema_statement(schema_name=schema_name))
 
+            if self.jobs > 1 and len(database.tables) > TQLWriter.TABLES_PER_JOB:
+                self._write_tables_in_parallel(database, outfile)
+                return
+
             for table in database:
                 self.write_create_table_statement(table, outfile)
 
@@ -729,6 +820,125 @@ class TQLWriter:
             for table in database:
                 self.write_relationships(table, outfile)
 
+    def write_tql_directory(self, database, directory):
+        """
+        Writes the Database to a directory with one file per table so the tables can be created in parallel and
+        failures retried individually.  Tables are written to <schema>/<table>.tql.  The foreign keys and relationships
+        are written to foreign_keys.tql and relationships.tql.  If create_db is set, database.tql creates the database
+        and schemas.  Every file starts with a USE statement so it can be run by itself.
+        manifest.json lists the phases in the order they must be run.  The files in a phase don't depend on each other.
+        :param database: The database object to convert.
+        :type database: Database
+        :param directory: The directory to write to.  It will be created if it doesn't exist.
+        :type directory: str
+        :return: The manifest that was written.
+        :rtype: dict
+        """
+        generator = self.command_generator
+        db_name = database.database_name
+        use_statement = generator.generate_use_database_statement(database_name=db_name)
+        makedirs(directory, exist_ok=True)
+
+        phases = []
+
+        if self.create_db:
+            with open(path.join(directory, "database.tql"), "w") as outfile:
+                outfile.write(generator.generate_create_database_statement(database_name=db_name))
+                outfile.write(use_statement)
+                for schema_name in database.get_schema_names():
+                    if schema_name != DatamodelConstants.DEFAULT_SCHEMA:
+                        outfile.write(generator.generate_create_schema_statement(schema_name=schema_name))
+            phases.append({"name": "database", "depends_on": [], "files": ["database.tql"]})
+
+        table_files = []
+        used_names = set()
+        for table in database:
+            table_file = TQLWriter._get_table_filename(table, used_names)
+            makedirs(path.join(directory, path.dirname(table_file)), exist_ok=True)
+            with open(path.join(directory, table_file), "w") as outfile:
+                outfile.write(use_statement)
+                self.write_create_table_statement(table, outfile)
+            table_files.append(table_file)
+        phases.append({"name": "tables", "depends_on": [phase["name"] for phase in phases], "files": table_files})
+
+        for phase_name, write_statements in (("foreign_keys", self.write_foreign_keys),
+                                             ("relationships", self.write_relationships)):
+            statements = StringIO()
+            for table in database:
+                write_statements(table, statements)
+            if statements.tell() > 0:
+                phase_file = f"{phase_name}.tql"
+                with open(path.join(directory, phase_file), "w") as outfile:
+                    outfile.write(use_statement)
+                    outfile.write(statements.getvalue())
+                phases.append({"name": phase_name, "depends_on": ["tables"], "files": [phase_file]})
+
+        manifest = {"database": db_name, "phases": phases}
+        with open(path.join(directory, "manifest.json"), "w") as outfile:
+            json.dump(manifest, outfile, indent=2)
+
+        return manifest
+
+    @staticmethod
+    def _get_table_filename(table, used_names):
+        """
+        Returns a unique file name for a table.  Characters that aren't safe in file names are replaced.
+        :param table: The table to get the file name for.
+        :type table: Table
+        :param used_names: Lower case names that have already been used.  The new name is added.
+        :type used_names: set of str
+        :return: The file name relative to the output directory.
+        :rtype: str
+        """
+        schema_name = re.sub(r"[^\w.-]", "_", table.schema_name).lstrip(".") or "_"
+        table_name = re.sub(r"[^\w.-]", "_", table.table_name).lstrip(".") or "_"
+        filename = f"{schema_name}/{table_name}.tql"
+        cnt = 1
+        while filename.lower() in used_names:  # avoid clobbering on case insensitive file systems.
+            cnt += 1
+            filename = f"{schema_name}/{table_name}_{cnt}.tql"
+        used_names.add(filename.lower())
+        return filename
+
+    def _write_tables_in_parallel(self, database, outfile):
+        """
+        Generates the statements for chunks of tables in a process pool.  The CREATE statements are written as the
+        chunks complete.  The foreign keys and relationships are streamed to temporary files and copied after all of
+        the tables, in the same order as when writing from a single process.
+        :param database: The database to write.
+        :type database: Database
+        :param outfile: File stream to write to.
+        """
+        tables = list(database)
+        chunk_size = TQLWriter.TABLES_PER_JOB
+        bounds = [(start, start + chunk_size) for start in range(0, len(tables), chunk_size)]
+        generator = self.command_generator
+        case_args = {"uppercase": generator.uppercase, "lowercase": generator.lowercase,
+                     "camelcase": generator.camelcase}
+
+        # Pickling the tables costs more than generating the TQL.  Forked workers inherit the tables, so only the
+        # bounds of each chunk are sent.  Otherwise each chunk is sent with its own tables, so the tables are only
+        # pickled once in total instead of once per worker.
+        if multiprocessing.get_start_method() == "fork":
+            initargs = (case_args, tables)
+            chunks = bounds
+        else:
+            initargs = (case_args, None)
+            chunks = [tables[start:end] for start, end in bounds]
+
+        with tempfile.TemporaryFile("w+", encoding="utf-8") as foreign_keys, \
+                tempfile.TemporaryFile("w+", encoding="utf-8") as relationships:
+            with ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_table_chunk_worker,
+                                     initargs=initargs) as executor:
+                for creates, fks, rels in executor.map(_generate_table_chunk, chunks):
+                    outfile.write(creates)
+                    foreign_keys.write(fks)
+                    relationships.write(rels)
+
+            for statements in (foreign_keys, relationships):
+                statements.seek(0)
+                shutil.copyfileobj(statements, outfile)
+
     def write_create_table_statement(self, table, outfile):
         """
         Writes a CREATE TABLE statement.
@@ -737,10 +947,8 @@ class TQLWriter:
         :param outfile: File stream to write to.
         """
 
-        outfile.write("\n")
-        outfile.write(self.command_generator.generate_drop_table_statement(table))
-        outfile.write("\n")
-        outfile.write(self.command_generator.generate_create_table_statement(table))
+        outfile.write("\n%s\n%s" % (self.command_generator.generate_drop_table_statement(table),
+                                     self.command_generator.generate_create_table_statement(table)))
 
     def write_foreign_keys(self, table, outfile):
         """
@@ -749,8 +957,9 @@ class TQLWriter:
         :type table: Table
         :param outfile: The file to write to.
         """
-        for fk in table.foreign_keys.values():
-            outfile.write(self.command_generator.generate_foreign_key_statement(table=table, foreign_key=fk))
+        if table.foreign_keys:
+            outfile.write("".join([self.command_generator.generate_foreign_key_statement(table=table, foreign_key=fk)
+                                   for fk in table.foreign_keys.values()]))
 
     def write_relationships(self, table, outfile):
         """
@@ -759,23 +968,69 @@ class TQLWriter:
         :type table: Table
         :param outfile: The file to write to.
         """
-        for rel in table.relationships.values():
-            outfile.write(self.command_generator.generate_relationships(table=table, relationship=rel))
+        if table.relationships:
+            outfile.write("".join([self.command_generator.generate_relationships(table=table, relationship=rel)
+                                   for rel in table.relationships.values()]))
+
+
+_chunk_writer = None  # TQLWriter for the worker process.
+_chunk_tables = None  # All of the tables being written by the worker process.
+
+
+def _init_table_chunk_worker(case_args, tables):
+    """
+    Initializes a worker process for generating TQL.
+    :param case_args: The case arguments for the TQLWriter.
+    :type case_args: dict
+    :param tables: The tables being written or None if each chunk has its own tables.
+    :type tables: list of Table
+    """
+    global _chunk_writer, _chunk_tables
+    _chunk_writer = TQLWriter(**case_args)
+    _chunk_tables = tables
+
+
+def _generate_table_chunk(chunk):
+    """
+    Generates the TQL for a chunk of tables.  This is module level so it can be run in a process pool.
+    :param chunk: The start and end index of the tables to generate statements for, or the tables themselves.
+    :type chunk: (int, int) | list of Table
+    :return: The CREATE, foreign key and relationship statements for the tables.
+    :rtype: (str, str, str)
+    """
+    tables = chunk if _chunk_tables is None else _chunk_tables[chunk[0]:chunk[1]]
+    creates, fks, rels = StringIO(), StringIO(), StringIO()
+    for table in tables:
+        _chunk_writer.write_create_table_statement(table, creates)
+        _chunk_writer.write_foreign_keys(table, fks)
+        _chunk_writer.write_relationships(table, rels)
+    return creates.getvalue(), fks.getvalue(), rels.getvalue()
 
 # -------------------------------------------------------------------------------------------------------------------
 
 
 class XLSWriter:
     """
-    Writes data from a database to Excel.
+    Writes data from a database to Excel.  The workbook is written in write-only mode, which streams rows to the file
+    instead of keeping every cell in memory.
     """
     EXTENSION = ".xlsx"
 
-    def __init__(self):
+    COLUMNS_HEADER = ["Database", "Schema", "Table", "Column", "Name", "Type"]
+    TABLES_HEADER = ["Database", "Schema", "Table", "Updated", "Update Type", "# Rows", "# Columns", "Primary Key",
+                     "Shard Key", "# Shards", "RLS Column", "# FKs From", "# FKs To", "# Rels From", "# Rels To"]
+    FOREIGN_KEYS_HEADER = ["Name", "Database", "Schema", "From Table", "From Columns", "To Table", "To Columns"]
+    RELATIONSHIPS_HEADER = ["Name", "Database", "Schema", "From Table", "To Table", "Conditions"]
+
+    def __init__(self, use_formulas=True):
         """
         Creates a new writer can write models to an Excel workbook.
+        :param use_formulas: If true, the counts on the Tables sheet are formulas that update as the model is edited.
+          Otherwise the counts are calculated from the model, which makes large workbooks much faster to open.
+        :type use_formulas: bool
         """
-        self.workbook = Workbook()
+        self.workbook = None
+        self.use_formulas = use_formulas
 
     def write_database(self, database, filename):
         """
@@ -785,77 +1040,96 @@ class XLSWriter:
         :param filename:  Name of the Excel file without extension.
         :type filename: str
         """
-        self._write_columns_worksheet(database)
-        self._write_tables_worksheet(database)
-        self._write_foreign_keys_worksheet(database)
-        self._write_relationships_worksheet(database)
+        self.workbook = Workbook(write_only=True)
+        for sheet_name, header, rows in self.get_sheets(database):
+            ws = self.workbook.create_sheet(title=sheet_name)
+            ws.append(header)
+            for row in rows:
+                ws.append(row)
         self._write_to_excel(filename)
 
-    def _write_columns_worksheet(self, database):
+    def get_sheets(self, database):
         """
-        Writes the worksheet with the columns for each table.
-        :param database: The database to write.
+        Returns the sheets for the database.  The rows are generated as they are read, so they can be streamed to any
+        tabular format.
+        :param database: The database to get the sheets for.
         :type database: Database
+        :return: The name, header and rows for each sheet.
+        :rtype: list of (str, list of str, iter of list)
         """
+        return [
+            ("Columns", XLSWriter.COLUMNS_HEADER, self._get_columns_rows(database)),
+            ("Tables", XLSWriter.TABLES_HEADER,
+             self._get_tables_rows(database) if self.use_formulas else self._get_tables_rows_with_counts(database)),
+            ("Foreign Keys", XLSWriter.FOREIGN_KEYS_HEADER, self._get_foreign_keys_rows(database)),
+            ("Relationships", XLSWriter.RELATIONSHIPS_HEADER, self._get_relationships_rows(database)),
+        ]
 
-        ws = self.workbook.active  # assumes this is the first sheet.
-        ws.title = "Columns"
-
-        # Write the header row.
-        self._write_header(
-            ws=ws,
-            cols=["Database", "Schema", "Table", "Column", "Name", "Type"],
-        )
-
-        # Write the data.
-        row_cnt = 1
+    @staticmethod
+    def _get_columns_rows(database):
+        """
+        Generates the rows with the columns for each table.
+        :param database: The database to write.
+        :type database: Database
+        :return: A row for each column.
+        :rtype: iter of list
+        """
+        database_name = database.database_name
         for table in database:
-            col_idx = 0
-            for column in table:
-                col_idx += 1
-                row_cnt += 1
-                self._write_row(
-                    ws=ws,
-                    row_cnt=row_cnt,
-                    cols=[
-                        database.database_name,
-                        table.schema_name,
-                        table.table_name,
-                        col_idx,
-                        column.column_name,
-                        column.column_type,
-                    ],
-                )
+            schema_name = table.schema_name
+            table_name = table.table_name
+            for col_idx, column in enumerate(table, start=1):
+                yield [database_name, schema_name, table_name, col_idx, column.column_name, column.column_type]
 
-    def _write_tables_worksheet(self, database):
+    @staticmethod
+    def _get_table_row(database, table, number_columns, relationship_counts):
         """
-        Writes the table(s) details to the table worksheet.
-        :param database:  Database with the tables.
+        Returns the row with the details of a table.
+        :param database: Database with the table.
         :type database: Database
+        :param table: The table to get the row for.
+        :type table: Table
+        :param number_columns: The number of columns or a formula that counts them.
+        :param relationship_counts: The foreign keys from and to the table and the relationships from and to the table
+        as counts or formulas.
+        :type relationship_counts: list
+        :return: The row for the table.
+        :rtype: list
         """
+        primary_key = ""
+        if table.primary_key is not None:
+            primary_key = list_to_string(table.primary_key)
+
+        shard_key = ""
+        number_shards = ""
+        if table.shard_key is not None:
+            shard_key = list_to_string(table.shard_key.shard_keys)
+            number_shards = table.shard_key.number_shards
+
+        # TODO add support for update frequency so that it's remembered during development.
+        return [
+            database.database_name,
+            table.schema_name,
+            table.table_name,
+            "daily",
+            "partial",
+            "",
+            number_columns,
+            primary_key,
+            shard_key,
+            number_shards,
+            "",
+        ] + list(relationship_counts)
 
-        ws = self.workbook.create_sheet(title="Tables")
-        self._write_header(
-            ws=ws,
-            cols=[
-                "Database",
-                "Schema",
-                "Table",
-                "Updated",
-                "Update Type",
-                "# Rows",
-                "# Columns",
-                "Primary Key",
-                "Shard Key",
-                "# Shards",
-                "RLS Column",
-                "# FKs From",
-                "# FKs To",
-                "# Rels From",
-                "# Rels To"
-            ],
-        )
-        # Write the data.
+    @staticmethod
+    def _get_tables_rows(database):
+        """
+        Generates the rows with the table(s) details.
+        :param database:  Database with the tables.
+        :type database: Database
+        :return: A row for each table.
+        :rtype: iter of list
+        """
         row_cnt = 1
         for table in database:
             row_cnt += 1
@@ -863,16 +1137,6 @@ class XLSWriter:
                 row_cnt, row_cnt, row_cnt
             )
 
-            primary_key = ""
-            if table.primary_key is not None:
-                primary_key = list_to_string(table.primary_key)
-
-            shard_key = ""
-            number_shards = ""
-            if table.shard_key is not None:
-                shard_key = list_to_string(table.shard_key.shard_keys)
-                number_shards = table.shard_key.number_shards
-
             # Formulas for seeing how many FKs are to and from the given table.
             nbr_fks_from = \
                 "=IF(COUNTIF('Foreign Keys'!$D:$D,\"=\"&$C%d)>0,COUNTIF('Foreign Keys'!$D:$D,\"=\"&$C%d),\"\")" \
@@ -889,130 +1153,77 @@ class XLSWriter:
                 "=IF(COUNTIF('Relationships'!$E:$E,\"=\"&$C%d)>0,COUNTIF('Relationships'!$E:$E,\"=\"&$C%d),\"\")" \
                 % (row_cnt, row_cnt)
 
-            # TODO add support for update frequency so that it's remembered during development.
-            self._write_row(
-                ws,
-                row_cnt,
-                [
-                    database.database_name,
-                    table.schema_name,
-                    table.table_name,
-                    "daily",
-                    "partial",
-                    "",
-                    lookup_formula,
-                    primary_key,
-                    shard_key,
-                    number_shards,
-                    "",
-                    nbr_fks_from,
-                    nbr_fks_to,
-                    nbr_rels_from,
-                    nbr_rels_to
-                ],
-            )
+            yield XLSWriter._get_table_row(database, table, lookup_formula,
+                                           [nbr_fks_from, nbr_fks_to, nbr_rels_from, nbr_rels_to])
 
-    def _write_foreign_keys_worksheet(self, database):
+    @staticmethod
+    def _get_tables_rows_with_counts(database):
         """
-        Writes the relationship details (FKs and generic relationships) worksheet.
-        :param database: 
+        Generates the rows with the table(s) details with the counts calculated from the model instead of formulas.
+        Counts of zero for keys and relationships are left blank the same as with the formulas.
+        :param database:  Database with the tables.
         :type database: Database
+        :return: A row for each table.
+        :rtype: iter of list
         """
-        ws = self.workbook.create_sheet(title="Foreign Keys")
-        # Assuming relationships can only be within a single schema.
-        self._write_header(
-            ws,
-            [
-                "Name",
-                "Database",
-                "Schema",
-                "From Table",
-                "From Columns",
-                "To Table",
-                "To Columns",
-            ],
-        )
-
-        row_cnt = 1
+        # One pass over the model to count the keys and relationships by table name like the formulas do.  COUNTIF
+        # ignores case, so the names are counted in lower case.
+        fks_from, fks_to, rels_from, rels_to = Counter(), Counter(), Counter(), Counter()
         for table in database:
             for fk in table.foreign_keys_iter():
-                row_cnt += 1
-                from_column = list_to_string(fk.from_keys)
-                to_column = list_to_string(fk.to_keys)
-                self._write_row(
-                    ws,
-                    row_cnt,
-                    [
-                        fk.name,
-                        database.database_name,
-                        table.schema_name,
-                        fk.from_table,
-                        from_column,
-                        fk.to_table,
-                        to_column,
-                    ],
-                )
-
-    def _write_relationships_worksheet(self, database):
-        """
-        Writes the relationship details (FKs and generic relationships) worksheet.
-        :param database: 
-        :type database: Database
-        """
-        ws = self.workbook.create_sheet(title="Relationships")
-        # Assuming relationships can only be within a single schema.
-        self._write_header(
-            ws,
-            [
-                "Name",
-                "Database",
-                "Schema",
-                "From Table",
-                "To Table",
-                "Conditions",
-            ],
-        )
+                fks_from[fk.from_table.lower()] += 1
+                fks_to[fk.to_table.lower()] += 1
+            for rel in table.relationships_iter():
+                rels_from[rel.from_table.lower()] += 1
+                rels_to[rel.to_table.lower()] += 1
 
-        row_cnt = 1
         for table in database:
-
-            for rel in table.relationships_iter():
-                row_cnt += 1
-                self._write_row(
-                    ws,
-                    row_cnt,
-                    [
-                        rel.name,
-                        database.database_name,
-                        table.schema_name,
-                        rel.from_table,
-                        rel.to_table,
-                        rel.conditions,
-                    ],
-                )
+            table_name = table.table_name.lower()
+            counts = [counter[table_name] or "" for counter in (fks_from, fks_to, rels_from, rels_to)]
+            yield XLSWriter._get_table_row(database, table, len(table.columns), counts)
 
     @staticmethod
-    def _write_header(ws, cols):
+    def _get_foreign_keys_rows(database):
         """
-        Writes the header for a worksheet.
-        :param ws: The worksheet to write to.
-        :param cols: The column headers to write.
+        Generates the foreign key rows.
+        :param database: The database with the foreign keys.
+        :type database: Database
+        :return: A row for each foreign key.
+        :rtype: iter of list
         """
-        for ccnt in range(0, len(cols)):
-            ws.cell(column=(ccnt + 1), row=1, value=cols[ccnt])
-
-    # TODO add formatting to distinguish the header.
+        # Assuming relationships can only be within a single schema.
+        for table in database:
+            for fk in table.foreign_keys_iter():
+                yield [
+                    fk.name,
+                    database.database_name,
+                    table.schema_name,
+                    fk.from_table,
+                    list_to_string(fk.from_keys),
+                    fk.to_table,
+                    list_to_string(fk.to_keys),
+                ]
 
     @staticmethod
-    def _write_row(ws, row_cnt, cols):
+    def _get_relationships_rows(database):
         """
-        Writes a row of data.
-        :param ws: The worksheet to write to.
-        :param row_cnt: The row to write to.
-        :param cols: The columns to write.
+        Generates the generic relationship rows.
+        :param database: The database with the relationships.
+        :type database: Database
+        :return: A row for each relationship.
+        :rtype: iter of list
         """
-        for ccnt in range(0, len(cols)):
-            ws.cell(column=(ccnt + 1), row=row_cnt, value=cols[ccnt])
+        # Assuming relationships can only be within a single schema.
+        for table in database:
+            for rel in table.relationships_iter():
+                yield [
+                    rel.name,
+                    database.database_name,
+                    table.schema_name,
+                    rel.from_table,
+                    rel.to_table,
+                    rel.conditions,
+                ]
 
     def _write_to_excel(self, filename):
         """
@@ -1028,6 +1239,182 @@ class XLSWriter:
 # -------------------------------------------------------------------------------------------------------------------
 
 
+class XLSXRowReader:
+    """
+    Streams the rows of the sheets in an .xlsx file.  Only cell values are read.  Formatting is ignored and formulas
+    return the value that was calculated when the file was saved, if any.  This is much faster than openpyxl for
+    large sheets because each row is parsed directly from the XML and then discarded.
+    """
+
+    _MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+    _REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+    _PACKAGE_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+    _SHEET_DATA_TAG = _MAIN_NS + "sheetData"
+    _ROW_TAG = _MAIN_NS + "row"
+    _VALUE_TAG = _MAIN_NS + "v"
+    _TEXT_TAG = _MAIN_NS + "t"
+    _PHONETIC_TAG = _MAIN_NS + "rPh"
+    _SHARED_STRING_TAG = _MAIN_NS + "si"
+
+    def __init__(self, filepath):
+        """
+        Opens an .xlsx file and reads the list of sheets and the shared strings.
+        :param filepath: The path to the Excel document.
+        :type filepath: str
+        """
+        self._archive = zipfile.ZipFile(filepath)
+        self._sheet_paths = OrderedDict()
+        self._shared_strings = []
+        try:
+            self._read_sheet_paths()
+            self._read_shared_strings()
+        except Exception:
+            self._archive.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Closes the file."""
+        self._archive.close()
+
+    @property
+    def sheetnames(self):
+        """
+        Returns the names of the sheets in the order in the workbook.
+        :return: The names of the sheets.
+        :rtype: list of str
+        """
+        return list(self._sheet_paths.keys())
+
+    def _read_sheet_paths(self):
+        """
+        Reads the names of the sheets and the files in the archive with the sheet data.
+        """
+        targets = {}
+        with self._archive.open("xl/_rels/workbook.xml.rels") as rels_file:
+            for relationship in ElementTree.parse(rels_file).getroot().iter(self._PACKAGE_REL_NS + "Relationship"):
+                target = relationship.get("Target")
+                # Targets are usually relative to xl/ but can be absolute within the archive.
+                targets[relationship.get("Id")] = target.lstrip("/") if target.startswith("/") else "xl/" + target
+
+        with self._archive.open("xl/workbook.xml") as workbook_file:
+            for sheet in ElementTree.parse(workbook_file).getroot().iter(self._MAIN_NS + "sheet"):
+                self._sheet_paths[sheet.get("name")] = targets.get(sheet.get(self._REL_NS + "id"))
+
+    def _read_shared_strings(self):
+        """
+        Reads the shared strings that cells can refer to by index.
+        """
+        if "xl/sharedStrings.xml" not in self._archive.namelist():
+            return
+
+        with self._archive.open("xl/sharedStrings.xml") as strings_file:
+            for _, element in ElementTree.iterparse(strings_file):
+                if element.tag == self._SHARED_STRING_TAG:
+                    self._shared_strings.append(self._get_text(element))
+                    element.clear()
+
+    def _get_text(self, element):
+        """
+        Returns the text for a shared or inline string, which can be made up of multiple runs of formatted text.
+        :param element: The <si> or <is> element with the text.
+        :return: The text.
+        :rtype: str
+        """
+        text = []
+        for child in element:
+            if child.tag == self._TEXT_TAG:
+                text.append(child.text or "")
+            elif child.tag != self._PHONETIC_TAG:  # rich text runs have the text in <r><t>.
+                text.extend([t.text or "" for t in child.iter(self._TEXT_TAG)])
+        return "".join(text)
+
+    @staticmethod
+    def _get_column_index(reference):
+        """
+        Converts a cell reference such as "AB12" to a zero based column index.
+        :param reference: The cell reference.
+        :type reference: str
+        :return: The column index.
+        :rtype: int
+        """
+        index = 0
+        for char in reference:
+            if not char.isalpha():
+                break
+            index = index * 26 + ord(char.upper()) - ord("A") + 1
+        return index - 1
+
+    def _get_value(self, cell):
+        """
+        Returns the value of a cell.
+        :param cell: The <c> element for the cell.
+        :return: The value or None if the cell doesn't have a value.
+        """
+        cell_type = cell.get("t", "n")
+        if cell_type == "inlineStr":
+            for child in cell:
+                if child.tag != self._VALUE_TAG:  # <is>
+                    return self._get_text(child)
+            return None
+
+        value = cell.findtext(self._VALUE_TAG)
+        if value is None:
+            return None
+        if cell_type == "s":
+            return self._shared_strings[int(value)]
+        if cell_type == "n":
+            try:
+                return int(value)
+            except ValueError:
+                return float(value)
+        if cell_type == "b":
+            return value == "1"
+        return value  # str (formula results) and e (errors)
+
+    def iter_rows(self, sheet_name):
+        """
+        Returns the rows of a sheet as they are read.  Missing cells within a row are None.  Rows without any cells
+        aren't returned.
+        :param sheet_name: The name of the sheet to read.
+        :type sheet_name: str
+        :return: The values in each row.
+        :rtype: iter of list
+        """
+        column_indices = {}  # column letters to index, since the same few columns are in every row.
+        get_value = self._get_value
+        with self._archive.open(self._sheet_paths[sheet_name]) as sheet_file:
+            sheet_data = None
+            for event, element in ElementTree.iterparse(sheet_file, events=("start", "end")):
+                if event == "start":
+                    if element.tag == self._SHEET_DATA_TAG:
+                        sheet_data = element
+                elif element.tag == self._ROW_TAG:
+                    values = []
+                    for cell in element:
+                        reference = cell.get("r")
+                        if reference:
+                            letters = reference.rstrip("0123456789")
+                            column = column_indices.get(letters)
+                            if column is None:
+                                column = column_indices[letters] = self._get_column_index(letters)
+                            if column > len(values):  # skipped empty cells
+                                values.extend([None] * (column - len(values)))
+                        values.append(get_value(cell))
+                    if sheet_data is not None:
+                        sheet_data.clear()  # don't keep the rows that have been read.
+                    if values:
+                        yield values
+
+# -------------------------------------------------------------------------------------------------------------------
+
+
 class XLSReader:
     """
     Reads data models from an Excel file.  Note that this file follows a very specific format.  
@@ -1070,12 +1457,15 @@ class XLSReader:
         ],
     }
 
+    MAX_ERROR_EXAMPLES = 10  # number of names listed for each type of error.
+
     def __init__(self):
         """Creates a new Excel reader."""
         # Column indices for each sheet to make reading of values based on column header.
         self.workbook = None
         self.indices = {}
         self.databases = {}
+        self.errors = OrderedDict()  # (sheet, problem) -> count of rows for each name.
 
     def read_xls(self, filepath):
         """
@@ -1085,11 +1475,44 @@ class XLSReader:
         :return: A Database object based on the contents of the Excel document.
         :rtype: dict of str:Database
         """
-        self.workbook = xlrd.open_workbook(filepath)
-        if self._verify_file_format():
-            self._read_databases_from_workbook()
+        self.workbook = XLSXRowReader(filepath)
+        try:
+            if self._verify_file_format():
+                self._read_databases_from_workbook()
+        finally:
+            self.workbook.close()
         return self.databases
 
+    def _get_header(self, sheet_name):
+        """
+        Returns the header row for a sheet.
+        :param sheet_name: The name of the sheet.
+        :type sheet_name: str
+        :return: The column headers.  Empty headers are "".
+        :rtype: list of str
+        """
+        for row in self.workbook.iter_rows(sheet_name):
+            return ["" if value is None else value for value in row]
+        return []
+
+    def _get_rows(self, sheet_name):
+        """
+        Returns the data rows (after the header) for a sheet.  Rows are padded to the width of the header and empty
+        cells are "".
+        :param sheet_name: The name of the sheet.
+        :type sheet_name: str
+        :return: The rows of values.
+        :rtype: iter of list
+        """
+        width = len(self.indices[sheet_name])
+        rows = self.workbook.iter_rows(sheet_name)
+        next(rows, None)  # skip the header
+        for row in rows:
+            values = ["" if value is None else value for value in row]
+            if len(values) < width:
+                values.extend([""] * (width - len(values)))
+            yield values
+
     def _verify_file_format(self):
         """
         Verifies that the Excel document has the correct tabs and column headers.
@@ -1099,14 +1522,13 @@ class XLSReader:
 
         is_valid = True  # hope for the best.
 
-        sheet_names = self.workbook.sheet_names()
+        sheet_names = self.workbook.sheetnames
         for required_sheet in XLSReader.required_sheets:
             if required_sheet not in sheet_names:
                 eprint("Error:  missing sheet %s!" % required_sheet)
                 is_valid = False
             else:
-                sheet = self.workbook.sheet_by_name(required_sheet)
-                header_row = sheet.row_values(rowx=0, start_colx=0)
+                header_row = self._get_header(required_sheet)
                 for required_column in XLSReader.required_columns[
                     required_sheet
                 ]:
@@ -1124,13 +1546,12 @@ class XLSReader:
         Reads the sheets to get all of the column indices.  Assumes the format is valid.
         """
 
-        sheet_names = self.workbook.sheet_names()
+        sheet_names = self.workbook.sheetnames
         for sheet_name in sheet_names:
             if sheet_name in self.required_sheets:
-                sheet = self.workbook.sheet_by_name(sheet_name)
                 col_indices = {}
                 ccnt = 0
-                for col in sheet.row_values(rowx=0, start_colx=0):
+                for col in self._get_header(sheet_name):
                     col_indices[col] = ccnt
                     ccnt += 1
                 self.indices[sheet_name] = col_indices
@@ -1138,14 +1559,66 @@ class XLSReader:
     def _read_databases_from_workbook(self):
         """
         Reads one or more database from a workbook.  Errors can still be encountered, but the format should be OK.
+        Errors are collected while reading and reported once at the end.
         :return: A list of the databases in the file.
         :rtype: dict of Database
         """
         self._get_column_indices()
+        self.errors = OrderedDict()
         self._read_tables_from_workbook()
         self._read_columns_from_workbook()
         self._read_foreign_keys_from_workbook()
         self._read_relationships_from_workbook()
+        self._report_errors()
+
+    def _add_error(self, sheet_name, problem, name, count=1):
+        """
+        Records an error so that similar errors can be reported together.
+        :param sheet_name: The sheet with the error.
+        :type sheet_name: str
+        :param problem: Description of the problem, e.g. "unknown table".
+        :type problem: str
+        :param name: The name of the item with the problem.
+        :type name: str
+        :param count: The number of rows with the problem.
+        :type count: int
+        """
+        self.errors.setdefault((sheet_name, problem), Counter())[name] += count
+
+    def _report_errors(self):
+        """
+        Writes one line for each type of error with the number of rows and some of the names.
+        """
+        for (sheet_name, problem), names in self.errors.items():
+            examples = ", ".join([str(name) for name in list(names.keys())[:XLSReader.MAX_ERROR_EXAMPLES]])
+            if len(names) > XLSReader.MAX_ERROR_EXAMPLES:
+                examples += ", ..."
+            eprint(f"ERROR:  {problem} in {sum(names.values())} row(s) of the {sheet_name} tab "
+                   f"for {len(names)} name(s): {examples}")
+
+    def _get_table(self, sheet_name, database_name, table_name, count=1):
+        """
+        Returns the table for a row in a sheet.  An error is recorded if the database or table isn't known.
+        :param sheet_name: The sheet being read.
+        :type sheet_name: str
+        :param database_name: The name of the database with the table.
+        :type database_name: str
+        :param table_name: The name of the table.
+        :type table_name: str
+        :param count: The number of rows that refer to the table.
+        :type count: int
+        :return: The table or None if it's not known.
+        :rtype: Table
+        """
+        database = self.databases.get(database_name, None)
+        if database is None:
+            self._add_error(sheet_name, "unknown database", database_name, count)
+            return None
+
+        table = database.get_table(table_name)
+        if table is None:
+            self._add_error(sheet_name, "unknown table", f"{database_name}.{table_name}", count)
+        return table
 
     def _read_tables_from_workbook(self):
         """
@@ -1154,15 +1627,12 @@ class XLSReader:
 
         # "Tables":        ["Database", "Schema", "Table", "Updated", "Update Type", "# Rows", "# Columns",
         #                   "Primary Key", "Shard Key", "# Shards", "RLS Column"],
-        table_sheet = self.workbook.sheet_by_name("Tables")
         indices = self.indices["Tables"]
 
-        for row_count in range(1, table_sheet.nrows):
-            row = table_sheet.row_values(rowx=row_count, start_colx=0)
+        for row in self._get_rows("Tables"):
 
             database_name = row[indices["Database"]]
             if database_name == "":  # ignore rows with no DBs.
-                # eprint("Warning:  no database provided. Ignoring :" % row)
                 continue
 
             database = self.databases.get(database_name, None)
@@ -1170,22 +1640,19 @@ class XLSReader:
                 database = Database(database_name=database_name)
                 self.databases[database_name] = database
 
-            pk = row[indices["Primary Key"]].strip()
+            pk = str(row[indices["Primary Key"]]).strip()
             if pk == "":
                 pk = None
             else:
                 pk = [x.strip() for x in pk.split(",")]
 
-            sk_name = row[indices["Shard Key"]].strip()
+            sk_name = str(row[indices["Shard Key"]]).strip()
             sk_nbr_shards = row[indices["# Shards"]]
 
             if (sk_name == "" and sk_nbr_shards != "") or (
                 sk_name != "" and sk_nbr_shards == ""
             ):
-                eprint(
-                    "ERROR:  %s need to provide both a shard key name and number of shards."
-                    % row[indices["Table"]]
-                )
+                self._add_error("Tables", "need both a shard key and number of shards", row[indices["Table"]])
 
             if sk_name == "":
                 sk = None
@@ -1193,6 +1660,13 @@ class XLSReader:
                 sk = [x.strip() for x in sk_name.split(",")]
 
             shard_key = None
+            if sk_name and sk_nbr_shards:
+                try:
+                    sk_nbr_shards = int(sk_nbr_shards)  # text formats don't have numbers.
+                except ValueError:
+                    self._add_error("Tables", "number of shards isn't a number", row[indices["Table"]])
+                    sk_nbr_shards = None
+
             if sk_name and sk_nbr_shards:
                 shard_key = ShardKey(
                     shard_keys=sk, number_shards=sk_nbr_shards
@@ -1208,38 +1682,29 @@ class XLSReader:
 
     def _read_columns_from_workbook(self):
         """
-        Reads the columns for the tables from Excel.  
+        Reads the columns for the tables from Excel.  The columns are grouped by table while reading and then added
+        to each table at once.
         """
         # "Columns":       ["Database", "Schema", "Table", "Column", "Name", "Type"],
-        column_sheet = self.workbook.sheet_by_name("Columns")
         indices = self.indices["Columns"]
-
-        for row_count in range(1, column_sheet.nrows):
-            row = column_sheet.row_values(rowx=row_count, start_colx=0)
-
-            database_name = row[indices["Database"]]
-            database = self.databases.get(database_name, None)
-            if database is None:
-                eprint(
-                    "ERROR:  Database %s from the Columns tab is not known."
-                    % database_name
-                )
-
-            else:
-                table_name = row[indices["Table"]]
-                table = database.get_table(table_name)
-                if table is None:
-                    eprint(
-                        "ERROR:  Table %s from the Columns tab is not known."
-                        % table_name
-                    )
-                else:
-                    table.add_column(
-                        Column(
-                            column_name=row[indices["Name"]],
-                            column_type=row[indices["Type"]],
-                        )
-                    )
+        database_idx, schema_idx, table_idx = indices["Database"], indices["Schema"], indices["Table"]
+        name_idx, type_idx = indices["Name"], indices["Type"]
+
+        # The columns for a table are usually together, so only look up the group when the table changes.
+        columns_by_table = OrderedDict()
+        current_key = None
+        current_columns = None
+        for row in self._get_rows("Columns"):
+            key = (row[database_idx], row[schema_idx], row[table_idx])
+            if key != current_key:
+                current_key = key
+                current_columns = columns_by_table.setdefault(key, [])
+            current_columns.append(Column(column_name=row[name_idx], column_type=row[type_idx]))
+
+        for (database_name, schema_name, table_name), columns in columns_by_table.items():
+            table = self._get_table("Columns", database_name, table_name, count=len(columns))
+            if table is not None:
+                table.add_columns(columns)
 
     def _read_foreign_keys_from_workbook(self):
         """
@@ -1247,81 +1712,408 @@ class XLSReader:
         """
 
         # "Foreign Keys":  ["Name", "Database", "Schema", "From Table", "Columns", "To Table", "Columns"],
-        fk_sheet = self.workbook.sheet_by_name("Foreign Keys")
         indices = self.indices["Foreign Keys"]
 
-        for row_count in range(1, fk_sheet.nrows):
-            row = fk_sheet.row_values(rowx=row_count, start_colx=0)
-
-            database_name = row[indices["Database"]]
-            database = self.databases.get(database_name, None)
-            if database is None:
-                eprint(
-                    "ERROR:  Database %s from the Foreign Keys tab is not known."
-                    % database_name
+        for row in self._get_rows("Foreign Keys"):
+
+            table = self._get_table("Foreign Keys", row[indices["Database"]], row[indices["From Table"]])
+            if table is not None:
+                key_name = row[indices["Name"]]
+                if key_name == "":
+                    self._add_error("Foreign Keys", "missing FK name (a name was generated)", table.table_name)
+                    key_name = None
+
+                from_keys = row[indices["From Columns"]]
+                from_keys = [x.strip() for x in str(from_keys).split(",")]
+                to_keys = row[indices["To Columns"]]
+                to_keys = [x.strip() for x in str(to_keys).split(",")]
+                table.add_foreign_key(
+                    name=key_name,
+                    from_keys=from_keys,
+                    to_table=row[indices["To Table"]],
+                    to_keys=to_keys,
                 )
 
-            else:
-                table_name = row[indices["From Table"]]
-                table = database.get_table(table_name)
-                if table is None:
-                    eprint(
-                        "ERROR:  Table %s from the Foreign Keys tab is not known."
-                        % table_name
-                    )
-
-                else:
-                    key_name = row[indices["Name"]]
-                    if key_name is None:
-                        eprint(
-                            "ERROR:  Table %s from the Foreign Keys tab is missing a FK name."
-                            % table_name
-                        )
-
-                    from_keys = row[indices["From Columns"]]
-                    from_keys = [x.strip() for x in from_keys.split(",")]
-                    to_keys = row[indices["To Columns"]]
-                    to_keys = [x.strip() for x in to_keys.split(",")]
-                    table.add_foreign_key(
-                        name=key_name,
-                        from_keys=from_keys,
-                        to_table=row[indices["To Table"]],
-                        to_keys=to_keys,
-                    )
-
     def _read_relationships_from_workbook(self):
         """
-        Reads the foreign keys for the tables from Excel.  
+        Reads the generic relationships for the tables from Excel.
         """
         # "Relationships": ["Name", "Database", "Schema", "From Table", "To Table", "Conditions"]
-        rel_sheet = self.workbook.sheet_by_name("Relationships")
         indices = self.indices["Relationships"]
 
-        for row_count in range(1, rel_sheet.nrows):
-            row = rel_sheet.row_values(rowx=row_count, start_colx=0)
+        for row in self._get_rows("Relationships"):
 
-            database_name = row[indices["Database"]]
-            database = self.databases.get(database_name, None)
-            if database is None:
-                eprint(
-                    "ERROR:  Database %s from the Relationships tab is not known."
-                    % database_name
-                )
-
-            else:
-                table_name = row[indices["From Table"]]
-                table = database.get_table(table_name)
-                if table is None:
-                    eprint(
-                        "ERROR:  Table %s from the Relationships tab is not known."
-                        % table_name
-                    )
+            table = self._get_table("Relationships", row[indices["Database"]], row[indices["From Table"]])
+            if table is not None:
                 table.add_relationship(
                     to_table=row[indices["To Table"]],
                     conditions=row[indices["Conditions"]],
                 )
 
 
+# -------------------------------------------------------------------------------------------------------------------
+
+
+def _get_csv_filename(sheet_name, delimiter):
+    """
+    Returns the file name used for a sheet in a CSV bundle, e.g. "Foreign Keys" is foreign_keys.csv.
+    :param sheet_name: The name of the sheet.
+    :type sheet_name: str
+    :param delimiter: The delimiter used in the file.  Tab delimited files have a .tsv extension.
+    :type delimiter: str
+    :return: The file name for the sheet.
+    :rtype: str
+    """
+    extension = ".tsv" if delimiter == "\t" else ".csv"
+    return sheet_name.lower().replace(" ", "_") + extension
+
+
+class CSVWriter:
+    """
+    Writes a database to a directory of CSV (or TSV) files, one for each of the sheets that XLSWriter creates.  The
+    bundle can be edited and read back with CSVReader, but is much faster to write and read than Excel.
+    """
+
+    def __init__(self, delimiter=","):
+        """
+        Creates a new writer for CSV bundles.
+        :param delimiter: The delimiter to use.  Use a tab for TSV files.
+        :type delimiter: str
+        """
+        self.delimiter = delimiter
+
+    def write_database(self, database, directory):
+        """
+        Writes the database to the directory.  The counts on the tables sheet are values instead of formulas.
+        :param database: The database object to write.
+        :type database: Database
+        :param directory: The directory to write the files to.  It will be created if it doesn't exist.
+        :type directory: str
+        """
+        makedirs(directory, exist_ok=True)
+        for sheet_name, header, rows in XLSWriter(use_formulas=False).get_sheets(database):
+            filename = path.join(directory, _get_csv_filename(sheet_name, self.delimiter))
+            with open(filename, "w", newline="", encoding="utf-8") as csv_file:
+                writer = csv.writer(csv_file, delimiter=self.delimiter)
+                writer.writerow(header)
+                writer.writerows(rows)
+
+
+class CSVRowReader:
+    """
+    Reads the rows of a CSV bundle with the same interface as XLSXRowReader so that XLSReader can read either.
+    """
+
+    def __init__(self, directory):
+        """
+        Finds the files for each sheet in a directory.  Files can be CSV (.csv) or tab delimited (.tsv).
+        :param directory: The directory with the files.
+        :type directory: str
+        """
+        self._files = OrderedDict()
+        for sheet_name in XLSReader.required_sheets:
+            for delimiter in (",", "\t"):
+                filename = path.join(directory, _get_csv_filename(sheet_name, delimiter))
+                if path.exists(filename):
+                    self._files[sheet_name] = (filename, delimiter)
+                    break
+
+    def close(self):
+        """Nothing to close since files are only open while they are being read."""
+        pass
+
+    @property
+    def sheetnames(self):
+        """
+        Returns the names of the sheets that have files.
+        :return: The names of the sheets.
+        :rtype: list of str
+        """
+        return list(self._files.keys())
+
+    def iter_rows(self, sheet_name):
+        """
+        Returns the rows of a sheet as they are read.  All values are strings.
+        :param sheet_name: The name of the sheet to read.
+        :type sheet_name: str
+        :return: The values in each row.
+        :rtype: iter of list
+        """
+        filename, delimiter = self._files[sheet_name]
+        with open(filename, "r", newline="", encoding="utf-8") as csv_file:
+            for row in csv.reader(csv_file, delimiter=delimiter):
+                if row:
+                    yield row
+
+
+class CSVReader(XLSReader):
+    """
+    Reads data models from a directory of CSV or TSV files written by CSVWriter.  The files have the same columns as
+    the sheets in the Excel format.
+    """
+
+    def read_csv(self, directory):
+        """
+        Reads the CSV bundle in the directory and returns a dictionary with one or more database keyed by name.
+        :param directory: The directory with the files.
+        :type directory: str
+        :return: The databases read from the files.
+        :rtype: dict of str:Database
+        """
+        self.workbook = CSVRowReader(directory)
+        if self._verify_file_format():
+            self._read_databases_from_workbook()
+        return self.databases
+
+
+class JSONWriter:
+    """
+    Writes a database as JSON.  Tables are written one at a time so the whole model is never converted at once.
+    Since JSON is a subset of YAML, the files can also be read as YAML.
+    """
+
+    @staticmethod
+    def column_to_dict(column):
+        """
+        Converts a column to a dictionary that can be serialized.
+        :param column: The column to convert.
+        :type column: Column
+        :return: A dictionary with the name and type of the column.
+        :rtype: dict
+        """
+        return {"name": column.column_name, "type": column.column_type}
+
+    @staticmethod
+    def foreign_key_to_dict(foreign_key):
+        """
+        Converts a foreign key to a dictionary that can be serialized.
+        :param foreign_key: The foreign key to convert.
+        :type foreign_key: ForeignKey
+        :return: A dictionary with the details of the foreign key.
+        :rtype: dict
+        """
+        return {"name": foreign_key.name,
+                "from_table": foreign_key.from_table, "from_keys": list(foreign_key.from_keys),
+                "to_table": foreign_key.to_table, "to_keys": list(foreign_key.to_keys)}
+
+    @staticmethod
+    def relationship_to_dict(relationship):
+        """
+        Converts a generic relationship to a dictionary that can be serialized.
+        :param relationship: The relationship to convert.
+        :type relationship: GenericRelationship
+        :return: A dictionary with the details of the relationship.
+        :rtype: dict
+        """
+        return {"name": relationship.name,
+                "from_table": relationship.from_table, "to_table": relationship.to_table,
+                "conditions": relationship.conditions}
+
+    @staticmethod
+    def table_to_dict(table, include_relationships=True):
+        """
+        Converts a table to a dictionary that can be serialized.  JSONReader.table_from_dict reads it back.
+        :param table: The table to convert.
+        :type table: Table
+        :param include_relationships: If False, the foreign keys and relationships are left out, e.g. when they are
+        reported separately.
+        :type include_relationships: bool
+        :return: A dictionary with the details of the table.
+        :rtype: dict
+        """
+        shard_key = None
+        if table.shard_key is not None:
+            shard_key = {"shard_keys": list(table.shard_key.shard_keys),
+                         "number_shards": table.shard_key.number_shards}
+
+        table_dict = {
+            "name": table.table_name,
+            "schema": table.schema_name,
+            "columns": [JSONWriter.column_to_dict(column) for column in table],
+            "primary_key": list(table.primary_key),
+            "shard_key": shard_key,
+        }
+        if include_relationships:
+            table_dict["foreign_keys"] = [JSONWriter.foreign_key_to_dict(fk) for fk in table.foreign_keys_iter()]
+            table_dict["relationships"] = [JSONWriter.relationship_to_dict(rel) for rel in table.relationships_iter()]
+        return table_dict
+
+    def write_database(self, database, filename):
+        """
+        Writes the database to the file as {"database": name, "tables": [table, ...]}.
+        :param database: The database to write.
+        :type database: Database
+        :param filename: The name of the file to write to or '-' for stdout.
+        :type filename: str
+        """
+        with smart_open(filename) as outfile:
+            outfile.write(f'{{"database": {json.dumps(database.database_name)}, "tables": [')
+            separator = "\n"
+            for table in database:
+                outfile.write(separator)
+                outfile.write(json.dumps(JSONWriter.table_to_dict(table)))
+                separator = ",\n"
+            outfile.write("\n]}\n")
+
+
+class JSONReader:
+    """
+    Reads a database from JSON written by JSONWriter.  The file is read in chunks and each table is decoded and added
+    to the database as soon as it has been read, so the whole document is never held in memory.
+    """
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self):
+        """
+        Creates a new reader.
+        """
+        self._decoder = json.JSONDecoder()
+        self._file = None
+        self._buffer = ""
+        self._position = 0
+        self._eof = False
+
+    def _read_more(self):
+        """
+        Adds the next chunk of the file to the buffer and drops the part of the buffer that has been decoded.
+        :return: False if the end of the file has been reached.
+        :rtype: bool
+        """
+        chunk = self._file.read(self.CHUNK_SIZE)
+        self._buffer = self._buffer[self._position:] + chunk
+        self._position = 0
+        self._eof = not chunk
+        return not self._eof
+
+    def _next_character(self):
+        """
+        Returns the next character that isn't whitespace and moves past it.
+        :return: The character.
+        :rtype: str
+        """
+        while True:
+            while self._position < len(self._buffer) and self._buffer[self._position].isspace():
+                self._position += 1
+            if self._position < len(self._buffer):
+                self._position += 1
+                return self._buffer[self._position - 1]
+            if not self._read_more():
+                raise ValueError("Unexpected end of JSON.")
+
+    def _next_value(self):
+        """
+        Decodes the next JSON value, reading more of the file until the value is complete.
+        :return: The value.
+        """
+        while True:
+            self._next_character()
+            self._position -= 1  # skips whitespace without consuming the start of the value.
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+                if end < len(self._buffer) or self._eof:  # a number at the end of the buffer may continue.
+                    self._position = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._read_more()
+
+    def _expect(self, expected):
+        """
+        Reads the next character and raises an error if it isn't one of the expected characters.
+        :param expected: The characters that are valid.
+        :type expected: str
+        :return: The character.
+        :rtype: str
+        """
+        character = self._next_character()
+        if character not in expected:
+            raise ValueError(f"Expected one of {expected!r} in JSON, but got {character!r}.")
+        return character
+
+    @staticmethod
+    def table_from_dict(table_dict):
+        """
+        Creates a table from a dictionary created by JSONWriter.table_to_dict.
+        :param table_dict: The details of the table.
+        :type table_dict: dict
+        :return: The table.
+        :rtype: Table
+        """
+        shard_key = None
+        if table_dict.get("shard_key"):
+            shard_key = ShardKey(shard_keys=table_dict["shard_key"]["shard_keys"],
+                                 number_shards=table_dict["shard_key"]["number_shards"])
+
+        table = Table(table_name=table_dict["name"],
+                      schema_name=table_dict.get("schema", DatamodelConstants.DEFAULT_SCHEMA),
+                      primary_key=table_dict.get("primary_key"), shard_key=shard_key)
+        table.add_columns([Column(column_name=column["name"], column_type=column["type"])
+                           for column in table_dict["columns"]])
+        for fk in table_dict.get("foreign_keys", []):
+            table.add_foreign_key(ForeignKey(from_table=fk["from_table"], from_keys=fk["from_keys"],
+                                             to_table=fk["to_table"], to_keys=fk["to_keys"], name=fk["name"]))
+        for rel in table_dict.get("relationships", []):
+            table.add_relationship(GenericRelationship(from_table=rel["from_table"], to_table=rel["to_table"],
+                                                       conditions=rel["conditions"], name=rel["name"]))
+        return table
+
+    def read_database(self, filename):
+        """
+        Reads the database from the file.  The keys of the top level object can be in any order.
+        :param filename: The name of the file to read.
+        :type filename: str
+        :return: The database that was read.
+        :rtype: Database
+        """
+        database_name = None
+        tables = []  # only used if the tables come before the database name.
+        database = None
+
+        with open(filename, "r") as json_file:
+            self._file = json_file
+            self._buffer, self._position, self._eof = "", 0, False
+            self._expect("{")
+            character = self._expect('"}')
+            while character != "}":
+                self._position -= 1
+                key = self._next_value()
+                self._expect(":")
+                if key == "tables":
+                    self._expect("[")
+                    character = self._expect("{]")
+                    while character != "]":
+                        self._position -= 1
+                        table = self.table_from_dict(self._next_value())
+                        if database is not None:
+                            database.add_table(table)
+                        else:
+                            tables.append(table)
+                        character = self._expect(",]")
+                        if character == ",":
+                            character = self._expect("{")
+                elif key == "database":
+                    database_name = self._next_value()
+                    database = Database(database_name=database_name)
+                    for table in tables:
+                        database.add_table(table)
+                    tables = None
+                else:
+                    self._next_value()  # ignore keys that aren't part of the model.
+                character = self._expect(",}")
+                if character == ",":
+                    character = self._expect('"')
+            self._file = None
+
+        if database is None:
+            raise ValueError(f"{filename} does not have a database name.")
+        return database
+
+
+# -------------------------------------------------------------------------------------------------------------------
+
+
 class YAMLWorksheetReader:
     """
     Reads ThoughtSpot YAML formats and creates a worksheet.
@@ -1333,6 +2125,8 @@ class YAMLWorksheetReader:
         """
         pass
 
+    WORKSHEET_EXTENSIONS = (".yaml", ".yml", ".tml")
+
     @staticmethod
     def read_from_file(filename) -> Worksheet:
         """
@@ -1342,11 +2136,36 @@ class YAMLWorksheetReader:
         :return: A worksheet object.
         :rtype: Worksheet
         """
-        ws_yaml_str = None
         with open(filename, "r") as yaml_file:
-            ws_yaml_str = " ".join(yaml_file.readlines())
+            ws_yaml = yaml.load(yaml_file, Loader=YAMLLoader)
 
-        return YAMLWorksheetReader.create_worksheet(ws_yaml_str=ws_yaml_str)
+        return YAMLWorksheetReader._create_worksheet_from_yaml(ws_yaml)
+
+    @staticmethod
+    def read_from_directory(directory, processes=None):
+        """
+        Creates worksheets from all of the YAML files (.yaml, .yml and .tml) in a directory.  The files are read by a
+        pool of processes.
+        :param directory: Name of the directory with the files.
+        :type directory: str
+        :param processes: The number of processes to use.  The default is the number of CPUs.  Use 1 to read the
+        files in this process.
+        :type processes: int
+        :return: The worksheets keyed by the path of the file, i.e. the directory joined with the file name, in path
+        order.
+        :rtype: OrderedDict of str:Worksheet
+        """
+        filenames = sorted(path.join(directory, filename) for filename in listdir(directory)
+                           if filename.lower().endswith(YAMLWorksheetReader.WORKSHEET_EXTENSIONS))
+
+        if processes == 1 or len(filenames) < 2:
+            worksheets = map(YAMLWorksheetReader.read_from_file, filenames)
+            return OrderedDict(zip(filenames, worksheets))
+
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            chunksize = max(1, len(filenames) // (4 * (processes or cpu_count() or 1)))
+            worksheets = executor.map(YAMLWorksheetReader.read_from_file, filenames, chunksize=chunksize)
+            return OrderedDict(zip(filenames, worksheets))
 
     @staticmethod
     def create_worksheet(ws_yaml_str) -> Worksheet:
@@ -1357,7 +2176,18 @@ class YAMLWorksheetReader:
         :return: A worksheet based on the YAML.
         :rtype: Worksheet
         """
-        ws_yaml = yaml.safe_load(ws_yaml_str)["worksheet"]
+        return YAMLWorksheetReader._create_worksheet_from_yaml(yaml.load(ws_yaml_str, Loader=YAMLLoader))
+
+    @staticmethod
+    def _create_worksheet_from_yaml(ws_yaml) -> Worksheet:
+        """
+        Creates a worksheet from loaded YAML.
+        :param ws_yaml: The loaded YAML document.
+        :type ws_yaml: dict
+        :return: A worksheet based on the YAML.
+        :rtype: Worksheet
+        """
+        ws_yaml = ws_yaml["worksheet"]
 
         worksheet = Worksheet(name=ws_yaml["name"], description=ws_yaml.get("description", None),
                               properties=ws_yaml["properties"])
@@ -1386,10 +2216,6 @@ class YAMLWorksheetReader:
             pass  # No formulas, so ignore.
 
         for column in ws_yaml["worksheet_columns"]:
-            properties = {}
-            for prop,value in column["properties"].items():
-                properties[prop] = value
-
             is_formula = False
             column_id=column.get("column_id", None)
             if not column_id:
@@ -1399,6 +2225,8 @@ class YAMLWorksheetReader:
 
             worksheet.add_column(
                 WorksheetColumn(name=column["name"], column_id=column_id,
-                                column_properties=properties, is_formula=is_formula))
+                                column_properties=column["properties"], is_formula=is_formula))
+
+        worksheet.resolve_lineage()
 
         return worksheet
@@ -18,7 +18,9 @@ TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR TH
 """
 
 from collections import OrderedDict
-from copy import copy, deepcopy
+from copy import copy
+import re
+import weakref
 
 from .util import eprint
 
@@ -211,6 +213,8 @@ class Table:
     Table for holding columns and relationships.
     """
 
+    _graph_databases = None  # databases with a relationship graph that includes the table.
+
     def __init__(
         self,
         table_name,
@@ -375,6 +379,26 @@ class Table:
             )
             self.foreign_keys[fk.name] = fk
 
+        self._relationships_changed()
+
+    def _relationships_changed(self):
+        """
+        Clears the relationship graphs of the databases the table is in since they no longer match the table.
+        """
+        for database in list(self._graph_databases or []):
+            database._relationship_graph = None
+        self._graph_databases = None
+
+    def __getstate__(self):
+        """
+        Leaves the databases with relationship graphs out when pickling since they are only weakly referenced.
+        :return: The attributes to pickle.
+        :rtype: dict
+        """
+        state = self.__dict__.copy()
+        state.pop("_graph_databases", None)
+        return state
+
     def get_foreign_key(self, fk_name):
         """
         Returns the foreign key with the given name or none.
@@ -425,6 +449,8 @@ class Table:
             )
             self.relationships[rel.name] = rel
 
+        self._relationships_changed()
+
     def get_relationship(self, rel_name):
         """
         Returns the foreign key with the given name or none.
@@ -560,6 +586,17 @@ class Database:
         self.database_name = database_name
         self.tables = OrderedDict()
         self.schemas = {}
+        self._relationship_graph = None
+
+    def __getstate__(self):
+        """
+        Leaves the relationship graph out when pickling.  It's rebuilt when needed.
+        :return: The attributes to pickle.
+        :rtype: dict
+        """
+        state = self.__dict__.copy()
+        state.pop("_relationship_graph", None)
+        return state
 
     def add_table(self, table):
         """
@@ -568,6 +605,7 @@ class Database:
         ":type table: Table
         """
         self.tables[table.table_name] = table
+        self._relationship_graph = None
 
         # increment so that the schema can be deleted.
         nbr_schema = self.schemas.get(table.schema_name, 0)
@@ -616,6 +654,7 @@ class Database:
         """
         table = self.tables.pop(table_name, None)
         if table is not None:
+            self._relationship_graph = None
             schema_name = table.schema_name
             nbr_schema = self.schemas[schema_name]
             nbr_schema -= 1
@@ -634,6 +673,53 @@ class Database:
         """
         return self.schemas.keys()
 
+    def save_snapshot(self, filename):
+        """
+        Writes the database to a binary snapshot file that can be loaded much faster than DDL or Excel.
+        :param filename: The name of the file to write.
+        :type filename: str
+        """
+        from .snapshot import SnapshotWriter  # snapshot depends on the model classes.
+        SnapshotWriter().write_snapshot(self, filename)
+
+    @staticmethod
+    def load_snapshot(filename, lazy=False):
+        """
+        Reads a database from a binary snapshot file written by save_snapshot.
+        :param filename: The name of the file to read.
+        :type filename: str
+        :param lazy: If True, the file is memory mapped and tables are only read when they are used.  This is much
+        faster when only a few tables in a large database are needed.
+        :type lazy: bool
+        :return: The database in the snapshot.
+        :rtype: Database
+        """
+        from .snapshot import SnapshotReader  # snapshot depends on the model classes.
+        if lazy:
+            return SnapshotReader().open_snapshot(filename)
+        return SnapshotReader().read_snapshot(filename)
+
+    def to_json(self, filename):
+        """
+        Writes the database to a JSON file one table at a time.  The file can also be read as YAML.
+        :param filename: The name of the file to write or '-' for stdout.
+        :type filename: str
+        """
+        from .io import JSONWriter  # io depends on the model classes.
+        JSONWriter().write_database(self, filename)
+
+    @staticmethod
+    def from_json(filename):
+        """
+        Reads a database from a JSON file written by to_json.  Tables are decoded as the file is read.
+        :param filename: The name of the file to read.
+        :type filename: str
+        :return: The database in the file.
+        :rtype: Database
+        """
+        from .io import JSONReader  # io depends on the model classes.
+        return JSONReader().read_database(filename)
+
     def validate(self):
         """
         Validates that the model does not contain any errors.
@@ -642,6 +728,24 @@ class Database:
         """
         return DatabaseValidator(self).validate()
 
+    def get_relationship_graph(self):
+        """
+        Returns the graph of relationships between the tables.  The graph is built the first time it's needed and then
+        shared until a table is added or dropped or a foreign key or relationship is added.
+        :return: The relationship graph for the database.
+        :rtype: RelationshipGraph
+        """
+        graph = getattr(self, "_relationship_graph", None)  # databases from older pickles don't have the attribute.
+        if graph is None:
+            from .graph import RelationshipGraph  # graph depends on the model classes.
+            graph = RelationshipGraph(self)
+            for table in self:  # so adding a foreign key or relationship to any of the tables clears the graph.
+                if table._graph_databases is None:
+                    table._graph_databases = weakref.WeakSet()
+                table._graph_databases.add(self)
+            self._relationship_graph = graph
+        return graph
+
     def get_number_relationships_from_table(self, table_name):
         """
         Returns the number of foreign keys and generic relationships from a given table.
@@ -650,10 +754,9 @@ class Database:
         :return: The number of foreign keys and relationships from a given table.
         :rtype: int
         """
-        table = self.get_table(table_name=table_name)
-        if table:
-            return len(table.foreign_keys.values()) + len(table.relationships.values())
-        raise ValueError(f"Unkonwn table {table_name}")
+        if table_name not in self.tables:
+            raise ValueError(f"Unkonwn table {table_name}")
+        return self.get_relationship_graph().number_from[table_name]
 
     def get_number_relationships_to_table(self, table_name):
         """
@@ -663,19 +766,9 @@ class Database:
         :return: The number of foreign keys to a given table.
         :rtype: int
         """
-        if not table_name in self.get_table_names():
+        if table_name not in self.tables:
             raise ValueError(f"Unkonwn table {table_name}")
-
-        number_relationships = 0
-        for table in self.tables.values():
-            for fk in table.foreign_keys.values():
-                if fk.to_table == table_name:
-                    number_relationships += 1
-            for rel in table.relationships.values():
-                if rel.to_table == table_name:
-                    number_relationships += 1
-
-        return number_relationships
+        return self.get_relationship_graph().number_to[table_name]
 
 # -------------------------------------------------------------------------------------------------------------------
 
@@ -995,6 +1088,15 @@ class WorksheetFormula:
         self.expression = expression
         self.formula_id = formula_id
 
+    def get_references(self):
+        """
+        Returns the references in the expression, e.g. "table1_1::column_1" for [table1_1::column_1].  References with
+        "::" are to columns in a table path.  Others are to other formulas.
+        :return: The references in the order they appear.
+        :rtype: list of str
+        """
+        return re.findall(r"\[([^\]]+)\]", self.expression)
+
 
 class WorksheetColumn:
     """Represents a column in a worksheet."""
@@ -1019,15 +1121,18 @@ class WorksheetColumn:
         self.column_properties = copy(column_properties)
         self.is_formula = is_formula
 
+        # the column ID is <path>::<source column> for columns, so split it once.
+        self._path, self._source = None, None
+        if not is_formula and column_id:
+            self._path, _, self._source = column_id.partition("::")
+
     def get_path(self):
         """
         Returns the path to the column.  Only valid for columns and not formulas.
         :return: The path to the column.
         :rtype: [str | None]
         """
-        if not self.is_formula:
-            return self.column_id.split("::")[0]
-        return None
+        return self._path
 
     def get_source(self):
         """
@@ -1035,9 +1140,7 @@ class WorksheetColumn:
         :return: The path to the column.
         :rtype: [str | None]
         """
-        if not self.is_formula:
-            return self.column_id.split("::")[1]
-        return None
+        return self._source
 
     def get_property(self, property_name):
         """
@@ -1052,7 +1155,10 @@ class WorksheetColumn:
 
 
 class Worksheet:
-    """Represents a worksheet."""
+    """
+    Represents a worksheet.  The worksheet keeps the tables, joins, etc. that are added to it rather than copies, so
+    they shouldn't be changed or added to another worksheet after they are added.
+    """
 
     def __init__(self, name, description, properties):
         """
@@ -1076,6 +1182,17 @@ class Worksheet:
         self._formulas = []
         self._columns = []
 
+        # indexes by name.  If names are repeated, the first one added is used.
+        self._tables_by_name = {}
+        self._joins_by_name = {}
+        self._columns_by_name = {}
+        self._table_paths_by_id = {}
+        self._formulas_by_id = {}
+        self._formulas_by_name = {}  # formula columns and expressions can use the name if there isn't an ID.
+
+        self._join_graph = {}  # table name: joins to and from the table.
+        self._column_tables = None  # column name: tables the column uses.  Created when needed.
+
     def add_table(self, table):
         """
         Adds a table to the worksheet.
@@ -1084,7 +1201,8 @@ class Worksheet:
         :return: None
         """
         assert table
-        self._tables.append(deepcopy(table))
+        self._tables.append(table)
+        self._tables_by_name.setdefault(table.table_name, table)
 
     def get_tables(self):
         """
@@ -1103,10 +1221,7 @@ class Worksheet:
         :rtype: WorksheetTable | None
         """
         assert table_name
-        for t in self._tables:
-            if t.table_name == table_name:
-                return t
-        return None
+        return self._tables_by_name.get(table_name, None)
 
     def add_join(self, join):
         """
@@ -1116,7 +1231,12 @@ class Worksheet:
         :return: None
         """
         assert join
-        self._joins.append(deepcopy(join))
+        self._joins.append(join)
+        self._joins_by_name.setdefault(join.name, join)
+        self._join_graph.setdefault(join.source, []).append(join)
+        if join.destination != join.source:
+            self._join_graph.setdefault(join.destination, []).append(join)
+        self._column_tables = None
 
     def get_joins(self):
         """
@@ -1126,6 +1246,16 @@ class Worksheet:
         """
         return self._joins
 
+    def get_join(self, join_name):
+        """
+        Returns the join with the given name.
+        :param join_name: The name of the join to return.
+        :type join_name: str
+        :return: The worksheet join with the given name.
+        :rtype: WorksheetJoin | None
+        """
+        return self._joins_by_name.get(join_name, None)
+
     def add_table_path(self, table_path):
         """
         Adds a table path to the worksheet.
@@ -1134,7 +1264,9 @@ class Worksheet:
         :return: None
         """
         assert table_path
-        self._table_paths.append(deepcopy(table_path))
+        self._table_paths.append(table_path)
+        self._table_paths_by_id.setdefault(table_path.path_id, table_path)
+        self._column_tables = None
 
     def add_formula(self, formula):
         """
@@ -1144,7 +1276,11 @@ class Worksheet:
         :return: None
         """
         assert formula
-        self._formulas.append(deepcopy(formula))
+        self._formulas.append(formula)
+        if formula.formula_id:
+            self._formulas_by_id.setdefault(formula.formula_id, formula)
+        self._formulas_by_name.setdefault(formula.name, formula)
+        self._column_tables = None
 
     def add_column(self, column):
         """
@@ -1154,4 +1290,156 @@ class Worksheet:
         :return: None
         """
         assert column
-        self._columns.append(deepcopy(column))
+        self._columns.append(column)
+        self._columns_by_name.setdefault(column.name, column)
+        self._column_tables = None
+
+    def get_columns(self):
+        """
+        Returns the columns for this worksheet.
+        :return: The list of columns or an empty list.
+        :rtype: list of WorksheetColumn
+        """
+        return self._columns
+
+    def get_column(self, column_name):
+        """
+        Returns the column with the given name.
+        :param column_name: The name of the column to return.
+        :type column_name: str
+        :return: The worksheet column with the given name.
+        :rtype: WorksheetColumn | None
+        """
+        return self._columns_by_name.get(column_name, None)
+
+    def get_table_path(self, path_id):
+        """
+        Returns the table path with the given ID.
+        :param path_id: The ID of the table path, e.g. table1_1.
+        :type path_id: str
+        :return: The table path with the given ID.
+        :rtype: WorksheetTablePath | None
+        """
+        return self._table_paths_by_id.get(path_id, None)
+
+    def get_joins_for_table(self, table_name):
+        """
+        Returns the joins from and to a table.
+        :param table_name: The name of the table.
+        :type table_name: str
+        :return: The joins where the table is the source or destination.
+        :rtype: list of WorksheetJoin
+        """
+        return self._join_graph.get(table_name, [])
+
+    def _get_path_tables(self, path_id):
+        """
+        Returns the tables used by a table path, i.e. the table for the path and the tables for the joins in it.
+        :param path_id: The ID of the table path.
+        :type path_id: str
+        :return: The names of the tables.
+        :rtype: set of str
+        """
+        table_path = self._table_paths_by_id.get(path_id, None)
+        if table_path is None:
+            return set()
+
+        tables = {table_path.table}
+        for join_name in table_path.join_paths:
+            join = self._joins_by_name.get(join_name, None)
+            if join is not None:
+                tables.add(join.source)
+                tables.add(join.destination)
+        return tables
+
+    def _get_formula(self, reference):
+        """
+        Returns the formula for a reference.  IDs are checked before names, since formulas are normally referred to
+        by ID.
+        :param reference: The ID or name of the formula.
+        :type reference: str
+        :return: The formula or None if there isn't one.
+        :rtype: WorksheetFormula | None
+        """
+        formula = self._formulas_by_id.get(reference, None)
+        return formula if formula is not None else self._formulas_by_name.get(reference, None)
+
+    def _get_formula_tables(self, formula, path_tables, formula_tables, active):
+        """
+        Returns the tables used by a formula, including the tables used by any formulas it refers to.  Formulas that
+        refer to each other use the same tables, so they are only stored once the whole cycle is resolved (Tarjan's
+        strongly connected components).
+        :param formula: The formula.
+        :type formula: WorksheetFormula
+        :param path_tables: The tables for each table path.
+        :type path_tables: dict of str:frozenset
+        :param formula_tables: The tables for the formulas that are resolved.
+        :type formula_tables: dict of WorksheetFormula:frozenset
+        :param active: The formulas being resolved with the order they were started in.
+        :type active: OrderedDict of WorksheetFormula:int
+        :return: The tables found for the formula and the earliest active formula it refers to.
+        :rtype: (frozenset of str, int)
+        """
+        tables = formula_tables.get(formula, None)
+        if tables is not None:
+            return tables, len(active)  # resolved formulas aren't part of an active cycle.
+        if formula in active:
+            return frozenset(), active[formula]  # the tables are added when the cycle is resolved.
+
+        position = active[formula] = len(active)
+        earliest = position
+        tables = set()
+        for reference in formula.get_references():
+            path_id, separator, _ = reference.partition("::")
+            if separator:
+                tables.update(path_tables.get(path_id, ()))
+                continue
+
+            referenced = self._get_formula(reference)
+            if referenced is not None:
+                referenced_tables, referenced_earliest = self._get_formula_tables(referenced, path_tables,
+                                                                                  formula_tables, active)
+                tables.update(referenced_tables)
+                earliest = min(earliest, referenced_earliest)
+
+        tables = frozenset(tables)
+        if earliest == position:
+            # the formula started the cycle, so the tables are complete for all of the formulas in it.
+            for member in list(active.keys())[position:]:
+                del active[member]
+                formula_tables[member] = tables
+        return tables, earliest
+
+    def resolve_lineage(self):
+        """
+        Finds the tables used by each column.  Columns use the tables in their table path and formulas use the tables
+        of the columns and formulas in the expression.  This is done when needed, but can be called once the worksheet
+        is complete so that get_column_tables doesn't need to.
+        """
+        path_tables = {path_id: frozenset(self._get_path_tables(path_id)) for path_id in self._table_paths_by_id}
+        formula_tables = {}
+        active = OrderedDict()
+
+        column_tables = {}
+        for column in self._columns:
+            if column.is_formula:
+                formula = self._get_formula(column.column_id)
+                tables = self._get_formula_tables(formula, path_tables, formula_tables, active)[0] if formula \
+                    else frozenset()
+            else:
+                tables = path_tables.get(column.get_path(), frozenset())
+            column_tables.setdefault(column.name, tables)
+
+        self._column_tables = column_tables
+
+    def get_column_tables(self, column_name):
+        """
+        Returns the base tables used by a worksheet column.
+        :param column_name: The name of the worksheet column.
+        :type column_name: str
+        :return: The names of the tables the column uses.  Empty if the column isn't in the worksheet.
+        :rtype: frozenset of str
+        """
+        if self._column_tables is None:
+            self.resolve_lineage()
+        return self._column_tables.get(column_name, frozenset())
@@ -0,0 +1,207 @@
+"""
+Contains the class for caching the results of the data queries for reviews between runs.
+
+Copyright 2020 ThoughtSpot
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions
+of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+import pickle
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from dt.util import eprint
+
+# -------------------------------------------------------------------------------------------------------------------
+
+
+class CachedTQL:
+    """
+    Wraps a remote TQL and keeps the results of data queries in a file between runs.  Each result is stored with a
+    freshness token made from the row counts in "show statistics for server" for the tables in the query, so results
+    are only reused when none of the tables have been loaded since.  Entries also expire after a time to live, and the
+    least recently used entries are dropped when there are too many.
+    """
+
+    CACHE_VERSION = 1
+    DEFAULT_TTL = 86400  # seconds
+    DEFAULT_MAX_ENTRIES = 10000
+
+    STATISTICS_QUERY = "show statistics for server;"
+    TABLE_PATTERN = re.compile(r'"([^"]+)"\."([^"]+)"\."([^"]+)"')  # db.schema.table, which starts column names too.
+
+    def __init__(self, rtql, filename, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        """
+        Creates a new cache and loads any results already in the file.
+        :param rtql: The remote TQL to run queries that aren't in the cache.
+        :type rtql: RemoteTQL
+        :param filename: The file the results are kept in.
+        :type filename: str
+        :param ttl: The number of seconds results are kept.
+        :type ttl: float
+        :param max_entries: The most results to keep.
+        :type max_entries: int
+        """
+        self.rtql = rtql
+        self.filename = filename
+        self.ttl = float(ttl)
+        self.max_entries = int(max_entries)
+        self.entries = OrderedDict()  # query: (token, time, results) from least to most recently used.
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.RLock()  # queries are run from the executor's threads.
+        self._statistics = None
+        self._row_counts = None
+        self.load()
+
+    @staticmethod
+    def from_config(rtql, config_file):
+        """
+        Wraps the remote TQL in a cache if the configuration has a query_cache_file.
+        :param rtql: The remote TQL to wrap.
+        :type rtql: RemoteTQL
+        :param config_file: The configuration with query_cache_file, query_cache_ttl, and query_cache_size.
+        :type config_file: ConfigFile
+        :return: The cache or the remote TQL if caching isn't configured.
+        :rtype: CachedTQL | RemoteTQL
+        """
+        filename = config_file.get("query_cache_file", default=None)
+        if not rtql or not filename:
+            return rtql
+        return CachedTQL(rtql=rtql, filename=filename,
+                         ttl=config_file.get("query_cache_ttl", default=CachedTQL.DEFAULT_TTL),
+                         max_entries=config_file.get("query_cache_size", default=CachedTQL.DEFAULT_MAX_ENTRIES))
+
+    def __getattr__(self, name):
+        """
+        Passes everything other than queries through to the remote TQL, e.g. run_tql_command.
+        """
+        return getattr(self.rtql, name)
+
+    def load(self):
+        """
+        Loads the results from the cache file.  A missing or unreadable file is the same as an empty cache.
+        :return: True if the cache was loaded.
+        :rtype: bool
+        """
+        try:
+            with open(self.filename, "rb") as cache_file:
+                cache = pickle.load(cache_file)
+        except FileNotFoundError:
+            return False
+        except (IOError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as ex:
+            eprint(f"Unable to read query cache {self.filename}: {ex}")
+            return False
+
+        if cache.get("version", None) != CachedTQL.CACHE_VERSION:
+            eprint(f"Ignoring query cache {self.filename} for a different version.")
+            return False
+
+        self.entries = cache["entries"]
+        self._evict()
+        return True
+
+    def save(self):
+        """
+        Writes the results that haven't expired to the cache file.
+        """
+        with self._lock:
+            self._evict()
+            cache = {"version": CachedTQL.CACHE_VERSION, "entries": self.entries}
+            try:
+                with open(self.filename, "wb") as cache_file:
+                    pickle.dump(cache, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+            except (IOError, pickle.PicklingError, TypeError, AttributeError) as ex:
+                eprint(f"Unable to write query cache {self.filename}: {ex}")
+
+    def _evict(self):
+        """
+        Drops expired results and then the least recently used until there are at most max_entries.
+        """
+        now = time.time()
+        for query in [query for query, (_, stored, _) in self.entries.items() if now - stored > self.ttl]:
+            del self.entries[query]
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get_statistics(self):
+        """
+        Returns the results of "show statistics for server".  It's only run once, so the sharding review and the
+        freshness tokens use the same results.
+        :return: The statistics results.
+        """
+        with self._lock:
+            if self._statistics is None:
+                statistics = self.rtql.execute_tql_query(query=CachedTQL.STATISTICS_QUERY)
+                row_counts = {}
+                for row in statistics:
+                    table = (row.get_column("Database Name"), row.get_column("Schema Name"),
+                             row.get_column("Table Name"))
+                    row_counts[table] = row.get_column("Total Row Count")
+                self._row_counts = row_counts
+                self._statistics = statistics
+            return self._statistics
+
+    def get_token(self, query):
+        """
+        Returns the freshness token for a query, which is the row count of each table in the query.
+        :param query: The query to get the token for.
+        :type query: str
+        :return: The token or None if any of the tables aren't in the statistics, in which case the query isn't cached.
+        :rtype: tuple | None
+        """
+        with self._lock:
+            if self._row_counts is None:
+                try:
+                    self.get_statistics()
+                except Exception as ex:
+                    eprint(f"Unable to get statistics, so query results won't be cached: {ex}")
+                    self._row_counts = {}  # no tables, so every token is None and queries run as usual.
+        tables = sorted(set(CachedTQL.TABLE_PATTERN.findall(query)))
+        if not tables:
+            return None
+        token = tuple((table, self._row_counts.get(table, None)) for table in tables)
+        if any(row_count is None for _, row_count in token):
+            return None
+        return token
+
+    def execute_tql_query(self, query):
+        """
+        Returns the results of the query from the cache if the tables haven't changed, otherwise runs the query.
+        :param query: The query to run.
+        :type query: str
+        :return: The results of the query.
+        """
+        if query.strip().lower() == CachedTQL.STATISTICS_QUERY:
+            return self.get_statistics()
+
+        with self._lock:
+            token = self.get_token(query)
+            entry = self.entries.get(query, None)
+            if token is not None and entry is not None and entry[0] == token and time.time() - entry[1] <= self.ttl:
+                self.entries.move_to_end(query)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        results = self.rtql.execute_tql_query(query=query)
+        if token is not None:
+            with self._lock:
+                self.entries[query] = (token, time.time(), results)
+                self.entries.move_to_end(query)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return results
@@ -0,0 +1,195 @@
+"""
+Contains the class for running the data queries for reviews concurrently.
+
+Copyright 2020 ThoughtSpot
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions
+of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+import threading
+import time
+from collections import deque
+
+# -------------------------------------------------------------------------------------------------------------------
+
+
+class QueryTimeoutError(Exception):
+    """
+    Returned in place of the results of a query that didn't finish in time.
+    """
+
+    def __init__(self, query, timeout):
+        """
+        Creates a new timeout error.
+        :param query: The query that timed out.
+        :type query: str
+        :param timeout: The number of seconds waited.
+        :type timeout: float
+        """
+        super().__init__(f"Query didn't finish in {timeout} seconds: {query}")
+        self.query = query
+        self.timeout = timeout
+
+
+class QueryNotRunError(Exception):
+    """
+    Returned in place of the results of a query that wasn't run because every thread was still busy with queries that
+    timed out.
+    """
+
+    def __init__(self, query):
+        """
+        Creates a new error for a query that wasn't run.
+        :param query: The query that wasn't run.
+        :type query: str
+        """
+        super().__init__(f"Query wasn't run because earlier queries timed out: {query}")
+        self.query = query
+
+
+class QueryExecutor:
+    """
+    Runs TQL queries on a pool of threads.  Most of the time for the data reviews is spent waiting on the cluster, so
+    running a few queries at once cuts the time without much more load.  Results are returned in the same order as
+    the queries.  The remote TQL is used from all of the threads, so it must be thread safe.  RemoteTQLTransport opens
+    a connection for each thread and the local transports lock around their state.
+    """
+
+    DEFAULT_MAX_WORKERS = 4
+    DEFAULT_TIMEOUT = 600  # seconds
+
+    def __init__(self, rtql, max_workers=DEFAULT_MAX_WORKERS, timeout=DEFAULT_TIMEOUT):
+        """
+        Creates a new executor.
+        :param rtql: The transport to run the queries with.  It's shared by all of the threads.
+        :type rtql: TQLTransport
+        :param max_workers: The most queries to run at once.  1 runs the queries one after another.
+        :type max_workers: int
+        :param timeout: The number of seconds to wait for each result or None to wait forever.
+        :type timeout: float | None
+        """
+        self.rtql = rtql
+        self.max_workers = max(1, int(max_workers))
+        self.timeout = float(timeout) if timeout else None
+        self._abandoned = 0  # threads still running queries that timed out, which count against max_workers.
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def from_config(rtql, config_file):
+        """
+        Creates an executor using the max_query_workers and query_timeout values in the configuration.
+        :param rtql: The remote TQL to run the queries with.
+        :type rtql: RemoteTQL
+        :param config_file: The configuration file with settings to use.
+        :type config_file: ConfigFile
+        :return: A new executor.
+        :rtype: QueryExecutor
+        """
+        max_workers = config_file.get("max_query_workers", default=QueryExecutor.DEFAULT_MAX_WORKERS)
+        timeout = config_file.get("query_timeout", default=QueryExecutor.DEFAULT_TIMEOUT)
+        return QueryExecutor(rtql=rtql, max_workers=max_workers, timeout=timeout)
+
+    def execute_query(self, query):
+        """
+        Runs a single query on the calling thread.
+        :param query: The query to run.
+        :type query: str
+        :return: The results of the query.
+        """
+        return self.rtql.execute_tql_query(query=query)
+
+    def execute_queries(self, queries):
+        """
+        Runs the queries and returns the results in the same order.  A query that fails or doesn't finish in time has
+        the exception in place of the results so one bad query doesn't stop the others.  The timeout starts when each
+        query starts running, so queries waiting for a thread are never timed out.  A query that times out can't be
+        stopped, so its thread keeps running it in the background and its results are ignored.  The thread still
+        counts against max_workers, so no more than max_workers queries ever run at once.  If every thread is stuck
+        on a query that timed out for another timeout, the waiting queries get a QueryNotRunError.  The threads are
+        daemons, so a query that never returns doesn't stop the program from exiting.
+        :param queries: The queries to run.
+        :type queries: list of str
+        :return: The results or exception for each query.
+        :rtype: list
+        """
+        queries = list(queries)
+        if not queries:
+            return []
+
+        waiting = deque(enumerate(queries))
+        results = [None] * len(queries)
+        finished = [False] * len(queries)
+        running = {}  # position: time the query started for the queries that are running and haven't timed out.
+        condition = threading.Condition()
+
+        def run_queries():
+            """Runs waiting queries until there aren't any."""
+            while True:
+                with condition:
+                    if not waiting:
+                        return
+                    position, query = waiting.popleft()
+                    running[position] = time.monotonic()
+                    condition.notify()  # so the timeout for the query is checked.
+                try:
+                    result = self.execute_query(query)
+                except Exception as ex:
+                    result = ex
+                with condition:
+                    if finished[position]:  # timed out, so the thread is free again.
+                        with self._lock:
+                            self._abandoned -= 1
+                    else:
+                        del running[position]
+                        results[position] = result
+                        finished[position] = True
+                    condition.notify()
+
+        with self._lock:
+            number_threads = min(len(queries), self.max_workers - self._abandoned)
+        for _ in range(number_threads):
+            threading.Thread(target=run_queries, daemon=True).start()
+
+        stalled = None  # when every thread was last found stuck on queries that timed out.
+        with condition:
+            while True:
+                now = time.monotonic()
+                deadlines = []
+                if self.timeout is not None:
+                    for position, started in list(running.items()):
+                        if now - started >= self.timeout:
+                            del running[position]
+                            results[position] = QueryTimeoutError(query=queries[position], timeout=self.timeout)
+                            finished[position] = True
+                            with self._lock:
+                                self._abandoned += 1
+
+                    if running or not waiting:
+                        stalled = None
+                    elif stalled is None:
+                        stalled = now
+                    elif now - stalled >= self.timeout:
+                        while waiting:
+                            position, query = waiting.popleft()
+                            results[position] = QueryNotRunError(query=query)
+                            finished[position] = True
+
+                    deadlines = [started + self.timeout for started in running.values()]
+                    if stalled is not None:
+                        deadlines.append(stalled + self.timeout)
+
+                if all(finished):
+                    break
+                condition.wait(timeout=min(deadlines) - now if deadlines else None)
+
+        return results
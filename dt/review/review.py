@@ -22,8 +22,9 @@ import sys
 
 from dt.model import Database, Worksheet
 from dt.util import ConfigFile
-from pytql.tql import RemoteTQL
 
+from .query_cache import CachedTQL
+from .transport import RecordingTransport
 from .review_tests import *
 
 
@@ -63,6 +64,33 @@ class DataModelReviewer:
 
         assert database  # A database is the minimum for testing.
 
+        recording = rtql if isinstance(rtql, RecordingTransport) else None
+        if recording:  # cache under the recording so results read from the cache are recorded too.
+            cache = recording.transport = CachedTQL.from_config(rtql=recording.transport, config_file=self.config)
+        else:
+            cache = rtql = CachedTQL.from_config(rtql=rtql, config_file=self.config)
+        try:
+            return self._review_model(database=database, test_names=test_names, worksheet=worksheet, rtql=rtql)
+        finally:
+            if isinstance(cache, CachedTQL):
+                print(f"query cache: {cache.hits} hits and {cache.misses} misses")
+                cache.save()
+                if recording:
+                    recording.transport = cache.rtql
+
+    def _review_model(self, database, test_names, worksheet, rtql):
+        """
+        Runs the reviews for review_model.
+        :param database: The database to evaluate.
+        :type database: Database
+        :param List[str] test_names: List of test names to run.  If none provided, all possible tests are run.
+        :param worksheet: A specific worksheet to evaluate.
+        :type worksheet: Worksheet
+        :param rtql: A remote TQL reference for making data queries, possibly wrapped in a cache.
+        :type rtql: RemoteTQL
+        :return: Dictionary with test and list of recommendations.  Could be empty.
+        :rtype: dict
+        """
         recommendations = {}
 
         # Get the review items for databases.
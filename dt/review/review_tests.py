@@ -1,13 +1,12 @@
 import locale
 import re
 
-from typing import List
-from collections import namedtuple
-
-from pytql.tql import RemoteTQL
+from typing import List, Optional
+from collections import namedtuple, OrderedDict
 
 from dt.model import Database, Worksheet, Table
 from dt.util import eprint, ConfigFile
+from dt.review.query_executor import QueryExecutor
 
 locale.setlocale(locale.LC_ALL, '')
 
@@ -40,24 +39,13 @@ The functions should return a list of recommendations from the test as a list of
 
 def get_relationships(database):
     """
-    Creates a relationship mapping of tables to related tables (without keys).
-    :param database: The database to create the mapping for.
+    Returns the relationship mapping of tables to related tables (without keys) from the database's relationship graph.
+    :param database: The database to get the mapping for.
     :type database: Database
-    :return: A dictionary that has a table to related tables list.
+    :return: A dictionary that has a table to related tables list.  Shared with the graph, so don't modify it.
     :rtype: dict of list of str
     """
-    table_relationship_map = {}
-    for table in database.tables.values():
-        related_tables = set()
-        for foreign_key in table.foreign_keys.values():
-            related_tables.add(foreign_key.to_table)
-        table_relationship_map[table.table_name] = list(related_tables)
-
-        for relationship in table.relationships.values():
-            related_tables.add(relationship.to_table)
-        table_relationship_map[table.table_name] = list(related_tables)
-
-    return table_relationship_map
+    return database.get_relationship_graph().adjacency
 
 
 def review_relationships(database):
@@ -103,71 +91,35 @@ def relates_to_previous(table_relationship_map, table_from_name, table_to_name):
 
 def review_circular_relationships(database):
     """
-    Reviewing the database for circular or self referencing relationships.
+    Reviewing the database for circular or self referencing relationships.  Each circle is reported once with all of
+    the tables in it.
     :param database: The database to review.
     :type database: Database
     :return: A list of recommendations.
     :rtype: list of str
-    TODO optimize the search to avoid checking the same thing.
     """
     print(f"reviewing circular relationships for {database.database_name} database")
 
     issues = []
 
-    # dictionary of all tables and a set of all tables they are related to.
-    table_relationships = {}
-    for table in database:
-        table_relationships[table.table_name] = set(table.get_all_related_tables())
-
-    # Run through each table and add the related tables from the ones already related.
-    # If the new set contains the original table, then there is a circular reference.  If the list doesn't get
-    # any bigger, then the search is complete and go to the next table.
-    for table_name in table_relationships:
-        relationships = table_relationships[table_name]
-        done = False
-        while not done:
-            number_relationships_before = len(relationships)
-            new_related_tables = set(relationships)
-            for related_table in relationships:
-                for rt in table_relationships[related_table]:
-                    new_related_tables.add(rt)
-            relationships = new_related_tables
-            if table_name in relationships:  # circled back around to this one.
-                issues.append(f"{table_name} has circular relationship back to itself.")
-                done = True
-            elif len(relationships) == number_relationships_before:  # no more tables added.
-                done = True
+    graph = database.get_relationship_graph()
+    table_order = {table_name: position for position, table_name in enumerate(graph.adjacency)}
 
-    return issues
-
-
-def get_related_paths(table_relationship_map, table_path):
-    """
-    Gets a list of lists that show all paths from the original list.  Each call creates new lists to represent the
-    paths from the table based on the new table.
-    :param table_relationship_map: Map of tables to direct relationships.
-    :type table_relationship_map: dict of list of str
-    :param table_path: The current path being added to.
-    :type table_path: list of str
-    :return: List of lists to represent each path.  First is the original table, last is the final table.
-    :rtype: list of list of str
-    """
+    components = [sorted(component, key=lambda name: table_order.get(name, len(table_order)))
+                  for component in graph.get_cycles()]
+    components.sort(key=lambda c: table_order.get(c[0], len(table_order)))  # report in the order of the tables.
 
-    paths = []
-    # get the last tables and start adding from there.
-    last_table = table_path[-1]
-    for related_table_name in table_relationship_map[last_table]:
-        if related_table_name not in table_path:  # avoid circular references to infinity.
-            new_path = table_path + [related_table_name]
-            paths.append(new_path)
-            added_paths = get_related_paths(table_relationship_map=table_relationship_map, table_path=new_path)
-            if added_paths:
-                paths.extend([p for p in added_paths])
+    for component in components:
+        if len(component) > 1:
+            issues.append(f"{', '.join(component)} have circular relationships with each other.")
+        else:
+            issues.append(f"{component[0]} has circular relationship back to itself.")
 
-    return paths
+    return issues
 
 
 MAX_REFERENCE_CHAIN = 3
+MAX_LONG_CHAINS = 1000
 
 
 def review_long_chain_relationships(database, config_file):
@@ -175,7 +127,8 @@ def review_long_chain_relationships(database, config_file):
     Reviewing the database for the relationships that span multiple tables in between.
     :param database: The database to review.
     :type database: Database
-    :param config_file: Configuration file for the max OK length.  Key: max_reference_chain, default=3
+    :param config_file: Configuration file for the max OK length and the number of chains to report.
+    Keys: max_reference_chain, default=3, and max_long_chains, default=1000
     :type config_file: ConfigFile
     :return: A list of recommendations.
     :rtype: list of str
@@ -183,17 +136,16 @@ def review_long_chain_relationships(database, config_file):
     print(f"reviewing long chain (> 2) relationships for {database.database_name} database")
     issues = []
 
-    table_relationship_map = get_relationships(database=database)
-    table_paths = []
-    for table_name in table_relationship_map.keys():
-        added_paths = get_related_paths(table_relationship_map=table_relationship_map, table_path=[table_name])
-        if added_paths:
-            table_paths.extend([p for p in added_paths])
+    max_reference_chain = int(config_file.get("max_reference_chain", default=MAX_REFERENCE_CHAIN))
+    max_long_chains = int(config_file.get("max_long_chains", default=MAX_LONG_CHAINS))
 
-    max_reference_chain = config_file.get("max_reference_chain", default=MAX_REFERENCE_CHAIN)
-    for path in table_paths:
-        if len(path) - 1 > max_reference_chain:
-            issues.append(f"Long path ({len(path)}):  {path}.")
+    # one more chain than is reported is found to know if there are more.
+    chains = database.get_relationship_graph().get_long_chains(max_reference_chain=max_reference_chain,
+                                                               max_chains=max_long_chains + 1)
+    for path in chains[:max_long_chains]:
+        issues.append(f"Long path ({len(path)}):  {path}.")
+    if len(chains) > max_long_chains:
+        issues.append(f"Stopped after {max_long_chains} long paths.  There may be more.")
 
     return issues
 
@@ -287,12 +239,13 @@ QueryParts = namedtuple('QueryParts',
                          'join_condition'])
 
 
-def review_table_joins(database, rtql) -> List[str]:
+def review_table_joins(database, rtql, config_file) -> List[str]:
     """
     Reviews the joins within a given database for cardinality and direction.  This will not work for joins across
     databases.
     :param Database database:
     :param RemoteTQL rtql:
+    :param ConfigFile config_file: Configuration with max_query_workers and query_timeout for running the queries.
     """
     print(f'reviewing table joins for the "{database.database_name}" database')
     issues = []
@@ -304,10 +257,9 @@ def review_table_joins(database, rtql) -> List[str]:
     # look at results for 1:M scenarios (should be M:1)
     # TODO look for JOIN type and see if it should be changed. (future versions 6.3+)
 
+    # create a list of table to table and join on conditions.
+    joins_to_test = []
     for from_table in database:
-        # create a list of table to table and join on conditions.
-        joins_to_test = []
-
         # get the foreign keys and determine the join parts.
         for fk in from_table.foreign_keys.values():
             joins_to_test.append(get_fk_join_parts(database, from_table, fk))
@@ -316,27 +268,32 @@ def review_table_joins(database, rtql) -> List[str]:
         for rel in from_table.relationships.values():
             joins_to_test.append(get_rel_join_parts(database=database, from_table=from_table, rel=rel))
 
-        # for each set of joins, there are two queries to run.  select the primary keys in the first table and the
-        # count of rows in the second table.  If the count in the second table is 1, then the relationship is ?:1.
-        # if the count is > 1, then the relationship is ?:M.  Do this from both tables to determine the overall
-        # relationship.
-
-        for query_parts in joins_to_test:  # have all joins from this table, so test them.
-            print(f'-- comparing {query_parts.name} between {query_parts.from_table} and {query_parts.to_table}')
-            query = get_to_table_cardinality_query(join_parts=query_parts)
-            count_to = query_for_cardinality(rtql=rtql, query=query)
-
-            query = get_from_table_cardinality_query(join_parts=query_parts)
-            count_from = query_for_cardinality(rtql=rtql, query=query)
-
-            if count_from <= 0 or count_to <= 0:
-                issues.append(f'{query_parts.name} didn\'t return data.')
-            elif count_to > 1:  # 1:M or M:M
-                if count_from == 1:
-                    issues.append(f'{query_parts.name} is a 1:M join.')
-                else:
-                    issues.append(f'{query_parts.name} is a M:M join.')
-            # other joins are 1:1 or M:1, which are OK.
+    # for each set of joins, there are two queries to run.  select the primary keys in the first table and the
+    # count of rows in the second table.  If the count in the second table is 1, then the relationship is ?:1.
+    # if the count is > 1, then the relationship is ?:M.  Do this from both tables to determine the overall
+    # relationship.  All of the queries are run together and the results come back in the same order.
+    executor = QueryExecutor.from_config(rtql=rtql, config_file=config_file)
+    batch_size = int(config_file.get("cardinality_batch_size", default=CARDINALITY_BATCH_SIZE))
+    sample_size = int(config_file.get("join_sample_size", default=JOIN_SAMPLE_SIZE))
+    if sample_size > 0:
+        counts = get_sampled_join_cardinalities(database=database, executor=executor, joins_to_test=joins_to_test,
+                                                sample_size=sample_size, batch_size=batch_size)
+    else:
+        counts = get_join_cardinalities(executor=executor, joins_to_test=joins_to_test, batch_size=batch_size)
+
+    for cnt, query_parts in enumerate(joins_to_test):
+        print(f'-- comparing {query_parts.name} between {query_parts.from_table} and {query_parts.to_table}')
+        count_to = counts[2 * cnt]
+        count_from = counts[2 * cnt + 1]
+
+        if count_from <= 0 or count_to <= 0:
+            issues.append(f'{query_parts.name} didn\'t return data.')
+        elif count_to > 1:  # 1:M or M:M
+            if count_from == 1:
+                issues.append(f'{query_parts.name} is a 1:M join.')
+            else:
+                issues.append(f'{query_parts.name} is a M:M join.')
+        # other joins are 1:1 or M:1, which are OK.
 
     # NOTE: in an upcoming version, directions can be tested.  Not sure where the data will come from.  Probably metadata.
 #        destination_missing_pk_results = rtql.execute_tql_query(query_destination_table_name_has_missing_pks)
@@ -451,11 +408,25 @@ def get_rel_join_parts(database, from_table, rel) -> QueryParts:
     )
 
 
-def get_to_table_cardinality_query(join_parts) -> str:
+def get_where_condition(join_parts, key_filter=None) -> str:
+    """
+    Returns the where condition for a cardinality query.
+    :param QueryParts join_parts: The join parts to create the condition.
+    :param str key_filter: An optional condition that limits the keys.
+    :return: The join condition with the key filter if there is one.
+    """
+    if key_filter:
+        return f'({join_parts.join_condition}) and {key_filter}'
+    return join_parts.join_condition
+
+
+def get_to_table_cardinality_query(join_parts, probe=None, key_filter=None) -> str:
     """
     Returns a query that can tell the cardinality of the from table.  The query is the count of records in the from
     table based on the set of columns in the to table.  A count greater than 1 means it's a many cardinality.
     :param QueryParts join_parts: The join parts to create the query.
+    :param str probe: If provided, the query only returns the probe name and count so it can be batched.
+    :param str key_filter: If provided, a condition that limits the grouped keys to a sample.
     :return: A query that can be run to determine the cardinality of the from table with respect to the to table.
     """
 
@@ -477,29 +448,31 @@ def get_to_table_cardinality_query(join_parts) -> str:
 
     # just need one column to count.
     count_column = f'{to_db_and_schema}."{join_parts.to_table}"."{join_parts.to_cols[0]}"'
+    if probe:  # the batch only needs the count, which is the same shape for every probe.
+        table_columns = f"'{probe}' as probe"
     return  f'select ' \
             f'{table_columns}, ' \
             f'count({count_column}) as c1 ' \
             f'from {from_db_and_schema}."{join_parts.from_table}", ' \
             f'{to_db_and_schema}."{join_parts.to_table}" ' \
-            f'where {join_parts.join_condition} ' \
+            f'where {get_where_condition(join_parts, key_filter)} ' \
             f'group by {group_columns} ' \
             f'order by c1 desc limit 1' \
-            f';'
+            f'{"" if probe else ";"}'
 
 
-def query_for_cardinality(rtql, query) -> int:
+def get_cardinality(query, query_results) -> int:
     """
-    Executes a query and returns the 'c1' value of the first row of data.
-    Assumes the query is correct and returns 'c1'.
-    :param RemoteTQL rtql:
-    :param str query:
+    Returns the 'c1' value of the first row of data from the results of a cardinality query.
+    :param str query: The query that was run.
+    :param query_results: The results of the query or the exception if the query failed.
     :return: Either the value of c1 or -1 if no data found or an error occurred.
     """
     print(query)
     count = -1
     try:
-        query_results = rtql.execute_tql_query(query=query)
+        if isinstance(query_results, Exception):
+            raise query_results
         count = int(query_results.get_row(0).get_column('c1'))
     except Exception as e:
         eprint(f"Error in query: {e}")
@@ -507,11 +480,213 @@ def query_for_cardinality(rtql, query) -> int:
     return count
 
 
-def get_from_table_cardinality_query(join_parts) -> str:
+CARDINALITY_BATCH_SIZE = 0  # probes per query.  0 or 1 runs each probe as its own query.
+
+
+def get_join_cardinalities(executor, joins_to_test, batch_size=CARDINALITY_BATCH_SIZE) -> List[int]:
+    """
+    Returns the counts from the to and from cardinality queries for each join.
+    :param QueryExecutor executor: The executor to run the queries with.
+    :param List[QueryParts] joins_to_test: The joins to get the counts for.
+    :param int batch_size: The most probes to put in one query.
+    :return: The to and from counts for each join in order, so 2 per join.  -1 means no data or an error.
+    """
+    probes = []
+    for query_parts in joins_to_test:
+        probes.append(CardinalityProbe(get_to_table_cardinality_query, query_parts, None))
+        probes.append(CardinalityProbe(get_from_table_cardinality_query, query_parts, None))
+    return run_cardinality_probes(executor=executor, probes=probes, batch_size=batch_size)
+
+
+CardinalityProbe = namedtuple('CardinalityProbe', ['query_function', 'join_parts', 'key_filter'])
+
+
+def run_cardinality_probes(executor, probes, batch_size=CARDINALITY_BATCH_SIZE) -> List[int]:
+    """
+    Runs cardinality probes and returns the counts.  When the batch size is more than 1, the probes are combined with
+    UNION ALL so many joins are checked in one round trip.  Each probe is tagged with a name so the results can be
+    split back out.  If a batch fails, its probes are run one at a time instead.
+    :param QueryExecutor executor: The executor to run the queries with.
+    :param List[CardinalityProbe] probes: The query function, join, and optional key filter for each probe.
+    :param int batch_size: The most probes to put in one query.
+    :return: The count for each probe in order.  -1 means no data or an error.
+    """
+    queries = [probe.query_function(join_parts=probe.join_parts, key_filter=probe.key_filter) for probe in probes]
+
+    if batch_size <= 1:
+        results = executor.execute_queries(queries)
+        return [get_cardinality(query=query, query_results=query_results)
+                for query, query_results in zip(queries, results)]
+
+    # probes are named for their position, so the joins in a batch are usually from the same few tables.
+    probe_queries = [probe.query_function(join_parts=probe.join_parts, key_filter=probe.key_filter,
+                                          probe=f"p{position}")
+                     for position, probe in enumerate(probes)]
+    batches = [range(start, min(start + batch_size, len(probes))) for start in range(0, len(probes), batch_size)]
+    batch_queries = [get_batched_cardinality_query([probe_queries[position] for position in batch])
+                     for batch in batches]
+    for query in batch_queries:
+        print(query)
+
+    counts = [-1] * len(probes)
+    retry = []
+    for batch, query_results in zip(batches, executor.execute_queries(batch_queries)):
+        if isinstance(query_results, Exception):
+            eprint(f"Error in batched query, running {len(batch)} queries one at a time: {query_results}")
+            retry.extend(batch)
+            continue
+
+        batch_counts = get_batch_cardinalities(query_results=query_results)
+        for position in batch:  # probes that didn't return a row didn't have data.
+            counts[position] = batch_counts.get(f"p{position}", -1)
+
+    for position, query_results in zip(retry, executor.execute_queries([queries[position] for position in retry])):
+        counts[position] = get_cardinality(query=queries[position], query_results=query_results)
+
+    return counts
+
+
+JOIN_SAMPLE_SIZE = 0  # keys to sample for each join column.  0 always scans the full tables.
+
+
+def get_sampled_join_cardinalities(database, executor, joins_to_test, sample_size,
+                                   batch_size=CARDINALITY_BATCH_SIZE) -> List[int]:
+    """
+    Returns the counts from the to and from cardinality queries for each join using a sample of the keys.  Each
+    probe only counts the groups for the key values in the first sample_size rows of the grouped table, so it doesn't
+    have to aggregate the whole table.  A sampled count over 1 proves the join is many on that side and a count of 1
+    is accepted since none of the sampled keys repeat.  A probe that doesn't return data for the sampled keys is
+    inconclusive and is run again over the full tables.
+    :param Database database: The database being reviewed.  Used for the column types.
+    :param QueryExecutor executor: The executor to run the queries with.
+    :param List[QueryParts] joins_to_test: The joins to get the counts for.
+    :param int sample_size: The number of rows to sample keys from in each table.
+    :param int batch_size: The most probes to put in one query.
+    :return: The to and from counts for each join in order, so 2 per join.  -1 means no data or an error.
+    """
+    # the to probe groups on the from table's columns and the from probe groups on the to table's columns.
+    full_probes = []
+    sample_columns = []
+    for query_parts in joins_to_test:
+        full_probes.append(CardinalityProbe(get_to_table_cardinality_query, query_parts, None))
+        sample_columns.append((query_parts.from_db, query_parts.from_schema, query_parts.from_table,
+                               query_parts.from_cols[0]))
+        full_probes.append(CardinalityProbe(get_from_table_cardinality_query, query_parts, None))
+        sample_columns.append((query_parts.to_db, query_parts.to_schema, query_parts.to_table,
+                               query_parts.to_cols[0]))
+
+    # each column is only sampled once even if it's in many joins.
+    distinct_columns = list(OrderedDict.fromkeys(sample_columns))
+    sample_queries = [get_key_sample_query(*column, sample_size=sample_size) for column in distinct_columns]
+    key_filters = {}
+    for column, query_results in zip(distinct_columns, executor.execute_queries(sample_queries)):
+        if isinstance(query_results, Exception):
+            eprint(f"Error in query: {query_results}")
+            continue
+        key_filters[column] = get_key_filter(database=database, table_name=column[2], column_name=column[3],
+                                             query_results=query_results)
+
+    counts = [-1] * len(full_probes)
+    sampled = [position for position, column in enumerate(sample_columns) if key_filters.get(column)]
+    sampled_probes = [full_probes[position]._replace(key_filter=key_filters[sample_columns[position]])
+                      for position in sampled]
+    sampled_counts = run_cardinality_probes(executor=executor, probes=sampled_probes, batch_size=batch_size)
+    for position, count in zip(sampled, sampled_counts):
+        counts[position] = count
+
+    # empty tables don't need a full scan, but errors, samples without usable keys, and samples without data do.
+    inconclusive = [position for position, count in enumerate(counts)
+                    if count <= 0 and key_filters.get(sample_columns[position], None) != ""]
+    print(f"-- {len(full_probes) - len(inconclusive)} of {len(full_probes)} join probes answered from samples")
+    full_counts = run_cardinality_probes(executor=executor, probes=[full_probes[position] for position in inconclusive],
+                                         batch_size=batch_size)
+    for position, count in zip(inconclusive, full_counts):
+        counts[position] = count
+
+    return counts
+
+
+def get_key_sample_query(db, schema, table, column, sample_size) -> str:
+    """
+    Returns a query that gets up to sample_size values of a key column.  There's no GROUP BY or DISTINCT so the query
+    can stop as soon as it has enough rows instead of aggregating the whole table.  Duplicates are removed when the
+    key filter is created.
+    :param str db: The database with the table.
+    :param str schema: The schema with the table.
+    :param str table: The table with the column.
+    :param str column: The column to sample.
+    :param int sample_size: The most values to return.
+    :return: A query that returns the values as column k.
+    """
+    return f'select "{table}"."{column}" as k ' \
+           f'from "{db}"."{schema}"."{table}" ' \
+           f'limit {sample_size};'
+
+
+QUOTED_TYPES = ("CHAR", "DATE", "TIME")  # column types that need quoted values.
+NUMBER_PATTERN = re.compile(r"^-?[0-9]+(\.[0-9]*)?([eE][-+]?[0-9]+)?$")
+
+
+def get_key_filter(database, table_name, column_name, query_results) -> Optional[str]:
+    """
+    Returns a condition that limits a column to the sampled values.
+    :param Database database: The database with the table.
+    :param str table_name: The table with the column.
+    :param str column_name: The column that was sampled.
+    :param query_results: The results of the sample query.
+    :return: The condition, "" if the sample didn't return any rows because the table is empty, or None if none of
+    the sampled values can be used, e.g. they are all null.
+    """
+    table = database.get_table(table_name)
+    column = table.get_column(column_name) if table else None
+    quoted = column is None or any(t in column.column_type.upper() for t in QUOTED_TYPES)
+
+    values = OrderedDict()  # the sample can repeat values.
+    number_rows = 0
+    for row in query_results:
+        number_rows += 1
+        value = row.get_column('k')
+        if value is None or value == "":  # nulls don't join.
+            continue
+        if quoted:
+            values["'" + str(value).replace("'", "''") + "'"] = None
+        elif NUMBER_PATTERN.match(str(value)):  # anything else isn't a valid number and can't be in the list.
+            values[str(value)] = None
+
+    if not values:
+        return "" if number_rows == 0 else None
+    return f'"{table_name}"."{column_name}" in ({", ".join(values)})'
+
+
+def get_batched_cardinality_query(probes) -> str:
+    """
+    Combines cardinality probes into a single query.
+    :param List[str] probes: Queries from the cardinality query functions with a probe name.
+    :return: A query that returns a probe and c1 for each probe that has data.
+    """
+    return " union all ".join(f"({probe})" for probe in probes) + ";"
+
+
+def get_batch_cardinalities(query_results) -> dict:
+    """
+    Splits the results of a batched cardinality query into the count for each probe.
+    :param query_results: The results of the batched query.
+    :return: The 'c1' value for each probe name.
+    :rtype: dict of str, int
+    """
+    counts = {}
+    for row in query_results:
+        counts[row.get_column('probe')] = int(row.get_column('c1'))
+    return counts
+
+
+def get_from_table_cardinality_query(join_parts, probe=None, key_filter=None) -> str:
     """
     Returns a query that can tell the cardinality of the to table.  The query is the count of records in the to
     table based on the set of columns in the from table.  A count greater than 1 means it's a many cardinality.
     :param QueryParts join_parts: The join parts to create the query.
+    :param str probe: If provided, the query only returns the probe name and count so it can be batched.
+    :param str key_filter: If provided, a condition that limits the grouped keys to a sample.
     :return: A query that can be run to determine the cardinality of the to table with respect to the from table.
     """
     # Get the columns in the to table to query and group on.
@@ -532,18 +707,20 @@ def get_from_table_cardinality_query(join_parts) -> str:
 
     # just need one column to count.
     count_column = f'{from_db_and_schema}."{join_parts.from_table}"."{join_parts.from_cols[0]}"'
+    if probe:  # the batch only needs the count, which is the same shape for every probe.
+        table_columns = f"'{probe}' as probe"
     return f'select ' \
            f'{table_columns}, ' \
            f'count({count_column}) as c1 ' \
            f'from {to_db_and_schema}."{join_parts.to_table}", ' \
            f'{from_db_and_schema}."{join_parts.from_table}" ' \
-           f'where {join_parts.join_condition} ' \
+           f'where {get_where_condition(join_parts, key_filter)} ' \
            f'group by {group_columns} ' \
            f'order by c1 desc limit 1' \
-           f';'
+           f'{"" if probe else ";"}'
 
 
-def review_worksheet_joins(database, rtql, worksheet):
+def review_worksheet_joins(database, rtql, worksheet, config_file):
     """
     Reviews the join types in a worksheet.
     Constraints:
@@ -556,6 +733,8 @@ def review_worksheet_joins(database, rtql, worksheet):
     :type rtql: RemoteTQL
     :param worksheet: The worksheet with the joins.
     :type worksheet: Worksheet
+    :param config_file: Configuration with max_query_workers and query_timeout for running the queries.
+    :type config_file: ConfigFile
     :return: A list of recommendations.
     :rtype: list of str
     """
@@ -569,6 +748,9 @@ def review_worksheet_joins(database, rtql, worksheet):
     # execute the queries.
     # compare results to join type.
 
+    # get the two queries for each join so they can all be run together.
+    joins_to_test = []
+    queries = []
     for join in worksheet.get_joins():
         source_table_name = join.source
         source_table = database.get_table(table_name=source_table_name)
@@ -622,9 +804,6 @@ def review_worksheet_joins(database, rtql, worksheet):
             f'WHERE "{destination_table_name}"."{left_fk}" = NULL;'
         print(query_source_table_name_has_missing_fks)
 
-        source_missing_fk_results = rtql.execute_tql_query(query_source_table_name_has_missing_fks)
-        should_be_left_outer_join = source_missing_fk_results.nbr_rows() > 0
-
         # If this query returns rows, then there are FK values in the left table that are not in the right table.
         query_destination_table_name_has_missing_pks = \
             f'select ' \
@@ -638,7 +817,22 @@ def review_worksheet_joins(database, rtql, worksheet):
             f'WHERE "{source_table_name}"."{right_pk}" = NULL;'
         print(query_destination_table_name_has_missing_pks)
 
-        destination_missing_pk_results = rtql.execute_tql_query(query_destination_table_name_has_missing_pks)
+        joins_to_test.append(join)
+        queries.append(query_source_table_name_has_missing_fks)
+        queries.append(query_destination_table_name_has_missing_pks)
+
+    # run all of the queries together.  The results come back in the same order.
+    results = QueryExecutor.from_config(rtql=rtql, config_file=config_file).execute_queries(queries)
+
+    for cnt, join in enumerate(joins_to_test):
+        source_missing_fk_results = results[2 * cnt]
+        destination_missing_pk_results = results[2 * cnt + 1]
+        errors = [r for r in (source_missing_fk_results, destination_missing_pk_results) if isinstance(r, Exception)]
+        if errors:
+            eprint(f"Error in query for join {join.name}: {errors[0]}")
+            continue
+
+        should_be_left_outer_join = source_missing_fk_results.nbr_rows() > 0
         should_be_right_outer_join = destination_missing_pk_results.nbr_rows() > 0
         should_be_join = "INNER"
         if should_be_right_outer_join and should_be_left_outer_join:
@@ -650,8 +844,6 @@ def review_worksheet_joins(database, rtql, worksheet):
 
         actual_join = join.type  # type: [RIGHT_OUTER | LEFT_OUTER | INNER | OUTER]
         if actual_join != should_be_join:
-            issues.append(f"Join {join_name} is type {actual_join}, but should probably be {should_be_join}.")
-
-        pass
+            issues.append(f"Join {join.name} is type {actual_join}, but should probably be {should_be_join}.")
 
     return issues
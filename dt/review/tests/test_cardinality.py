@@ -0,0 +1,83 @@
+import os
+import re
+import unittest
+
+from dt.io import DDLParser
+from dt.review.review_tests import get_fk_join_parts, get_join_cardinalities, get_key_filter, \
+    get_sampled_join_cardinalities
+from dt.review.transport import TransportResults
+
+# -------------------------------------------------------------------------------------------------------------------
+
+TEST_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+class AnsweringExecutor:
+    """Executor that answers each query with a function and keeps the queries that were run."""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.queries = []
+
+    def execute_queries(self, queries):
+        self.queries.extend(queries)
+        return [self.answer(query) for query in queries]
+
+
+class TestJoinCardinality(unittest.TestCase):
+    """Tests how the join cardinality probes are run, without a cluster."""
+
+    def setUp(self):
+        parser = DDLParser(database_name="table_join_test")
+        self.database = parser.parse_ddl(os.path.join(TEST_DIRECTORY, "table_joins.tql"))
+        self.joins_to_test = [get_fk_join_parts(self.database, table, fk) for table in self.database
+                              for fk in table.foreign_keys.values()]
+
+    def test_batched_table_join_cardinality(self):
+        """Tests that batched cardinality probes are split back out and failed batches are run one at a time."""
+        def answer(query):
+            """Answers each probe with its number except p0, which has no data, and fails batches with p2."""
+            probes = re.findall(r"'(p\d+)' as probe", query)
+            if "p2" in probes:
+                return ValueError("batch failed")
+            if probes:
+                return TransportResults(["probe", "c1"], [(p, int(p[1:])) for p in probes if p != "p0"])
+            return TransportResults(["c1"], [(7,)])
+
+        self.assertEqual(4, len(self.joins_to_test) * 2)
+        counts = get_join_cardinalities(executor=AnsweringExecutor(answer), joins_to_test=self.joins_to_test,
+                                        batch_size=2)
+        self.assertEqual([-1, 1, 7, 7], counts)
+
+        counts = get_join_cardinalities(executor=AnsweringExecutor(answer), joins_to_test=self.joins_to_test,
+                                        batch_size=0)
+        self.assertEqual([7, 7, 7, 7], counts)
+
+    def test_sampled_table_join_cardinality(self):
+        """Tests that sampled probes are only run over the full tables when the sample doesn't have data."""
+        def answer(query):
+            """Samples two keys from every table, finds many rows for sampled keys, and 1 for full scans."""
+            if " as k " in query:
+                return TransportResults(["k"], [("1",), ("it's",)])
+            if " in (" in query:
+                from_table = query.split(" from ")[1].split(",")[0]
+                return TransportResults(["c1"], [] if "table2" in from_table else [(3,)])
+            return TransportResults(["c1"], [(1,)])
+
+        executor = AnsweringExecutor(answer)
+        counts = get_sampled_join_cardinalities(database=self.database, executor=executor,
+                                                joins_to_test=self.joins_to_test, sample_size=2)
+        self.assertEqual([3, 1, 3, 3], counts)
+        self.assertEqual(4, len([q for q in executor.queries if " as k " in q]))
+        self.assertIn('"table1"."col1" in (1)', "".join(executor.queries))  # not a number, so it's dropped.
+        self.assertEqual(1, len([q for q in executor.queries if " in (" not in q and " as k " not in q]))
+
+    def test_key_filter(self):
+        """Tests that empty samples skip the full scan, but samples without usable keys don't."""
+        def sample(*values):
+            return TransportResults(["k"], [(value,) for value in values])
+
+        self.assertEqual("", get_key_filter(self.database, "table1", "col1", sample()))
+        self.assertIsNone(get_key_filter(self.database, "table1", "col1", sample(None, "")))
+        self.assertEqual('"table1"."col1" in (1, 2)',
+                         get_key_filter(self.database, "table1", "col1", sample("1", None, "2", "1")))
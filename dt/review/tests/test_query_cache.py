@@ -0,0 +1,105 @@
+import os
+import unittest
+
+from dt.review.query_cache import CachedTQL
+from dt.util import ConfigFile
+
+# -------------------------------------------------------------------------------------------------------------------
+
+
+class Row:
+    """Row of results with named columns."""
+
+    def __init__(self, values):
+        self.values = values
+
+    def get_column(self, column):
+        return self.values[column]
+
+
+class CountingTQL:
+    """Returns the statistics for two tables and counts the data queries that are run."""
+
+    def __init__(self, row_count=10):
+        self.row_count = row_count
+        self.queries = []
+
+    def execute_tql_query(self, query):
+        self.queries.append(query)
+        if query == CachedTQL.STATISTICS_QUERY:
+            return [Row({"Database Name": "db", "Schema Name": "s", "Table Name": table,
+                         "Total Row Count": str(self.row_count)}) for table in ["t1", "t2"]]
+        return [Row({"c1": len(self.queries)})]
+
+
+class TestCachedTQL(unittest.TestCase):
+    """Tests caching review query results between runs."""
+
+    FILENAME = "/tmp/test_query_cache.pickle"
+    QUERY = 'select count("db"."s"."t2"."c") as c1 from "db"."s"."t1", "db"."s"."t2";'
+
+    def tearDown(self):
+        if os.path.exists(TestCachedTQL.FILENAME):
+            os.remove(TestCachedTQL.FILENAME)
+
+    def test_reuse_until_tables_change(self):
+        """Tests that results are reused between runs until the row counts change."""
+        rtql = CountingTQL()
+        cache = CachedTQL(rtql=rtql, filename=TestCachedTQL.FILENAME)
+        first = cache.execute_tql_query(TestCachedTQL.QUERY)
+        self.assertIs(first, cache.execute_tql_query(TestCachedTQL.QUERY))
+        cache.execute_tql_query(CachedTQL.STATISTICS_QUERY)
+        cache.execute_tql_query('select 1 from "db"."s"."unknown";')  # not in the statistics, so never cached.
+        cache.execute_tql_query('select 1 from "db"."s"."unknown";')
+        self.assertEqual(4, len(rtql.queries))
+        cache.save()
+
+        rtql = CountingTQL()
+        cache = CachedTQL(rtql=rtql, filename=TestCachedTQL.FILENAME)
+        self.assertEqual(first[0].get_column("c1"), cache.execute_tql_query(TestCachedTQL.QUERY)[0].get_column("c1"))
+        self.assertEqual((1, 0), (cache.hits, cache.misses))
+
+        rtql = CountingTQL(row_count=11)
+        cache = CachedTQL(rtql=rtql, filename=TestCachedTQL.FILENAME)
+        cache.execute_tql_query(TestCachedTQL.QUERY)
+        self.assertEqual((0, 1), (cache.hits, cache.misses))
+
+    def test_eviction(self):
+        """Tests that the least recently used and expired results are dropped."""
+        rtql = CountingTQL()
+        cache = CachedTQL(rtql=rtql, filename=TestCachedTQL.FILENAME, max_entries=1)
+        cache.execute_tql_query('select 1 from "db"."s"."t1";')
+        cache.execute_tql_query('select 1 from "db"."s"."t2";')
+        self.assertEqual(['select 1 from "db"."s"."t2";'], list(cache.entries))
+
+        cache = CachedTQL(rtql=rtql, filename=TestCachedTQL.FILENAME, ttl=-1)
+        cache.execute_tql_query('select 1 from "db"."s"."t1";')
+        cache.save()
+        self.assertEqual(0, len(cache.entries))
+
+    def test_statistics_failure(self):
+        """Tests that queries still run, without caching, when the statistics can't be read."""
+        class NoStatisticsTQL(CountingTQL):
+            def execute_tql_query(self, query):
+                if query == CachedTQL.STATISTICS_QUERY:
+                    self.queries.append(query)
+                    raise ValueError("no statistics")
+                return super().execute_tql_query(query)
+
+        rtql = NoStatisticsTQL()
+        cache = CachedTQL(rtql=rtql, filename=TestCachedTQL.FILENAME)
+        cache.execute_tql_query(TestCachedTQL.QUERY)
+        cache.execute_tql_query(TestCachedTQL.QUERY)
+        self.assertEqual(3, len(rtql.queries))  # the statistics are only tried once.
+        self.assertEqual((0, 2), (cache.hits, cache.misses))
+        self.assertEqual(0, len(cache.entries))
+
+    def test_from_config(self):
+        """Tests that the cache is only used when there's a cache file."""
+        rtql = CountingTQL()
+        config = ConfigFile()
+        self.assertIs(rtql, CachedTQL.from_config(rtql=rtql, config_file=config))
+        config["query_cache_file"] = TestCachedTQL.FILENAME
+        config["query_cache_size"] = "5"
+        cache = CachedTQL.from_config(rtql=rtql, config_file=config)
+        self.assertEqual(5, cache.max_entries)
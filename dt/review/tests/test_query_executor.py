@@ -0,0 +1,87 @@
+import threading
+import time
+import unittest
+
+from dt.review.query_executor import QueryExecutor, QueryNotRunError, QueryTimeoutError
+
+# -------------------------------------------------------------------------------------------------------------------
+
+
+class SleepingTQL:
+    """Answers queries of the form 'sleep <seconds>' after waiting that long and tracks how many run at once."""
+
+    def __init__(self):
+        self.running = 0
+        self.most_running = 0
+        self.lock = threading.Lock()
+
+    def execute_tql_query(self, query):
+        seconds = float(query.split()[1])
+        if seconds < 0:
+            raise ValueError(f"bad query {query}")
+        with self.lock:
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+        time.sleep(seconds)
+        with self.lock:
+            self.running -= 1
+        return seconds
+
+
+class TestQueryExecutor(unittest.TestCase):
+    """Tests running review queries concurrently."""
+
+    def test_ordered_results(self):
+        """Tests that results come back in the order of the queries even when later queries finish first."""
+        executor = QueryExecutor(rtql=SleepingTQL(), max_workers=4, timeout=10)
+        start = time.time()
+        results = executor.execute_queries(["sleep 0.3", "sleep 0.1", "sleep 0.2", "sleep 0"])
+        self.assertEqual([0.3, 0.1, 0.2, 0], results)
+        self.assertLess(time.time() - start, 0.55)
+
+    def test_errors_and_timeouts(self):
+        """Tests that failures and timeouts are returned in place of the results."""
+        executor = QueryExecutor(rtql=SleepingTQL(), max_workers=2, timeout=0.2)
+        results = executor.execute_queries(["sleep -1", "sleep 1", "sleep 0"])
+        self.assertIsInstance(results[0], ValueError)
+        self.assertIsInstance(results[1], QueryTimeoutError)
+        self.assertEqual(0, results[2])
+        self.assertEqual([], executor.execute_queries([]))
+
+    def test_timeout_starts_with_query(self):
+        """Tests that queries waiting behind a slow query aren't timed out and the timeouts don't add up."""
+        rtql = SleepingTQL()
+        executor = QueryExecutor(rtql=rtql, max_workers=1, timeout=0.3)
+        start = time.time()
+        results = executor.execute_queries(["sleep 0.4", "sleep 0", "sleep 0"])
+        self.assertIsInstance(results[0], QueryTimeoutError)
+        self.assertEqual([0, 0], results[1:])
+        self.assertLess(time.time() - start, 0.6)
+        self.assertEqual(1, rtql.most_running)
+
+        executor = QueryExecutor(rtql=SleepingTQL(), max_workers=3, timeout=0.2)
+        start = time.time()
+        results = executor.execute_queries(["sleep 1", "sleep 1", "sleep 1"])
+        self.assertTrue(all(isinstance(result, QueryTimeoutError) for result in results))
+        self.assertLess(time.time() - start, 0.6)
+
+    def test_bounded_after_timeouts(self):
+        """Tests that queries that timed out still count against the workers until they finish."""
+        rtql = SleepingTQL()
+        executor = QueryExecutor(rtql=rtql, max_workers=2, timeout=0.1)
+        results = executor.execute_queries(["sleep 1", "sleep 0.15", "sleep 0", "sleep 0"])
+        self.assertIsInstance(results[0], QueryTimeoutError)
+        self.assertIsInstance(results[1], QueryTimeoutError)
+        self.assertEqual([0, 0], results[2:])
+        self.assertEqual(2, rtql.most_running)
+
+        results = executor.execute_queries(["sleep 0", "sleep 0"])  # one thread is still stuck on "sleep 1".
+        self.assertEqual([0, 0], results)
+        self.assertEqual(2, rtql.most_running)
+
+        rtql = SleepingTQL()
+        executor = QueryExecutor(rtql=rtql, max_workers=1, timeout=0.1)
+        results = executor.execute_queries(["sleep 1", "sleep 0"])
+        self.assertIsInstance(results[0], QueryTimeoutError)
+        self.assertIsInstance(results[1], QueryNotRunError)
+        self.assertEqual(1, rtql.most_running)
@@ -2,6 +2,8 @@ import unittest
 
 from dt.io import DDLParser, YAMLWorksheetReader
 from dt.review.review import DataModelReviewer
+from dt.review.review_tests import review_long_chain_relationships
+from dt.util import ConfigFile
 from pytql.tql import RemoteTQL
 
 # -------------------------------------------------------------------------------------------------------------------
@@ -22,7 +24,7 @@ class TestModelReviewer(unittest.TestCase):
         reviewer = DataModelReviewer()
         issues = reviewer.review_model(database=database)
 
-        self.assertEqual(6, len(issues["review_circular_relationships"]))
+        self.assertEqual(3, len(issues["review_circular_relationships"]))
 
     def test_long_chain_relationships(self):
         """Tests if a relationship between two tables is longer than recommended."""
@@ -32,7 +34,23 @@ class TestModelReviewer(unittest.TestCase):
         reviewer = DataModelReviewer()
         issues = reviewer.review_model(database=database)
 
-        self.assertEqual(6, len(issues["review_long_chain_relationships"]))
+        self.assertEqual(4, len(issues["review_long_chain_relationships"]))
+
+    def test_long_chain_limit(self):
+        """Tests that the note about more long chains is only added when there are more than the limit."""
+        parser = DDLParser(database_name="test_db")
+        database = parser.parse_ddl("long_chain.tql")
+
+        config = ConfigFile()
+        config["max_long_chains"] = "4"
+        issues = review_long_chain_relationships(database=database, config_file=config)
+        self.assertEqual(4, len(issues))
+        self.assertFalse(any(issue.startswith("Stopped after") for issue in issues))
+
+        config["max_long_chains"] = "3"
+        issues = review_long_chain_relationships(database=database, config_file=config)
+        self.assertEqual(4, len(issues))
+        self.assertEqual("Stopped after 3 long paths.  There may be more.", issues[-1])
 
     def test_sharding(self):
         """Tests the review of sharding.  This test assumes the sharding database has been loaded with data."""
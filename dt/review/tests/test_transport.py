@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from dt.io import DDLParser
+from dt.review.review import DataModelReviewer
+from dt.review.transport import RecordingTransport, ReplayTransport, SQLiteTransport
+
+# -------------------------------------------------------------------------------------------------------------------
+
+TEST_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestTransports(unittest.TestCase):
+    """Tests running the data reviews without a cluster."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "test_transport.recording")
+        self.cache_filename = os.path.join(self.directory, "test_transport.cache")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    @staticmethod
+    def get_transport(filename, database_name):
+        """Returns the database from the TQL file and a SQLite transport loaded with the data from the file."""
+        filename = os.path.join(TEST_DIRECTORY, filename)
+        database = DDLParser(database_name=database_name).parse_ddl(filename)
+        transport = SQLiteTransport()
+        transport.load_database(database=database, data_filename=filename)
+        return database, transport
+
+    def test_table_joins(self):
+        """Tests the table join review on local data with each way of running the cardinality probes."""
+        for settings in [{}, {"cardinality_batch_size": "3"}, {"join_sample_size": "2"},
+                         {"join_sample_size": "2", "cardinality_batch_size": "4", "max_query_workers": "1"}]:
+            database, transport = self.get_transport("table_joins.tql", "table_join_test")
+            reviewer = DataModelReviewer()
+            for key, value in settings.items():
+                reviewer.config[key] = value
+
+            issues = reviewer.review_model(test_names=["review_table_joins"], database=database, rtql=transport)
+            self.assertEqual(["rel_table5_to_table6 is a 1:M join.", "rel_table7_to_table8 is a M:M join."],
+                             issues["review_table_joins"], settings)
+
+    def test_statistics(self):
+        """Tests that show statistics is answered from the loaded tables."""
+        database, transport = self.get_transport("table_joins.tql", "table_join_test")
+        rows = {row.get_column("Table Name"): row for row in transport.execute_tql_query("show statistics for server;")}
+        self.assertEqual(8, len(rows))
+        self.assertEqual("6", rows["table3"].get_column("Total Row Count"))
+        self.assertEqual("1", rows["table3"].get_column("Total Shards"))
+
+    def test_to_sqlite(self):
+        """Tests rewriting TQL for SQLite."""
+        self.assertEqual('select "t"."c" from "t" where "t"."c" IS NULL;',
+                         SQLiteTransport.to_sqlite('select "db"."s"."t"."c" from "db"."s"."t" where "t"."c" = NULL;'))
+        self.assertEqual('select * from (select 1 limit 1) union all select * from (select 2 limit 1);',
+                         SQLiteTransport.to_sqlite('(select 1 limit 1) union all (select 2 limit 1);'))
+
+    def test_record_and_replay(self):
+        """Tests that a recorded review gives the same results when replayed."""
+        database, transport = self.get_transport("table_joins.tql", "table_join_test")
+        recording = RecordingTransport(transport=transport, filename=self.filename)
+        recorded = DataModelReviewer().review_model(test_names=["review_table_joins", "review_sharding"],
+                                                    database=database, rtql=recording)
+        recording.save()
+
+        replayed = DataModelReviewer().review_model(test_names=["review_table_joins", "review_sharding"],
+                                                    database=database, rtql=ReplayTransport(self.filename))
+        self.assertEqual(recorded, replayed)
+        with self.assertRaises(ValueError):
+            ReplayTransport(self.filename).execute_tql_query("select 1;")
+
+    def test_record_with_cache(self):
+        """Tests that results read from the query cache are recorded."""
+        database, transport = self.get_transport("table_joins.tql", "table_join_test")
+        reviewer = DataModelReviewer()
+        reviewer.config["query_cache_file"] = self.cache_filename
+        reviewer.review_model(test_names=["review_table_joins"], database=database, rtql=transport)
+
+        recording = RecordingTransport(transport=transport, filename=self.filename)
+        recorded = reviewer.review_model(test_names=["review_table_joins"], database=database, rtql=recording)
+        self.assertIs(transport, recording.transport)
+        recording.save()
+
+        replayed = DataModelReviewer().review_model(test_names=["review_table_joins"], database=database,
+                                                    rtql=ReplayTransport(self.filename))
+        self.assertEqual(recorded, replayed)
@@ -0,0 +1,316 @@
+"""
+Contains the transports that the data reviews use to run TQL queries.  Reviews only need an object with
+execute_tql_query(query), so the same reviews can run against a cluster, a recording of a cluster, or a local SQLite
+database loaded with test data.
+
+Copyright 2020 ThoughtSpot
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions
+of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+import pickle
+import re
+from abc import ABC, abstractmethod
+from functools import partial
+import sqlite3
+import threading
+
+from dt.util import eprint
+
+# -------------------------------------------------------------------------------------------------------------------
+
+
+class TQLTransport(ABC):
+    """
+    The interface for running TQL queries.  Results of queries have get_row(n), nbr_rows() and can be iterated over
+    for rows that have get_column(name).
+    """
+
+    STATISTICS_QUERY = "show statistics for server;"
+
+    @abstractmethod
+    def execute_tql_query(self, query):
+        """
+        Runs a query and returns the results.
+        :param query: The query to run.
+        :type query: str
+        :return: The results of the query.
+        """
+
+
+class RemoteTQLTransport(TQLTransport):
+    """
+    Runs TQL on a ThoughtSpot cluster using pytql.  pytql connections aren't documented as thread safe, so each thread
+    that runs queries gets its own connection.
+    """
+
+    def __init__(self, hostname, username, password):
+        """
+        Connects to the cluster.
+        :param hostname: The IP or URL of the cluster.
+        :type hostname: str
+        :param username: The user to log in as.
+        :type username: str
+        :param password: The password for the user.
+        :type password: str
+        """
+        from pytql.tql import RemoteTQL  # only needed when connecting to a cluster.
+        self._connect = partial(RemoteTQL, hostname=hostname, username=username, password=password)
+        self._connections = threading.local()
+        self.rtql = self._get_connection()  # connects now so bad settings are reported before any queries.
+
+    def _get_connection(self):
+        """
+        Returns the connection for the current thread, connecting if the thread doesn't have one yet.
+        :return: The connection.
+        :rtype: RemoteTQL
+        """
+        rtql = getattr(self._connections, "rtql", None)
+        if rtql is None:
+            rtql = self._connections.rtql = self._connect()
+        return rtql
+
+    def execute_tql_query(self, query):
+        return self._get_connection().execute_tql_query(query=query)
+
+    def run_tql_command(self, command):
+        """
+        Runs a TQL command on the cluster and returns the output.
+        :param command: The command to run, e.g. "script database x;".
+        :type command: str
+        :return: The lines of output.
+        :rtype: list of str
+        """
+        return self._get_connection().run_tql_command(command)
+
+
+class TransportRow:
+    """
+    A row of results from a local transport.
+    """
+
+    def __init__(self, column_indexes, values):
+        """
+        Creates a new row.
+        :param column_indexes: The position of each column name in the values.
+        :type column_indexes: dict of str, int
+        :param values: The values in the row.
+        :type values: tuple
+        """
+        self.column_indexes = column_indexes
+        self.values = values
+
+    def get_column(self, column_name):
+        """
+        Returns the value of a column.
+        :param column_name: The name of the column.
+        :type column_name: str
+        :return: The value.
+        """
+        return self.values[self.column_indexes[column_name]]
+
+
+class TransportResults:
+    """
+    The results of a query from a local transport.
+    """
+
+    def __init__(self, column_names, rows):
+        """
+        Creates new results.
+        :param column_names: The names of the columns in order.
+        :type column_names: list of str
+        :param rows: The values for each row.
+        :type rows: list of tuple
+        """
+        self.column_names = list(column_names)
+        column_indexes = {name: position for position, name in enumerate(self.column_names)}
+        self.rows = [TransportRow(column_indexes, values) for values in rows]
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def get_row(self, row_number):
+        """
+        Returns a row of the results.
+        :param row_number: The number of the row starting with 0.
+        :type row_number: int
+        :return: The row.
+        :rtype: TransportRow
+        """
+        return self.rows[row_number]
+
+    def nbr_rows(self):
+        """
+        Returns the number of rows in the results.
+        :rtype: int
+        """
+        return len(self.rows)
+
+
+class RecordingTransport(TQLTransport):
+    """
+    Passes queries to another transport and keeps the results so they can be saved and replayed with
+    ReplayTransport.  Results are saved with pickle, so they must be picklable.
+    """
+
+    def __init__(self, transport, filename):
+        """
+        Creates a new recording.
+        :param transport: The transport to record.
+        :type transport: TQLTransport
+        :param filename: The file to save the recording to.
+        :type filename: str
+        """
+        self.transport = transport
+        self.filename = filename
+        self.recording = {}
+        self._lock = threading.Lock()
+
+    def execute_tql_query(self, query):
+        results = self.transport.execute_tql_query(query)
+        with self._lock:
+            self.recording[query.strip()] = results
+        return results
+
+    def save(self):
+        """
+        Writes the recorded results to the file.
+        """
+        with self._lock:
+            try:
+                with open(self.filename, "wb") as recording_file:
+                    pickle.dump(self.recording, recording_file, protocol=pickle.HIGHEST_PROTOCOL)
+            except (IOError, pickle.PicklingError, TypeError, AttributeError) as ex:
+                eprint(f"Unable to write recording {self.filename}: {ex}")
+
+
+class ReplayTransport(TQLTransport):
+    """
+    Answers queries from a file saved by RecordingTransport.  A query that wasn't recorded is an error, the same as a
+    failed query on a cluster.
+    """
+
+    def __init__(self, filename):
+        """
+        Loads the recording.
+        :param filename: The file saved by RecordingTransport.
+        :type filename: str
+        """
+        with open(filename, "rb") as recording_file:
+            self.recording = pickle.load(recording_file)
+
+    def execute_tql_query(self, query):
+        results = self.recording.get(query.strip(), None)
+        if results is None:
+            raise ValueError(f"Query wasn't recorded: {query}")
+        return results
+
+
+class SQLiteTransport(TQLTransport):
+    """
+    Runs queries on a SQLite database.  Tables are created from a database model and can be loaded with the insert
+    statements in a TQL file.  The TQL that the reviews use is rewritten for SQLite:  database and schema names are
+    dropped, UNION ALL of queries with their own ORDER BY and LIMIT are wrapped in sub-queries, and "= NULL" becomes
+    "IS NULL".  "show statistics for server" is answered from the row counts and shard keys of the loaded tables.
+    Table names must be unique across all loaded databases.
+    """
+
+    QUALIFIED_NAME = re.compile(r'"[^"]+"\."[^"]+"\.("[^"]+")')  # "db"."schema"."table" possibly followed by ."col"
+    UNION_PART = re.compile(r'\)\s+union\s+all\s+\(', re.IGNORECASE)
+    EQUALS_NULL = re.compile(r'=\s*NULL\b', re.IGNORECASE)
+
+    def __init__(self, filename=":memory:"):
+        """
+        Opens the SQLite database.
+        :param filename: The SQLite database file.  Defaults to a new database in memory.
+        :type filename: str
+        """
+        self.connection = sqlite3.connect(filename, check_same_thread=False)  # queries are run from many threads.
+        self.databases = []
+        self._lock = threading.Lock()
+
+    def load_database(self, database, data_filename=None):
+        """
+        Creates tables for the database model and optionally loads data.
+        :param database: The database model with the tables to create.
+        :type database: Database
+        :param data_filename: A TQL file with insert statements for the data.  Other statements are ignored.
+        :type data_filename: str
+        """
+        with self._lock:
+            for table in database:
+                columns = ", ".join(f'"{column.column_name}" {column.column_type}' for column in table)
+                self.connection.execute(f'create table if not exists "{table.table_name}" ({columns})')
+            self.databases.append(database)
+
+        if data_filename:
+            self.load_inserts(data_filename)
+
+    def load_inserts(self, filename):
+        """
+        Runs the insert statements from a TQL file.
+        :param filename: The TQL file to read.
+        :type filename: str
+        """
+        statement = ""
+        with open(filename, "r") as tql_file, self._lock:
+            for line in tql_file:
+                if not statement and not line.lstrip().lower().startswith("insert into"):
+                    continue
+                statement += line
+                if sqlite3.complete_statement(statement):
+                    self.connection.execute(statement)
+                    statement = ""
+            self.connection.commit()
+
+    @staticmethod
+    def to_sqlite(query):
+        """
+        Rewrites a TQL query for SQLite.
+        :param query: The TQL query.
+        :type query: str
+        :return: The query for SQLite.
+        :rtype: str
+        """
+        query = SQLiteTransport.QUALIFIED_NAME.sub(r"\1", query.strip())
+        query = SQLiteTransport.EQUALS_NULL.sub("IS NULL", query)
+        if query.startswith("(") and SQLiteTransport.UNION_PART.search(query):
+            query = "select * from " + SQLiteTransport.UNION_PART.sub(") union all select * from (", query)
+        return query
+
+    def get_statistics(self):
+        """
+        Returns rows like "show statistics for server" for the loaded tables.
+        :return: The statistics with the columns the reviews use.
+        :rtype: TransportResults
+        """
+        rows = []
+        with self._lock:
+            for database in self.databases:
+                for table in database:
+                    row_count = self.connection.execute(f'select count(*) from "{table.table_name}"').fetchone()[0]
+                    shards = table.get_number_shards() or 1
+                    rows.append((database.database_name, table.schema_name, table.table_name, str(row_count),
+                                 str(shards), "0"))
+        return TransportResults(["Database Name", "Schema Name", "Table Name", "Total Row Count", "Total Shards",
+                                 "Row Count Skew"], rows)
+
+    def execute_tql_query(self, query):
+        if query.strip().lower() == TQLTransport.STATISTICS_QUERY:
+            return self.get_statistics()
+
+        with self._lock:
+            cursor = self.connection.execute(self.to_sqlite(query))
+            column_names = [description[0] for description in cursor.description]
+            return TransportResults(column_names, cursor.fetchall())
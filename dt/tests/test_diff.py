@@ -1,3 +1,4 @@
+import json
 import unittest
 from dt.model import ShardKey
 from dt.diff import *
@@ -166,3 +167,104 @@ class TestDDLCompare(unittest.TestCase):
 
         self.assertTrue(type(diff2[0] is GenericRelationshipAddedDifference))
         self.assertEqual(diff2[0].table_name, "table1")
+
+    @staticmethod
+    def get_catalogs():
+        """
+        Returns two sets of databases for testing catalog comparisons.
+        :return: Two dictionaries of databases keyed by name.
+        :rtype: (dict of str:Database, dict of str:Database)
+        """
+        same1 = Database(database_name="same")
+        same1.add_table(Table(table_name="table1"))
+        changed1 = Database(database_name="changed")
+        changed1.add_table(Table(table_name="table1"))
+        only1 = Database(database_name="only_in_1")
+        only1.add_table(Table(table_name="table1"))
+
+        same2 = Database(database_name="same")
+        same2.add_table(Table(table_name="table1"))
+        changed2 = Database(database_name="changed")
+        changed2.add_table(Table(table_name="table1", primary_key="column1"))
+
+        return {"same": same1, "changed": changed1, "only_in_1": only1}, {"same": same2, "changed": changed2}
+
+    def test_compare_catalogs(self):
+        """Tests comparing multiple databases matched by name."""
+        catalog1, catalog2 = self.get_catalogs()
+        differences = DDLCompare.compare_catalogs(catalog1, catalog2)
+
+        self.assertEqual(["changed", "only_in_1", "same"], list(differences.keys()))
+        self.assertEqual(([], []), differences["same"])
+
+        diff1, diff2 = differences["changed"]
+        self.assertTrue(type(diff1[0]) is PrimaryKeyAddedDifference)
+        self.assertTrue(type(diff2[0]) is PrimaryKeyDroppedDifference)
+
+        diff1, diff2 = differences["only_in_1"]
+        self.assertTrue(type(diff1[0]) is TableDroppedDifference)
+        self.assertTrue(type(diff2[0]) is TableCreatedDifference)
+        self.assertEqual("only_in_1", diff2[0].database.database_name)
+
+    def test_compare_catalogs_in_parallel(self):
+        """Tests that comparing in multiple processes gives the same results."""
+        catalog1, catalog2 = self.get_catalogs()
+        serial = DDLCompare.compare_catalogs(catalog1, catalog2)
+        parallel = DDLCompare.compare_catalogs(catalog1, catalog2, max_workers=2)
+
+        self.assertEqual(list(serial.keys()), list(parallel.keys()))
+        for database_name in serial:
+            for serial_diffs, parallel_diffs in zip(serial[database_name], parallel[database_name]):
+                self.assertEqual([str(d) for d in serial_diffs], [str(d) for d in parallel_diffs])
+
+
+class TestJSONLinesDiffWriter(unittest.TestCase):
+    """Tests writing differences as JSON Lines."""
+
+    def test_records(self):
+        """Tests that each difference becomes one record with the payload and alter."""
+        db1 = Database(database_name="database1")
+        db2 = Database(database_name="database2")
+
+        t1 = Table(table_name="table1")
+        t1.add_column(column=Column(column_name="column1", column_type="INT"))
+        db1.add_table(t1)
+
+        t2 = Table(table_name="table1")
+        t2.add_column(column=Column(column_name="column1", column_type="FLOAT"))
+        t2.add_column(column=Column(column_name="column2", column_type="DATE"))
+        db2.add_table(t2)
+        db2.add_table(Table(table_name="table2", primary_key="column1"))
+
+        diff1, diff2 = DDLCompare.compare_databases(db1=db1, db2=db2)
+        records = [json.loads(r) for r in JSONLinesDiffWriter.iter_records(diff1, target=1)]
+        self.assertEqual(len(diff1), len(records))
+
+        by_type = {r["type"]: r for r in records}
+        self.assertEqual({"Table Created", "Column Added", "Column Modified"}, set(by_type.keys()))
+
+        created = by_type["Table Created"]
+        self.assertEqual("database1", created["database"])
+        self.assertEqual("table2", created["table"])
+        self.assertEqual(["column1"], created["payload"]["table"]["primary_key"])
+        self.assertIn('CREATE TABLE "falcon_default_schema"."table2"', created["alter"])
+        self.assertEqual(1, created["target"])
+
+        added = by_type["Column Added"]
+        self.assertEqual({"name": "column2", "type": "DATE"}, added["payload"]["column"])
+        self.assertEqual(DatabaseDifference.COLUMN_ADDED, added["type_id"])
+
+    def test_write_differences(self):
+        """Tests writing one line per difference to a file."""
+        db1 = Database(database_name="database1")
+        db1.add_table(Table(table_name="table1"))
+        db1.add_table(Table(table_name="table2"))
+        diff1, diff2 = DDLCompare.compare_databases(db1=db1, db2=Database(database_name="database2"))
+
+        filename = "/tmp/ddldiff.jsonl"
+        JSONLinesDiffWriter.write_differences(diff2, filename=filename)
+        with open(filename, "r") as infile:
+            lines = infile.readlines()
+
+        self.assertEqual(2, len(lines))
+        self.assertEqual(["table1", "table2"], [json.loads(line)["table"] for line in lines])
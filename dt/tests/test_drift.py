@@ -0,0 +1,110 @@
+import os
+import unittest
+from dt.diff import ColumnAddedDifference, ColumnDroppedDifference, TableCreatedDifference
+from dt.drift import DriftMonitor
+
+BASELINE = [
+    'CREATE TABLE "falcon_default_schema"."table1" ("col1" INT, "col2" VARCHAR(0), CONSTRAINT PRIMARY KEY ("col1"));',
+    'CREATE TABLE "falcon_default_schema"."table2" ("col1" INT, "col3" DOUBLE);',
+    'ALTER TABLE "falcon_default_schema"."table2" ADD CONSTRAINT "fk1" FOREIGN KEY ("col1") '
+    'REFERENCES "falcon_default_schema"."table1" ("col1");',
+]
+
+
+class TestDriftMonitor(unittest.TestCase):
+    """Tests the DriftMonitor class."""
+
+    def get_monitor(self):
+        """Returns a monitor with the baseline set."""
+        monitor = DriftMonitor(database_name="drift_db")
+        self.assertTrue(monitor.set_baseline(BASELINE))
+        return monitor
+
+    def test_group_statements(self):
+        """Tests that the create and alter statements are grouped by table."""
+        monitor = DriftMonitor(database_name="drift_db")
+        statements = monitor._get_parser().get_statements_from_lines(["USE drift_db;"] + BASELINE)
+        grouped = monitor.group_statements_by_table(statements)
+        self.assertEqual([("falcon_default_schema", "table1"), ("falcon_default_schema", "table2")],
+                         list(grouped.keys()))
+        self.assertEqual(2, len(grouped[("falcon_default_schema", "table2")]))
+
+    def test_no_drift(self):
+        """Tests that matching DDL doesn't create events and an unchanged baseline isn't parsed again."""
+        monitor = self.get_monitor()
+        self.assertFalse(monitor.set_baseline(BASELINE))
+        self.assertEqual([], monitor.check(BASELINE))
+        self.assertEqual([], monitor.check(BASELINE))
+
+    def test_drift(self):
+        """Tests that changes are reported once and when they return to the baseline."""
+        monitor = self.get_monitor()
+        live = list(BASELINE)
+        live[1] = 'CREATE TABLE "falcon_default_schema"."table2" ("col1" INT, "col3" DOUBLE, "col4" DATE);'
+        live.append('CREATE TABLE "falcon_default_schema"."table3" ("col1" INT);')
+
+        events = {event.table_name: event for event in monitor.check(live)}
+        self.assertEqual({"table2", "table3"}, set(events.keys()))
+        self.assertEqual([ColumnDroppedDifference], [type(d) for d in events["table2"].differences])
+        self.assertEqual("col4", events["table2"].differences[0].column.column_name)
+
+        self.assertEqual([], monitor.check(live))  # nothing changed since the last check.
+
+        events = monitor.check(BASELINE)
+        self.assertEqual({"table2", "table3"}, {event.table_name for event in events})
+        self.assertEqual([[], []], [event.differences for event in events])
+
+    def test_missing_table(self):
+        """Tests that tables in the baseline that aren't in the live database are reported."""
+        monitor = self.get_monitor()
+        events = monitor.check(BASELINE[:1])
+        self.assertEqual(1, len(events))
+        self.assertEqual("table2", events[0].table_name)
+        self.assertTrue(type(events[0].differences[0]) is TableCreatedDifference)
+        self.assertEqual([], monitor.check(BASELINE[:1]))
+
+        events = monitor.check(BASELINE)
+        self.assertEqual(["table2"], [event.table_name for event in events])
+        self.assertEqual([], events[0].differences)
+
+    def test_cache(self):
+        """Tests that the baseline and last check are restored from the cache."""
+        monitor = self.get_monitor()
+        live = BASELINE[:1] + ['CREATE TABLE "falcon_default_schema"."table2" ("col1" INT);']
+        self.assertEqual(1, len(monitor.check(live)))
+
+        filename = "/tmp/drift_cache.pkl"
+        monitor.save_cache(filename)
+
+        cached = DriftMonitor(database_name="drift_db")
+        self.assertTrue(cached.load_cache(filename))
+        self.assertFalse(cached.set_baseline(BASELINE))
+        self.assertEqual([], cached.check(live))
+
+        events = cached.check(BASELINE)
+        self.assertEqual(["table2"], [event.table_name for event in events])
+        self.assertEqual([], events[0].differences)
+
+        self.assertFalse(DriftMonitor(database_name="other_db").load_cache(filename))
+        os.remove(filename)
+
+    def test_column_added(self):
+        """Tests that dropped columns are reported as needing to be added."""
+        monitor = self.get_monitor()
+        live = ['CREATE TABLE "falcon_default_schema"."table1" ("col1" INT, CONSTRAINT PRIMARY KEY ("col1"));'] + \
+            BASELINE[1:]
+        events = monitor.check(live)
+        self.assertEqual(["table1"], [event.table_name for event in events])
+        self.assertTrue(type(events[0].differences[0]) is ColumnAddedDifference)
+
+    def test_same_table_in_schemas(self):
+        """Tests that tables with the same name in different schemas are checked separately."""
+        monitor = DriftMonitor(database_name="drift_db")
+        baseline = BASELINE + ['CREATE TABLE "other_schema"."table2" ("col1" INT, "col3" DOUBLE);']
+        self.assertTrue(monitor.set_baseline(baseline))
+        self.assertEqual([], monitor.check(baseline))
+
+        live = baseline[:-1] + ['CREATE TABLE "other_schema"."table2" ("col1" INT);']
+        events = monitor.check(live)
+        self.assertEqual([("other_schema", "table2")], [(event.schema_name, event.table_name) for event in events])
+        self.assertTrue(type(events[0].differences[0]) is ColumnAddedDifference)
@@ -0,0 +1,80 @@
+import pickle
+import unittest
+from dt.model import Column, Database, Table
+
+
+class TestRelationshipGraph(unittest.TestCase):
+    """Tests the relationship graph shared by the reviews."""
+
+    @staticmethod
+    def get_database():
+        """Returns a database with a chain, a circle, and a table that relates to itself."""
+        database = Database(database_name="graphdb")
+        for table_name in ["t1", "t2", "t3", "t4", "t5", "t6"]:
+            table = Table(table_name=table_name)
+            table.add_column(Column(column_name="col1", column_type="INT"))
+            database.add_table(table)
+
+        database.get_table("t1").add_foreign_key(from_keys="col1", to_table="t2", to_keys="col1")
+        database.get_table("t1").add_relationship(to_table="t2", conditions="t1.col1 = t2.col1")
+        database.get_table("t2").add_foreign_key(from_keys="col1", to_table="t3", to_keys="col1")
+        database.get_table("t3").add_relationship(to_table="t4", conditions="t3.col1 = t4.col1")
+        database.get_table("t4").add_foreign_key(from_keys="col1", to_table="t3", to_keys="col1")
+        database.get_table("t5").add_relationship(to_table="t5", conditions="t5.col1 = t5.col1")
+        return database
+
+    def test_adjacency(self):
+        """Tests that related tables are only listed once and the counts include every relationship."""
+        database = self.get_database()
+        graph = database.get_relationship_graph()
+
+        self.assertEqual(["t2"], graph.get_related_tables("t1"))
+        self.assertEqual(["t1"], graph.get_referencing_tables("t2"))
+        self.assertEqual([], graph.get_related_tables("t6"))
+        self.assertEqual(2, database.get_number_relationships_from_table("t1"))
+        self.assertEqual(2, database.get_number_relationships_to_table("t2"))
+        self.assertEqual(0, database.get_number_relationships_to_table("t1"))
+        with self.assertRaises(ValueError):
+            database.get_number_relationships_to_table("unknown")
+
+    def test_cycles_depth_and_reachability(self):
+        """Tests the results that are found from the graph."""
+        graph = self.get_database().get_relationship_graph()
+
+        self.assertEqual([["t3", "t4"], ["t5"]], sorted(sorted(c) for c in graph.get_cycles()))
+        self.assertEqual(2, graph.get_depth("t1"))
+        self.assertEqual(0, graph.get_depth("t3"))
+        self.assertEqual(0, graph.get_depth("t6"))
+        self.assertEqual({"t2", "t3", "t4"}, graph.get_reachable_tables("t1"))
+        self.assertEqual({"t3", "t4"}, graph.get_reachable_tables("t3"))
+        self.assertEqual([["t1", "t2", "t3", "t4"]], graph.get_long_chains(max_reference_chain=2, max_chains=10))
+
+    def test_rebuilt_on_change(self):
+        """Tests that the graph is shared until the database changes."""
+        database = self.get_database()
+        graph = database.get_relationship_graph()
+        self.assertIs(graph, database.get_relationship_graph())
+
+        database.get_table("t6").add_foreign_key(from_keys="col1", to_table="t1", to_keys="col1")
+        graph = database.get_relationship_graph()
+        self.assertEqual(["t1"], graph.get_related_tables("t6"))
+        self.assertEqual(3, graph.get_depth("t6"))
+
+        database.drop_table("t6")
+        self.assertNotIn("t6", database.get_relationship_graph().adjacency)
+
+        loaded = pickle.loads(pickle.dumps(database))
+        self.assertEqual(["t2"], loaded.get_relationship_graph().get_related_tables("t1"))
+
+    def test_changes_to_other_databases(self):
+        """Tests that only changes to the tables in a database rebuild its graph."""
+        database, other = self.get_database(), self.get_database()
+        graph = database.get_relationship_graph()
+        other.get_relationship_graph()
+        other.get_table("t6").add_foreign_key(from_keys="col1", to_table="t1", to_keys="col1")
+        self.assertIs(graph, database.get_relationship_graph())
+        self.assertEqual(["t1"], other.get_relationship_graph().get_related_tables("t6"))
+
+        table = pickle.loads(pickle.dumps(database.get_table("t6")))
+        table.add_foreign_key(from_keys="col1", to_table="t1", to_keys="col1")
+        self.assertIs(graph, database.get_relationship_graph())
@@ -1,7 +1,14 @@
+import json
+import os
+from os import path
+import shutil
+import tempfile
 import unittest
+from openpyxl import Workbook, load_workbook
 
 from dt.model import DatamodelConstants, Database, Table, Column, ShardKey, Worksheet
-from dt.io import DDLParser, TQLWriter, XLSWriter, XLSReader, YAMLWorksheetReader
+from dt.io import DDLParser, TQLWriter, XLSWriter, XLSReader, XLSXRowReader, CSVWriter, CSVReader, JSONWriter, JSONReader
+from dt.io import YAMLWorksheetReader
 
 # -------------------------------------------------------------------------------------------------------------------
 
@@ -204,6 +211,65 @@ class TestTQLWriter(unittest.TestCase):
                 tql,
             )
 
+    def test_write_in_parallel(self):
+        """Tests that writing with multiple jobs creates the same output as a single job."""
+        database = Database(database_name="database1")
+        for idx in range(10):
+            table = Table(table_name=f"table{idx}", primary_key="col1")
+            table.add_column(Column(column_name="col1", column_type="INT"))
+            if idx > 0:
+                table.add_foreign_key(from_keys="col1", to_table=f"table{idx - 1}", to_keys="col1")
+                table.add_relationship(to_table="table0", conditions=f'("table{idx}"."col1" = "table0"."col1")')
+            database.add_table(table)
+
+        TQLWriter(lowercase=True).write_tql(database=database, filename="/tmp/datamodelio.test")
+        with open("/tmp/datamodelio.test", "r") as input_file:
+            expected = input_file.read()
+
+        tables_per_job = TQLWriter.TABLES_PER_JOB
+        try:
+            TQLWriter.TABLES_PER_JOB = 3
+            TQLWriter(lowercase=True, jobs=2).write_tql(database=database, filename="/tmp/datamodelio.test")
+        finally:
+            TQLWriter.TABLES_PER_JOB = tables_per_job
+
+        with open("/tmp/datamodelio.test", "r") as input_file:
+            self.assertEqual(expected, input_file.read())
+
+    def test_write_tql_directory(self):
+        """Tests writing a file per table with a manifest."""
+        database = TestTQLWriter.get_complex_db()
+        database.add_table(Table(table_name="table/3", schema_name="other_schema"))
+
+        directory = "/tmp/datamodelio_dir"
+        shutil.rmtree(directory, ignore_errors=True)
+        manifest = TQLWriter(create_db=True).write_tql_directory(database=database, directory=directory)
+
+        self.assertEqual(["database", "tables", "foreign_keys", "relationships"],
+                         [phase["name"] for phase in manifest["phases"]])
+        self.assertEqual(["falcon_default_schema/table1.tql", "falcon_default_schema/table2.tql",
+                          "other_schema/table_3.tql"], manifest["phases"][1]["files"])
+        self.assertEqual(["tables"], manifest["phases"][2]["depends_on"])
+
+        with open(path.join(directory, "manifest.json"), "r") as input_file:
+            self.assertEqual(manifest, json.load(input_file))
+
+        with open(path.join(directory, "database.tql"), "r") as input_file:
+            self.assertIn('CREATE SCHEMA "other_schema"', input_file.read())
+
+        with open(path.join(directory, "falcon_default_schema/table2.tql"), "r") as input_file:
+            tql = input_file.read()
+            self.assertTrue(tql.startswith('USE "database2";'))
+            self.assertIn('CREATE TABLE "falcon_default_schema"."table2"', tql)
+            self.assertNotIn("table1", tql)
+
+        with open(path.join(directory, "foreign_keys.tql"), "r") as input_file:
+            tql = input_file.read()
+            self.assertTrue(tql.startswith('USE "database2";'))
+            self.assertIn('ADD CONSTRAINT "FK_table2_to_table1"', tql)
+
+        shutil.rmtree(directory)
+
 
 # -------------------------------------------------------------------------------------------------------------------
 
@@ -243,8 +309,64 @@ class TestXLSWriter(unittest.TestCase):
         )
         database.add_table(table)
 
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
         writer = XLSWriter()
-        writer.write_database(database, "test_excel")
+        writer.write_database(database, path.join(directory, "test_excel"))
+
+    def test_excel_contents(self):
+        """Tests that each sheet is written with the header and a row per item."""
+        database = Database(database_name="xdb")
+        table = Table(table_name="table1", schema_name="s1", primary_key="column_1")
+        table.add_column(Column(column_name="column_1", column_type="INT"))
+        table.add_column(Column(column_name="column_2", column_type="DOUBLE"))
+        database.add_table(table)
+        table = Table(table_name="table2", schema_name="s1", shard_key=ShardKey("column_1", 16))
+        table.add_column(Column(column_name="column_1", column_type="INT"))
+        table.add_foreign_key(from_keys="column_1", to_table="table1", to_keys="column_1")
+        database.add_table(table)
+
+        XLSWriter().write_database(database, "/tmp/test_excel_contents")
+        workbook = load_workbook("/tmp/test_excel_contents.xlsx", read_only=True)
+        self.assertEqual(["Columns", "Tables", "Foreign Keys", "Relationships"], workbook.sheetnames)
+
+        columns = list(workbook["Columns"].iter_rows(values_only=True))
+        self.assertEqual(tuple(XLSWriter.COLUMNS_HEADER), columns[0])
+        self.assertEqual(("xdb", "s1", "table1", 2, "column_2", "DOUBLE"), columns[2])
+        self.assertEqual(4, len(columns))
+
+        tables = list(workbook["Tables"].iter_rows(values_only=True))
+        self.assertEqual(("xdb", "s1", "table2"), tables[2][:3])
+        self.assertEqual(("column_1", 16), tables[2][8:10])
+
+        foreign_keys = list(workbook["Foreign Keys"].iter_rows(values_only=True))
+        self.assertEqual(("FK_table2_to_table1", "xdb", "s1", "table2", "column_1", "table1", "column_1"),
+                         foreign_keys[1])
+        self.assertEqual(1, len(list(workbook["Relationships"].iter_rows(values_only=True))))
+        workbook.close()
+
+    def test_excel_counts(self):
+        """Tests writing the counts on the Tables sheet as values instead of formulas."""
+        database = Database(database_name="xdb")
+        for table_name in ["table1", "table2", "table3"]:
+            table = Table(table_name=table_name, schema_name="s1")
+            table.add_column(Column(column_name="column_1", column_type="INT"))
+            database.add_table(table)
+        database.get_table("table2").add_foreign_key(from_keys="column_1", to_table="table1", to_keys="column_1")
+        database.get_table("table3").add_foreign_key(from_keys="column_1", to_table="table1", to_keys="column_1")
+        # COUNTIF ignores case, so the relationship counts for table2.
+        database.get_table("table3").add_relationship(to_table="Table2", conditions="table3.column_1 = table2.column_1")
+
+        XLSWriter(use_formulas=False).write_database(database, "/tmp/test_excel_counts")
+        workbook = load_workbook("/tmp/test_excel_counts.xlsx", read_only=True)
+        rows = list(workbook["Tables"].iter_rows(min_row=2, values_only=True))
+        workbook.close()
+
+        # "# Columns" followed by the FKs and relationships from and to each table.  Empty strings are read as None.
+        self.assertEqual([(1, None, 2, None, None),
+                          (1, 1, None, None, 1),
+                          (1, 1, None, 1, None)],
+                         [(row[6],) + row[11:15] for row in rows])
 
 
 # TODO Add read of the file to spot check creation.
@@ -257,7 +379,7 @@ class TestXLSReader(unittest.TestCase):
 
     def test_reading_excel(self):
         """Tests reading a worksheet."""
-        databases = XLSReader().read_xls("test_excel_reader.xlsx")
+        databases = XLSReader().read_xls(path.join(path.dirname(__file__), "test_excel_reader.xlsx"))
 
         database = databases.get("xdb")
         self.assertIsNotNone(database)
@@ -310,6 +432,164 @@ class TestXLSReader(unittest.TestCase):
         self.assertEqual(fk.to_keys, ["column_1", "column_3"])
 
 
+    def test_round_trip(self):
+        """Tests reading a workbook written by XLSWriter."""
+        database = Database(database_name="rtdb")
+        table = Table(table_name="table1", schema_name="s1", primary_key=["column_1", "column_2"],
+                      shard_key=ShardKey("column_1", 64))
+        table.add_column(Column(column_name="column_1", column_type="INT"))
+        table.add_column(Column(column_name="column_2", column_type="VARCHAR(0)"))
+        database.add_table(table)
+        table = Table(table_name="table2", schema_name="s1")
+        table.add_column(Column(column_name="column_1", column_type="INT"))
+        table.add_foreign_key(from_keys="column_1", to_table="table1", to_keys="column_1")
+        table.add_relationship(to_table="table1", conditions="table2.column_1 = table1.column_1")
+        database.add_table(table)
+
+        XLSWriter(use_formulas=False).write_database(database, "/tmp/test_excel_round_trip")
+        databases = XLSReader().read_xls("/tmp/test_excel_round_trip.xlsx")
+
+        read_database = databases["rtdb"]
+        self.assertEqual(["table1", "table2"], list(read_database.get_table_names()))
+        table1 = read_database.get_table("table1")
+        self.assertEqual(["column_1", "column_2"], table1.primary_key)
+        self.assertEqual(64, table1.shard_key.number_shards)
+        self.assertEqual("VARCHAR(0)", table1.get_column("column_2").column_type)
+        table2 = read_database.get_table("table2")
+        self.assertIsNone(table2.shard_key)
+        self.assertEqual(["column_1"], table2.get_foreign_key("FK_table2_to_table1").to_keys)
+        self.assertEqual(1, len(table2.relationships))
+
+    def test_row_reader(self):
+        """Tests reading values, including shared strings and missing cells, from a workbook saved by openpyxl."""
+        workbook = Workbook()
+        ws = workbook.active
+        ws.title = "Sheet A"
+        ws.append(["name", None, "count", "ratio", "flag"])
+        ws.append(["x", "y", 3, 1.5, True])
+        ws["B4"] = "after a blank row"
+        workbook.create_sheet("Sheet B")
+        workbook.save("/tmp/test_row_reader.xlsx")
+
+        with XLSXRowReader("/tmp/test_row_reader.xlsx") as reader:
+            self.assertEqual(["Sheet A", "Sheet B"], reader.sheetnames)
+            self.assertEqual([["name", None, "count", "ratio", "flag"],
+                              ["x", "y", 3, 1.5, True],
+                              [None, "after a blank row"]], list(reader.iter_rows("Sheet A")))
+            self.assertEqual([], list(reader.iter_rows("Sheet B")))
+
+    def test_errors_are_aggregated(self):
+        """Tests that rows for unknown tables are skipped and reported together."""
+        workbook = Workbook()
+        workbook.remove(workbook.active)
+        for sheet_name in XLSReader.required_sheets:
+            workbook.create_sheet(sheet_name).append(XLSReader.required_columns[sheet_name])
+        workbook["Tables"].append(["edb", "s1", "table1", "daily", "partial", "", "", "column_1", "", "", ""])
+        for idx in range(100):
+            workbook["Columns"].append(["edb", "s1", "table1", idx + 1, f"column_{idx}", "INT"])
+            workbook["Columns"].append(["edb", "s1", f"missing_{idx % 3}", 1, "column_1", "INT"])
+        workbook["Foreign Keys"].append(["", "edb", "s1", "table1", "column_1", "table2", "column_1"])
+        workbook["Relationships"].append(["rel", "edb", "s1", "missing_0", "table1", "a = b"])
+        workbook["Relationships"].append(["rel", "other_db", "s1", "table1", "table1", "a = b"])
+        workbook.save("/tmp/test_excel_errors.xlsx")
+
+        reader = XLSReader()
+        databases = reader.read_xls("/tmp/test_excel_errors.xlsx")
+
+        table1 = databases["edb"].get_table("table1")
+        self.assertEqual(100, table1.number_columns())
+        self.assertIsNotNone(table1.get_foreign_key("FK_table1_to_table2"))
+
+        self.assertEqual(100, sum(reader.errors[("Columns", "unknown table")].values()))
+        self.assertEqual(3, len(reader.errors[("Columns", "unknown table")]))
+        self.assertEqual(1, sum(reader.errors[("Relationships", "unknown table")].values()))
+        self.assertEqual(["other_db"], list(reader.errors[("Relationships", "unknown database")].keys()))
+
+# -------------------------------------------------------------------------------------------------------------------
+
+
+class TestCSVBundle(unittest.TestCase):
+    """Tests the CSVWriter and CSVReader classes."""
+
+    def test_round_trip(self):
+        """Tests reading CSV and TSV files written by CSVWriter."""
+        database = Database(database_name="csvdb")
+        table = Table(table_name="table1", schema_name="s1", primary_key=["column_1", "column_2"],
+                      shard_key=ShardKey("column_1", 32))
+        table.add_column(Column(column_name="column_1", column_type="INT"))
+        table.add_column(Column(column_name="column_2", column_type="VARCHAR(0)"))
+        database.add_table(table)
+        table = Table(table_name="table2", schema_name="s1")
+        table.add_column(Column(column_name="column_1", column_type="INT"))
+        table.add_foreign_key(from_keys="column_1", to_table="table1", to_keys="column_1")
+        table.add_relationship(to_table="table1", conditions="table2.column_1 = table1.column_1, \"quoted\"")
+        database.add_table(table)
+
+        for delimiter, extension in ((",", "csv"), ("\t", "tsv")):
+            directory = f"/tmp/test_{extension}_bundle"
+            shutil.rmtree(directory, ignore_errors=True)
+            CSVWriter(delimiter=delimiter).write_database(database, directory)
+            self.assertTrue(path.exists(path.join(directory, f"foreign_keys.{extension}")))
+
+            read_database = CSVReader().read_csv(directory)["csvdb"]
+            self.assertEqual(["table1", "table2"], list(read_database.get_table_names()))
+            table1 = read_database.get_table("table1")
+            self.assertEqual(["column_1", "column_2"], table1.primary_key)
+            self.assertEqual(32, table1.shard_key.number_shards)
+            self.assertEqual("VARCHAR(0)", table1.get_column("column_2").column_type)
+            table2 = read_database.get_table("table2")
+            self.assertEqual(["column_1"], table2.get_foreign_key("FK_table2_to_table1").to_keys)
+            relationship = list(table2.relationships.values())[0]
+            self.assertEqual("table2.column_1 = table1.column_1, \"quoted\"", relationship.conditions)
+            shutil.rmtree(directory)
+
+# -------------------------------------------------------------------------------------------------------------------
+
+
+class TestJSON(unittest.TestCase):
+    """Tests the JSONWriter and JSONReader classes."""
+
+    DDL = [
+        'CREATE TABLE "s1"."table1" ("column_1" INT, "column_2" VARCHAR(0), "column_3" DOUBLE, '
+        'CONSTRAINT PRIMARY KEY ("column_1", "column_2")) PARTITION BY HASH (96) KEY ("column_1");',
+        'CREATE TABLE "s1"."table2" ("column_1" INT, "column_2" VARCHAR(0), "column_4" DATE);',
+        'ALTER TABLE "s1"."table2" ADD CONSTRAINT "fk_2_to_1" FOREIGN KEY ("column_1", "column_2") '
+        'REFERENCES "s1"."table1" ("column_1", "column_2");',
+        'ALTER TABLE "s1"."table2" ADD RELATIONSHIP "rel_2_to_1" WITH "s1"."table1" '
+        'AS "table2"."column_4" = "table1"."column_3";',
+    ]
+
+    def test_round_trip(self):
+        """Tests that the model read from JSON writes the same TQL as the parsed DDL."""
+        database = DDLParser(database_name="jsondb").parse_ddl_lines(TestJSON.DDL)
+        database.to_json("/tmp/test_json.json")
+        read_database = Database.from_json("/tmp/test_json.json")
+
+        self.assertEqual("jsondb", read_database.database_name)
+        self.assertEqual(list(database.get_table_names()), list(read_database.get_table_names()))
+        TQLWriter(create_db=True).write_tql(database, "/tmp/test_json_1.tql")
+        TQLWriter(create_db=True).write_tql(read_database, "/tmp/test_json_2.tql")
+        with open("/tmp/test_json_1.tql", "r") as tql_1, open("/tmp/test_json_2.tql", "r") as tql_2:
+            self.assertEqual(tql_1.read(), tql_2.read())
+
+    def test_read_in_chunks(self):
+        """Tests reading when values cross chunks and the keys are in a different order."""
+        tables = [JSONWriter.table_to_dict(table)
+                  for table in DDLParser(database_name="jsondb").parse_ddl_lines(TestJSON.DDL)]
+        with open("/tmp/test_json_chunks.json", "w") as json_file:
+            json.dump({"tables": tables, "version": 12345, "database": "jsondb"}, json_file, indent=2)
+
+        reader = JSONReader()
+        reader.CHUNK_SIZE = 7
+        database = reader.read_database("/tmp/test_json_chunks.json")
+        self.assertEqual(["table1", "table2"], list(database.get_table_names()))
+        self.assertEqual(96, database.get_table("table1").shard_key.number_shards)
+        self.assertEqual(["column_1", "column_2"], database.get_table("table2").get_foreign_key("fk_2_to_1").to_keys)
+
+        with open("/tmp/test_json_chunks.json", "w") as json_file:
+            json_file.write('{"database": "jsondb", "tables": [{"name": "table1"')
+        self.assertRaises(ValueError, Database.from_json, "/tmp/test_json_chunks.json")
+
 # -------------------------------------------------------------------------------------------------------------------
 
 
@@ -366,6 +646,70 @@ class TestYAMLWorksheetReader(unittest.TestCase):
 
         self.assertTrue(True)
 
+    WORKSHEET_YAML = """worksheet:
+  name: {name}
+  description: A worksheet for testing.
+  properties:
+    is_bypass_rls: false
+  tables:
+  - name: table1
+  - name: table2
+  joins:
+  - name: join_1
+    source: table2
+    destination: table1
+    type: INNER
+    is_one_to_one: false
+  table_paths:
+  - id: table1_1
+    table: table1
+    join_path:
+    - {{}}
+  - id: table2_1
+    table: table2
+    join_path:
+    - join:
+      - join_1
+  formulas:
+  - name: double it
+    expr: "[table1_1::column_1] * 2"
+  worksheet_columns:
+  - name: Column 1
+    column_id: table1_1::column_1
+    properties:
+      column_type: ATTRIBUTE
+  - name: Double It
+    formula_id: double it
+    properties:
+      column_type: MEASURE
+"""
+
+    def test_read_from_directory(self):
+        """Tests reading all of the worksheets in a directory."""
+        directory = "/tmp/test_worksheets"
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+        for idx in range(3):
+            with open(path.join(directory, f"ws_{idx}.worksheet.tml"), "w") as ws_file:
+                ws_file.write(TestYAMLWorksheetReader.WORKSHEET_YAML.format(name=f"ws_{idx}"))
+        with open(path.join(directory, "notes.txt"), "w") as notes_file:
+            notes_file.write("not a worksheet")
+
+        for processes in (1, 2):
+            worksheets = YAMLWorksheetReader.read_from_directory(directory, processes=processes)
+            self.assertEqual(["ws_0.worksheet.tml", "ws_1.worksheet.tml", "ws_2.worksheet.tml"],
+                             [path.basename(filename) for filename in worksheets.keys()])
+            worksheet = worksheets[path.join(directory, "ws_1.worksheet.tml")]
+            self.assertEqual("ws_1", worksheet.name)
+            self.assertEqual(["table1", "table2"], [table.table_name for table in worksheet.get_tables()])
+            self.assertEqual(["join_1"], [join.name for join in worksheet.get_joins()])
+            self.assertEqual([False, True], [column.is_formula for column in worksheet.get_columns()])
+            self.assertEqual({"table1"}, worksheet.get_column_tables("Double It"))
+
+        self.assertEqual("ws_9", YAMLWorksheetReader.create_worksheet(
+            TestYAMLWorksheetReader.WORKSHEET_YAML.format(name="ws_9")).name)
+        shutil.rmtree(directory)
+
 
 if __name__ == "__main__":
     unittest.main()
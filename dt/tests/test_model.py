@@ -1,6 +1,7 @@
 import unittest
 from dt.model import ShardKey, ForeignKey, GenericRelationship, \
     Column, Table, Database, DatamodelConstants, DatabaseValidator
+from dt.model import Worksheet, WorksheetTable, WorksheetJoin, WorksheetColumn, WorksheetTablePath, WorksheetFormula
 
 # -------------------------------------------------------------------------------------------------------------------
 
@@ -426,5 +427,92 @@ class TestDatabaseValidator(unittest.TestCase):
 # -------------------------------------------------------------------------------------------------------------------
 
 
+class TestWorksheet(unittest.TestCase):
+    """Tests the Worksheet class."""
+
+    def test_lookups(self):
+        """Tests getting tables, joins and columns by name."""
+        worksheet = Worksheet(name="ws", description=None, properties=None)
+        table1 = WorksheetTable(table_name="table1")
+        worksheet.add_table(table1)
+        worksheet.add_table(WorksheetTable(table_name="table2", table_type="alias"))
+        worksheet.add_table(WorksheetTable(table_name="table1", table_type="fqn"))
+        worksheet.add_join(WorksheetJoin("join_1", "table2", "table1", "INNER", False))
+        worksheet.add_column(WorksheetColumn(name="col1", column_id="table1_1::col1", column_properties={}))
+
+        self.assertIs(table1, worksheet.get_table("table1"))  # the first table with a name is used.
+        self.assertEqual("alias", worksheet.get_table("table2").table_type)
+        self.assertIsNone(worksheet.get_table("table3"))
+        self.assertEqual(3, len(worksheet.get_tables()))
+        self.assertEqual("table2", worksheet.get_join("join_1").source)
+        self.assertIsNone(worksheet.get_join("join_2"))
+        self.assertEqual("table1_1::col1", worksheet.get_column("col1").column_id)
+        self.assertEqual(["col1"], [column.name for column in worksheet.get_columns()])
+
+    def test_lineage(self):
+        """Tests finding the tables used by columns and formulas."""
+        worksheet = Worksheet(name="ws", description=None, properties=None)
+        for table_name in ("table1", "table2", "table3"):
+            worksheet.add_table(WorksheetTable(table_name=table_name))
+        worksheet.add_join(WorksheetJoin("join_1", "table2", "table1", "INNER", False))
+        worksheet.add_join(WorksheetJoin("join_2", "table3", "table2", "LEFT_OUTER", False))
+        worksheet.add_table_path(WorksheetTablePath("table1_1", "table1", []))
+        worksheet.add_table_path(WorksheetTablePath("table3_1", "table3", ["join_2", "join_1"]))
+        worksheet.add_formula(WorksheetFormula("f1", "[table1_1::col1] + 1", formula_id="formula_f1"))
+        worksheet.add_formula(WorksheetFormula("f2", "[f1] * [table3_1::col3] + [f2]"))
+        worksheet.add_column(WorksheetColumn(name="col1", column_id="table1_1::col1", column_properties={}))
+        worksheet.add_column(WorksheetColumn(name="col3", column_id="table3_1::col3", column_properties={}))
+        worksheet.add_column(WorksheetColumn(name="f1", column_id="formula_f1", column_properties={},
+                                             is_formula=True))
+
+        self.assertEqual(("table3_1", "col3"), (worksheet.get_column("col3").get_path(),
+                                                worksheet.get_column("col3").get_source()))
+        self.assertIsNone(worksheet.get_column("f1").get_path())
+        self.assertEqual(["join_1", "join_2"], [join.name for join in worksheet.get_joins_for_table("table2")])
+        self.assertEqual("table3", worksheet.get_table_path("table3_1").table)
+
+        self.assertEqual({"table1"}, worksheet.get_column_tables("col1"))
+        self.assertEqual({"table1", "table2", "table3"}, worksheet.get_column_tables("col3"))
+        self.assertEqual({"table1"}, worksheet.get_column_tables("f1"))
+        self.assertEqual(frozenset(), worksheet.get_column_tables("missing"))
+
+        worksheet.add_column(WorksheetColumn(name="f2", column_id="f2", column_properties={}, is_formula=True))
+        self.assertEqual({"table1", "table2", "table3"}, worksheet.get_column_tables("f2"))
+
+    def test_formula_cycle_lineage(self):
+        """Tests that formulas that refer to each other all get the tables of the cycle."""
+        worksheet = Worksheet(name="ws", description=None, properties=None)
+        for table_name in ("table1", "table2", "table3"):
+            worksheet.add_table(WorksheetTable(table_name=table_name))
+            worksheet.add_table_path(WorksheetTablePath(table_name + "_1", table_name, []))
+        worksheet.add_formula(WorksheetFormula("fa", "[table1_1::col1] + [fb]"))
+        worksheet.add_formula(WorksheetFormula("fb", "[table2_1::col2] + [fa] + [fc]"))
+        worksheet.add_formula(WorksheetFormula("fc", "[table3_1::col3]"))
+        for name in ("fb", "fa", "fc"):
+            worksheet.add_column(WorksheetColumn(name=name, column_id=name, column_properties={}, is_formula=True))
+
+        self.assertEqual({"table1", "table2", "table3"}, worksheet.get_column_tables("fa"))
+        self.assertEqual({"table1", "table2", "table3"}, worksheet.get_column_tables("fb"))
+        self.assertEqual({"table3"}, worksheet.get_column_tables("fc"))
+
+    def test_formula_ids_and_names(self):
+        """Tests that a formula ID that is the same as another formula's name refers to the formula with the ID."""
+        worksheet = Worksheet(name="ws", description=None, properties=None)
+        for table_name in ("table1", "table2"):
+            worksheet.add_table(WorksheetTable(table_name=table_name))
+            worksheet.add_table_path(WorksheetTablePath(table_name + "_1", table_name, []))
+        worksheet.add_formula(WorksheetFormula("f1", "[table1_1::col1]", formula_id="f2"))
+        worksheet.add_formula(WorksheetFormula("f2", "[table2_1::col2]", formula_id="formula_f2"))
+        worksheet.add_column(WorksheetColumn(name="f1", column_id="f2", column_properties={}, is_formula=True))
+        worksheet.add_column(WorksheetColumn(name="f2", column_id="formula_f2", column_properties={},
+                                             is_formula=True))
+
+        self.assertEqual({"table1"}, worksheet.get_column_tables("f1"))
+        self.assertEqual({"table2"}, worksheet.get_column_tables("f2"))
+
+
+# -------------------------------------------------------------------------------------------------------------------
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,129 @@
+import os
+import pickle
+import unittest
+from dt.model import Column, Database, ShardKey, Table
+from dt.snapshot import SnapshotConstants
+
+
+class TestSnapshot(unittest.TestCase):
+    """Tests saving and loading binary snapshots."""
+
+    FILENAME = "/tmp/test_snapshot.snapshot"
+
+    def tearDown(self):
+        if os.path.exists(TestSnapshot.FILENAME):
+            os.remove(TestSnapshot.FILENAME)
+
+    @staticmethod
+    def get_database():
+        """Returns a database with each of the parts of a table."""
+        database = Database(database_name="snapdb")
+        table = Table(table_name="table1", schema_name="s1", primary_key=["column_1", "column_2"],
+                      shard_key=ShardKey(["column_1", "column_2"], 96))
+        table.add_column(Column(column_name="column_1", column_type="INT"))
+        table.add_column(Column(column_name="column_2", column_type="VARCHAR(0)"))
+        database.add_table(table)
+        table = Table(table_name="täble2")
+        table.add_column(Column(column_name="column_1", column_type="INT"))
+        table.add_column(Column(column_name="column_2", column_type="VARCHAR(0)"))
+        table.add_foreign_key(from_keys=["column_1", "column_2"], to_table="table1", to_keys=["column_1", "column_2"])
+        table.add_relationship(to_table="table1", name="rel1", conditions="täble2.column_1 = table1.column_1")
+        database.add_table(table)
+        database.add_table(Table(table_name="empty"))
+        database.add_table(Table(table_name="random", shard_key=ShardKey([], 8)))
+        return database
+
+    def test_round_trip(self):
+        """Tests that a loaded snapshot matches the saved database."""
+        database = self.get_database()
+        database.save_snapshot(TestSnapshot.FILENAME)
+        loaded = Database.load_snapshot(TestSnapshot.FILENAME)
+
+        self.assertEqual("snapdb", loaded.database_name)
+        self.assertEqual(["table1", "täble2", "empty", "random"], list(loaded.get_table_names()))
+        self.assertEqual({"s1": 1, "falcon_default_schema": 3}, loaded.schemas)
+        for table in database:
+            loaded_table = loaded.get_table(table.table_name)
+            self.assertEqual(table.schema_name, loaded_table.schema_name)
+            self.assertEqual([(c.column_name, c.column_type) for c in table],
+                             [(c.column_name, c.column_type) for c in loaded_table])
+            self.assertEqual(table.primary_key, loaded_table.primary_key)
+            self.assertEqual(list(table.foreign_keys.values()), list(loaded_table.foreign_keys.values()))
+            self.assertEqual(list(table.relationships.values()), list(loaded_table.relationships.values()))
+
+        shard_key = loaded.get_table("table1").shard_key
+        self.assertEqual((["column_1", "column_2"], 96), (shard_key.shard_keys, shard_key.number_shards))
+        self.assertIsNone(loaded.get_table("empty").shard_key)
+        shard_key = loaded.get_table("random").shard_key
+        self.assertEqual(([], 8), (shard_key.shard_keys, shard_key.number_shards))
+        self.assertEqual(["column_1", "column_2"],
+                         loaded.get_table("täble2").get_foreign_key("FK_täble2_to_table1").to_keys)
+        self.assertTrue(loaded.validate().is_valid)
+
+    def test_invalid_files(self):
+        """Tests that files that aren't snapshots or are from another version are rejected."""
+        with open(TestSnapshot.FILENAME, "wb") as snapshot_file:
+            snapshot_file.write(b"CREATE TABLE t1 (c1 INT);" * 4)
+        self.assertRaises(ValueError, Database.load_snapshot, TestSnapshot.FILENAME)
+
+        self.get_database().save_snapshot(TestSnapshot.FILENAME)
+        with open(TestSnapshot.FILENAME, "r+b") as snapshot_file:
+            snapshot_file.seek(len(SnapshotConstants.MAGIC))
+            snapshot_file.write(b"\xff")
+        self.assertRaises(ValueError, Database.load_snapshot, TestSnapshot.FILENAME)
+
+        self.get_database().save_snapshot(TestSnapshot.FILENAME)
+        with open(TestSnapshot.FILENAME, "r+b") as snapshot_file:
+            snapshot_file.truncate(os.path.getsize(TestSnapshot.FILENAME) - 4)
+        self.assertRaises(ValueError, Database.load_snapshot, TestSnapshot.FILENAME)
+
+        self.get_database().save_snapshot(TestSnapshot.FILENAME)
+        with open(TestSnapshot.FILENAME, "r+b") as snapshot_file:
+            snapshot_file.seek(-4, os.SEEK_END)
+            snapshot_file.write(b"\xff" * 4)  # the number of relationships for the last table.
+        self.assertRaises(ValueError, Database.load_snapshot, TestSnapshot.FILENAME)
+        with Database.load_snapshot(TestSnapshot.FILENAME, lazy=True).tables as tables:
+            self.assertRaises(ValueError, tables.__getitem__, "random")
+
+    def test_lazy_load(self):
+        """Tests that tables in a lazily loaded snapshot are only read when they are used."""
+        self.get_database().save_snapshot(TestSnapshot.FILENAME)
+        loaded = Database.load_snapshot(TestSnapshot.FILENAME, lazy=True)
+
+        self.assertEqual("snapdb", loaded.database_name)
+        self.assertEqual(4, loaded.number_tables())
+        self.assertEqual(["table1", "täble2", "empty", "random"], list(loaded.get_table_names()))
+        self.assertEqual({"s1": 1, "falcon_default_schema": 3}, loaded.schemas)
+        self.assertEqual(0, loaded.tables.number_read())
+
+        table2 = loaded.get_table("täble2")
+        self.assertEqual(1, loaded.tables.number_read())
+        self.assertEqual(["column_1", "column_2"], table2.get_column_names())
+        self.assertEqual("rel1", table2.get_relationship("rel1").name)
+        self.assertIs(table2, loaded.get_table("täble2"))
+        self.assertIsNone(loaded.get_table("missing"))
+
+        loaded.drop_table("empty")
+        loaded.add_table(Table(table_name="new_table"))
+        self.assertEqual(["table1", "täble2", "random", "new_table"], list(loaded.get_table_names()))
+        self.assertEqual({"s1": 1, "falcon_default_schema": 3}, loaded.schemas)
+        self.assertEqual(96, loaded.get_table("table1").shard_key.number_shards)
+        self.assertTrue(loaded.validate().is_valid)
+
+    def test_lazy_pickle_and_close(self):
+        """Tests that a lazily loaded snapshot can be pickled and closed."""
+        self.get_database().save_snapshot(TestSnapshot.FILENAME)
+        loaded = Database.load_snapshot(TestSnapshot.FILENAME, lazy=True)
+        loaded.get_table("täble2")
+        unpickled = pickle.loads(pickle.dumps(loaded))
+        self.assertEqual(4, loaded.tables.number_read())
+        self.assertEqual(["table1", "täble2", "empty", "random"], list(unpickled.get_table_names()))
+        self.assertEqual(96, unpickled.get_table("table1").shard_key.number_shards)
+
+        with Database.load_snapshot(TestSnapshot.FILENAME, lazy=True).tables as tables:
+            table2 = tables["täble2"]
+        self.assertEqual(["column_1", "column_2"], table2.get_column_names())
+        self.assertIs(table2, tables["täble2"])
+        self.assertRaises(ValueError, tables.__getitem__, "table1")
+        tables.close()
+
@@ -18,17 +18,20 @@ General utilities for DDL tools.
 """
 import unittest
 import os
+import shutil
+import tempfile
 
 from dt.util import ConfigFile
 
 
 class TestConfigFile(unittest.TestCase):
     """ Tests the configuration file class."""
-    TEST_CONFIG="test.cfg"
 
     def setUp(self) -> None:
-        """Creates a test file."""
-        with open(TestConfigFile.TEST_CONFIG, "w") as test_file:
+        """Creates a test file in a temporary directory."""
+        self.directory = tempfile.mkdtemp()
+        self.test_config = os.path.join(self.directory, "test.cfg")
+        with open(self.test_config, "w") as test_file:
             test_file.write("# this is a test file.\n")
             test_file.write("key1=val1 # no spaces.\n")
             test_file.write("key2 =val2 # space before.\n")
@@ -39,8 +42,8 @@ class TestConfigFile(unittest.TestCase):
             test_file.write(" key7 is val7 # no equal, so ignore..\n")
 
     def tearDown(self) -> None:
-        """Deletes the test file."""
-        os.remove(TestConfigFile.TEST_CONFIG)
+        """Deletes the test files."""
+        shutil.rmtree(self.directory, ignore_errors=True)
 
     def test_create_config_file(self):
         cf = ConfigFile()
@@ -49,7 +52,7 @@ class TestConfigFile(unittest.TestCase):
     def test_load_from_file(self):
         """Tests loading values from a file."""
         cf = ConfigFile()
-        cf.load_from_file(TestConfigFile.TEST_CONFIG)
+        cf.load_from_file(self.test_config)
 
         self.assertEqual(4, len(cf))
         self.assertEqual(cf["key1"], "val1")
@@ -59,7 +62,7 @@ class TestConfigFile(unittest.TestCase):
 
     def test_write_to_file(self):
         """Test writing the __config to a file."""
-        test_filename = "test_write.cf"
+        test_filename = os.path.join(self.directory, "test_write.cf")
         cf1 = ConfigFile()
         cf1["key1"] = "val1"
         cf1["key2"] = "val2"
@@ -12,7 +12,6 @@ setup(
     license='MIT',
     packages=find_packages(exclude=('tests', 'docs')),
     install_requires=[
-        'xlrd',
         'openpyxl',
         'pyYAML',
         'py-tql@git+https://github.com/thoughtspot/py-tql/'